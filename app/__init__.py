@@ -1,19 +1,36 @@
 from flask import Flask
 
+from app import conversions, database, instrumentation
 from app.book import bp as book_bp
-from app.extensions import db, migrate, storage
+from app.extensions import db, init_storage, migrate, page_cache
 from app.images import bp as images_bp
+from app.images.derivatives import pipeline as image_derivatives
 from app.ingredients import bp as ingredients_bp
 from app.recipes import bp as recipe_bp
+from app.recipes import display as recipe_display
 
-app = Flask(__name__)
 
-app.config.from_object("app.config.Config")
-storage.init_app(app)
-db.init_app(app)
-migrate.init_app(app, db)
+def create_app(config="app.config.Config") -> Flask:
+    """Create the application: load `config`, bind the extensions and register the blueprints.
 
-app.register_blueprint(recipe_bp)
-app.register_blueprint(ingredients_bp)
-app.register_blueprint(images_bp)
-app.register_blueprint(book_bp)
+    Serving processes call this once; with gunicorn's `preload_app` the master
+    does, and `app.preload.warm` fills its caches before the workers fork.
+    """
+    app = Flask(__name__)
+
+    app.config.from_object(config)
+    storage = init_storage(app)
+    page_cache.init_app(app)
+    conversions.init_app(app)
+    image_derivatives.init_app(app, storage=storage)
+    db.init_app(app)
+    database.init_app(app, db)
+    instrumentation.init_app(app, db)
+    migrate.init_app(app, db)
+    recipe_display.init_app(app)
+
+    app.register_blueprint(recipe_bp)
+    app.register_blueprint(ingredients_bp)
+    app.register_blueprint(images_bp)
+    app.register_blueprint(book_bp)
+    return app
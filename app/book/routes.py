@@ -1,14 +1,45 @@
 from itertools import groupby
 
-from flask import render_template
+from flask import abort, render_template
 
 from app.book import bp
-from app.recipes.models import Recipe
+from app.conditional import make_etag, not_modified, with_validators
+from app.extensions import db, page_cache
+from app.recipes.models import Recipe, RecipeIngredient, recipe_graph
+
+
+def cache_key(recipe_slug: str, version: int, updated_at) -> str:
+    """Key a rendered page by the recipe content it shows.
+
+    Every committed change bumps `version` and `updated_at`, so a changed
+    recipe gets a new key in every worker and on every backend, and a render
+    of older data can only ever be stored under the older key. Stale pages
+    are never read again and age out of the cache.
+    """
+    return f"book:{recipe_slug}:{version}:{updated_at.isoformat()}"
 
 
 @bp.route("/<recipe_slug>/")
 def book(recipe_slug):
-    recipe = Recipe.query.get_or_404(recipe_slug)
-    ingredients = sorted(recipe.recipe_ingredients, key=lambda i: i.ingredient_list)
-    ingredient_lists = ((k, list(v)) for k, v in groupby(ingredients, lambda i: i.ingredient_list))
-    return render_template("bookview.html", **locals())
+    # Only the version columns are needed to answer a revalidation or find the cached page.
+    stamp = db.session.execute(
+        db.select(Recipe.version, Recipe.updated_at).where(Recipe.slug == recipe_slug)
+    ).one_or_none()
+    if stamp is None:
+        abort(404)
+
+    # The timestamp keeps a deleted and recreated recipe (version 1 again) from matching.
+    etag = make_etag(recipe_slug, stamp.version, stamp.updated_at, page_cache.version)
+    if (response := not_modified(etag, stamp.updated_at)) is not None:
+        return response
+
+    key = cache_key(recipe_slug, stamp.version, stamp.updated_at)
+    html = page_cache.get(key)
+    if html is None:
+        recipe = db.one_or_404(db.select(Recipe).options(*recipe_graph()).where(Recipe.slug == recipe_slug))
+        ingredients = sorted(recipe.recipe_ingredients, key=lambda i: i.ingredient_list)
+        RecipeIngredient.prime_weights(ingredients)
+        ingredient_lists = ((k, list(v)) for k, v in groupby(ingredients, lambda i: i.ingredient_list))
+        html = render_template("bookview.html", recipe=recipe, ingredient_lists=ingredient_lists)
+        page_cache.set(key, html)
+    return with_validators(html, etag, stamp.updated_at)
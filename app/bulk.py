@@ -0,0 +1,53 @@
+"""Set-based inserts shared by the write paths."""
+
+from sqlalchemy import select
+
+
+def insert_ignore(session, model, rows: list[dict], returning=None):
+    """Insert `rows` into `model`'s table in one statement, skipping rows whose key already exists.
+
+    Uses `INSERT ... ON CONFLICT DO NOTHING` on PostgreSQL and SQLite (where
+    it is spelled `INSERT OR IGNORE`), so concurrent writers creating the
+    same row cannot make the statement fail. With `returning` (a column),
+    returns the values of that column for the rows actually inserted.
+    """
+    if not rows:
+        return []
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"insert_ignore supports PostgreSQL and SQLite, not {dialect}")
+
+    stmt = insert(model).values(rows).on_conflict_do_nothing()
+    if returning is None:
+        session.execute(stmt)
+        return []
+    return list(session.execute(stmt.returning(returning)).scalars())
+
+
+def get_or_create_all(session, model, key, rows: list[dict]) -> tuple[dict, list]:
+    """Load the `model` rows whose `key` column matches `rows`, inserting the missing ones.
+
+    Costs one `SELECT ... IN` when every row exists, and an `insert_ignore`
+    plus a second `SELECT ... IN` for the missing ones otherwise, however
+    many rows there are. Returns a dict of instances by key and the keys
+    this call inserted (rows a concurrent writer inserted first are loaded,
+    not counted).
+    """
+    rows = {row[key.key]: row for row in rows}
+    if not rows:
+        return {}, []
+    found = {getattr(obj, key.key): obj for obj in session.scalars(select(model).where(key.in_(rows)))}
+    missing = [row for k, row in rows.items() if k not in found]
+    if not missing:
+        return found, []
+
+    created = insert_ignore(session, model, missing, returning=key)
+    found.update(
+        (getattr(obj, key.key), obj)
+        for obj in session.scalars(select(model).where(key.in_([row[key.key] for row in missing])))
+    )
+    return found, created
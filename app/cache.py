@@ -0,0 +1,185 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Protocol, Union
+
+
+class CacheBackend(Protocol):
+    """Storage for cached pages: one value per key, tagged with a version."""
+
+    def get(self, key: str, version: str) -> Optional[str]: ...
+
+    def set(self, key: str, version: str, value: str) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class NullBackend:
+    """Backend that never stores anything; used to disable caching."""
+
+    def get(self, key, version):
+        return None
+
+    def set(self, key, version, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryBackend:
+    """In-process LRU backend.
+
+    Entries are private to one process, so deletes made in one gunicorn worker
+    are not seen by the others; only use it with a single worker or when keys
+    carry a version that changes with the content.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """Backend shared by every process on the host through a SQLite file.
+
+    The database runs in WAL mode so readers in one worker never block a
+    writer in another. Least recently stored entries are pruned once the
+    table grows past `max_entries`.
+    """
+
+    PRUNE_EVERY = 64
+
+    def __init__(self, path: Union[str, Path], max_entries: int = 10000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS page_cache "
+                "(key TEXT PRIMARY KEY, version TEXT NOT NULL, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_page_cache_stored_at ON page_cache (stored_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection inherited from the parent process (e.g. a preloading gunicorn master) must not be used.
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, version):
+        row = (
+            self._connection()
+            .execute("SELECT value FROM page_cache WHERE key = ? AND version = ?", (key, version))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def set(self, key, version, value):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO page_cache (key, version, value, stored_at) VALUES (?, ?, ?, ?)",
+            (key, version, value, time.time()),
+        )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            conn.execute(
+                "DELETE FROM page_cache WHERE key IN "
+                "(SELECT key FROM page_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM page_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        self._connection().execute("DELETE FROM page_cache")
+
+
+class PageCache:
+    """Cache for rendered HTML pages with a pluggable backend.
+
+    The backend is picked from `PAGE_CACHE_BACKEND` ("memory", "sqlite" or
+    "null") when `init_app` is called; `PAGE_CACHE_SIZE` bounds the number of
+    entries and `PAGE_CACHE_PATH` locates the SQLite file (defaulting to the
+    app's instance folder). Every entry is stored with a version string and
+    only returned when asked for with the same version, so `PAGE_CACHE_VERSION`
+    can be bumped to drop every entry, e.g. after a template change.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend = backend or NullBackend()
+        self.version = ""
+
+    def init_app(self, app):
+        kind = app.config.get("PAGE_CACHE_BACKEND", "memory")
+        size = app.config.get("PAGE_CACHE_SIZE", 1024)
+        if kind == "memory":
+            self.backend = MemoryBackend(max_entries=size)
+        elif kind == "sqlite":
+            path = app.config.get("PAGE_CACHE_PATH") or Path(app.instance_path) / "page_cache.sqlite3"
+            self.backend = SQLiteBackend(path, max_entries=size)
+        elif kind in ("null", None):
+            self.backend = NullBackend()
+        else:
+            raise ValueError(f"unknown PAGE_CACHE_BACKEND {kind!r}")
+        self.version = str(app.config.get("PAGE_CACHE_VERSION", ""))
+
+        if not hasattr(app, "extensions"):
+            app.extensions = {}
+        app.extensions["page_cache"] = self
+        return self
+
+    def _version(self, version) -> str:
+        return f"{self.version}:{version}"
+
+    def get(self, key: str, version="") -> Optional[str]:
+        return self.backend.get(key, self._version(version))
+
+    def set(self, key: str, value: str, version="") -> None:
+        self.backend.set(key, self._version(version), value)
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
@@ -0,0 +1,46 @@
+"""Helpers for answering conditional GETs before doing the expensive work.
+
+Views compute a validator from cheap metadata (a row version, a timestamp),
+ask `not_modified` whether the client's copy is still current and only load
+and render the page when it is not.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional
+
+from flask import Response, make_response, request
+from werkzeug.http import is_resource_modified
+
+
+def make_etag(*parts) -> str:
+    """Return a strong entity tag derived from `parts`."""
+    return hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()
+
+
+def _http_date(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    # SQLite hands back naive datetimes; they are stored as UTC. HTTP dates
+    # have whole-second resolution, so compare at that resolution too.
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """Return a 304 response if the request's validators match, else None."""
+    last_modified = _http_date(last_modified)
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    return with_validators(Response(status=304), etag, last_modified)
+
+
+def with_validators(response, etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Attach `ETag`/`Last-Modified` and require revalidation on every use."""
+    response = make_response(response)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _http_date(last_modified)
+    response.cache_control.no_cache = True
+    return response
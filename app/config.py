@@ -1,11 +1,102 @@
 import os
 import secrets
 
+from app.database import engine_options
+
 
 class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool for server databases: ping before use and recycle, so a
+    # failover costs a reconnect rather than an error. Timeout in milliseconds.
+    DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", "5"))
+    DATABASE_MAX_OVERFLOW = int(os.environ.get("DATABASE_MAX_OVERFLOW", "10"))
+    DATABASE_POOL_TIMEOUT = float(os.environ.get("DATABASE_POOL_TIMEOUT", "30"))
+    DATABASE_POOL_RECYCLE = int(os.environ.get("DATABASE_POOL_RECYCLE", "1800"))
+    DATABASE_POOL_PRE_PING = os.environ.get("DATABASE_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    DATABASE_STATEMENT_TIMEOUT = int(os.environ.get("DATABASE_STATEMENT_TIMEOUT", "0"))
+    DATABASE_APPLICATION_NAME = os.environ.get("DATABASE_APPLICATION_NAME", "cookbook")
+    # Connect through PgBouncer in transaction mode (no startup options or session state).
+    DATABASE_PGBOUNCER = os.environ.get("DATABASE_PGBOUNCER", "").lower() in ("1", "true", "yes")
+    # SQLite: WAL with tuned pragmas on every connection and writes that queue for
+    # the write lock (BEGIN IMMEDIATE) for up to SQLITE_BUSY_TIMEOUT ms; see app.database.
+    SQLITE_TUNED = os.environ.get("SQLITE_TUNED", "true").lower() in ("1", "true", "yes")
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", "15000"))
+    SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", "-64000"))
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # Read replicas: reads in GET requests go to a healthy replica, probed every
+    # CHECK_INTERVAL seconds (and, on PostgreSQL, at most MAX_LAG seconds behind);
+    # a client that wrote reads from the primary for READ_YOUR_WRITES seconds.
+    DATABASE_REPLICA_URLS = [
+        url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+    ]
+    SQLALCHEMY_BINDS = {f"replica_{i}": url for i, url in enumerate(DATABASE_REPLICA_URLS)}
+    DATABASE_REPLICA_CHECK_INTERVAL = float(os.environ.get("DATABASE_REPLICA_CHECK_INTERVAL", "10"))
+    DATABASE_REPLICA_MAX_LAG = float(os.environ.get("DATABASE_REPLICA_MAX_LAG", "0"))
+    DATABASE_READ_YOUR_WRITES = float(os.environ.get("DATABASE_READ_YOUR_WRITES", "5"))
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI,
+        pool_size=DATABASE_POOL_SIZE,
+        max_overflow=DATABASE_MAX_OVERFLOW,
+        pool_timeout=DATABASE_POOL_TIMEOUT,
+        pool_recycle=DATABASE_POOL_RECYCLE,
+        pool_pre_ping=DATABASE_POOL_PRE_PING,
+        statement_timeout=DATABASE_STATEMENT_TIMEOUT,
+        application_name=DATABASE_APPLICATION_NAME,
+        pgbouncer=DATABASE_PGBOUNCER,
+    )
+
     # Auto-generate SECRET_KEY if not provided for security
     # WARNING: This generates a NEW key on each startup, invalidating sessions
     # Set SECRET_KEY environment variable for persistent sessions
     SECRET_KEY = os.environ.get("SECRET_KEY") or secrets.token_hex(32)
+
+    # Rendered-page cache: "memory" (per-process LRU), "sqlite" (shared by all
+    # workers on the host) or "null" to disable it.
+    PAGE_CACHE_BACKEND = os.environ.get("PAGE_CACHE_BACKEND", "memory")
+    PAGE_CACHE_SIZE = int(os.environ.get("PAGE_CACHE_SIZE", "1024"))
+    PAGE_CACHE_PATH = os.environ.get("PAGE_CACHE_PATH")
+    PAGE_CACHE_VERSION = os.environ.get("PAGE_CACHE_VERSION", "1")
+
+    # Where uploads live: "filesystem" (the instance folder) or "s3" (an S3-compatible bucket).
+    STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "filesystem")
+    STORAGE_S3_BUCKET = os.environ.get("STORAGE_S3_BUCKET")
+    STORAGE_S3_PREFIX = os.environ.get("STORAGE_S3_PREFIX", "")
+    STORAGE_S3_ENDPOINT_URL = os.environ.get("STORAGE_S3_ENDPOINT_URL")
+    STORAGE_S3_REGION = os.environ.get("STORAGE_S3_REGION")
+    STORAGE_S3_MAX_POOL_CONNECTIONS = int(os.environ.get("STORAGE_S3_MAX_POOL_CONNECTIONS", "10"))
+    # Redirect image requests to presigned URLs valid this long, or to STORAGE_S3_PUBLIC_URL when set.
+    STORAGE_S3_PRESIGN = os.environ.get("STORAGE_S3_PRESIGN", "true").lower() in ("1", "true", "yes")
+    STORAGE_S3_URL_EXPIRES = int(os.environ.get("STORAGE_S3_URL_EXPIRES", "3600"))
+    STORAGE_S3_PUBLIC_URL = os.environ.get("STORAGE_S3_PUBLIC_URL")
+
+    # Store uploads under the SHA-256 of their content, sharing identical blobs.
+    STORAGE_CONTENT_ADDRESSED = os.environ.get("STORAGE_CONTENT_ADDRESSED", "").lower() in ("1", "true", "yes")
+    # Largest accepted image upload, in bytes.
+    STORAGE_MAX_UPLOAD_SIZE = int(os.environ.get("STORAGE_MAX_UPLOAD_SIZE", str(25 * 1024 * 1024)))
+
+    # Resized/re-encoded image variants generated after upload (needs Pillow).
+    IMAGE_DERIVATIVE_WIDTHS = tuple(
+        int(w) for w in os.environ.get("IMAGE_DERIVATIVE_WIDTHS", "320,640,1024,1600").split(",")
+    )
+    IMAGE_DERIVATIVE_FORMATS = tuple(os.environ.get("IMAGE_DERIVATIVE_FORMATS", "avif,webp,jpeg").split(","))
+    IMAGE_DERIVATIVE_WORKERS = int(os.environ.get("IMAGE_DERIVATIVE_WORKERS", "2"))
+
+    # pint caches its parsed unit definitions here (":auto:" is the per-user cache
+    # directory) so the registry loads in tens of ms; empty to parse them every time.
+    UNIT_REGISTRY_CACHE = os.environ.get("UNIT_REGISTRY_CACHE", ":auto:")
+
+    # Stored images never change under a key, so clients may cache them for a year.
+    IMAGE_CACHE_MAX_AGE = int(os.environ.get("IMAGE_CACHE_MAX_AGE", str(365 * 24 * 60 * 60)))
+    # Hand image bodies to the front server: "" (serve from Python), "x-sendfile" or "x-accel-redirect".
+    IMAGE_OFFLOAD = os.environ.get("IMAGE_OFFLOAD", "").lower()
+    # Internal nginx location mapped onto the storage directory, used with X-Accel-Redirect.
+    IMAGE_ACCEL_REDIRECT_PREFIX = os.environ.get("IMAGE_ACCEL_REDIRECT_PREFIX", "/_storage/")
+
+    # Request instrumentation (app.instrumentation): served at /_debug/metrics with
+    # `Authorization: Bearer METRICS_TOKEN`. Workers sharing METRICS_DIR are added up.
+    METRICS_DIR = os.environ.get("METRICS_DIR") or os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+    METRICS_SLOW_QUERY_MS = float(os.environ.get("METRICS_SLOW_QUERY_MS", "100"))
+    METRICS_SERVER_TIMING = os.environ.get("METRICS_SERVER_TIMING", "false").lower() in ("1", "true", "yes")
@@ -0,0 +1,11 @@
+from app.conversions import engine
+from app.conversions.engine import ConversionEngine, conversions, init_app
+
+__all__ = ["ConversionEngine", "conversions", "init_app", "ureg"]
+
+
+def __getattr__(name):
+    # The shared pint registry is built on first use (see engine.shared_registry).
+    if name == "ureg":
+        return engine.ureg
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
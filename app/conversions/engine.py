@@ -0,0 +1,159 @@
+import functools
+import logging
+import threading
+from collections.abc import Iterable, Sequence
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from pint import UnitRegistry
+
+logger = logging.getLogger(__name__)
+
+_FAILED = object()
+
+
+def build_registry(cache_folder: Optional[str] = None) -> "UnitRegistry":
+    """Build a pint registry, reusing pint's on-disk cache of its parsed definitions when `cache_folder` is set.
+
+    Parsing pint's definition files takes a few hundred milliseconds; from
+    the cache (":auto:" is pint's per-user cache directory) it takes tens.
+    """
+    from pint import UnitRegistry
+
+    if cache_folder:
+        try:
+            return UnitRegistry(cache_folder=cache_folder)
+        except OSError as exc:
+            logger.warning("unit registry cache %s unusable, parsing definitions: %s", cache_folder, exc)
+    return UnitRegistry()
+
+
+_registry: Optional["UnitRegistry"] = None
+_registry_cache: Optional[str] = None
+_registry_lock = threading.Lock()
+
+
+def init_app(app):
+    """Use the app's UNIT_REGISTRY_CACHE when the shared registry gets built."""
+    global _registry_cache
+    _registry_cache = app.config.get("UNIT_REGISTRY_CACHE")
+
+
+def shared_registry() -> "UnitRegistry":
+    """The process-wide pint registry, built on first use rather than at import."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = build_registry(_registry_cache)
+    return _registry
+
+
+@functools.cache
+def conversion_errors() -> tuple[type[Exception], ...]:
+    """Errors pint raises for unit strings it cannot parse or convert between."""
+    from pint.errors import DimensionalityError, UndefinedUnitError
+
+    return (UndefinedUnitError, DimensionalityError, AttributeError, TypeError, ValueError)
+
+
+class ConversionEngine:
+    """Unit conversions that only go through pint once per unit pair.
+
+    pint parses the unit strings and walks its definition graph on every
+    `Quantity(...).to(...)`. For multiplicative units (everything a recipe
+    measures in except temperatures) a conversion is a multiplication by a
+    constant, so the engine asks pint for `1 from_unit` in `to_unit` once,
+    keeps that factor and multiplies, which is exactly what pint itself does
+    with the factor. Offset units (degC, degF) are handed to pint every time.
+
+    pint itself is only imported, and the shared registry built, on the
+    first conversion, so importing the app does not pay for it.
+    """
+
+    def __init__(self, registry: Optional["UnitRegistry"] = None):
+        self._registry = registry
+        self._factors: dict[tuple[str, str], Optional[float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def registry(self) -> "UnitRegistry":
+        return self._registry if self._registry is not None else shared_registry()
+
+    def factor(self, from_unit: str, to_unit: str) -> Optional[float]:
+        """Return the multiplier from `from_unit` to `to_unit`, or None for offset units.
+
+        Raises pint's UndefinedUnitError or DimensionalityError like `Quantity.to`.
+        """
+        key = (from_unit, to_unit)
+        try:
+            return self._factors[key]
+        except KeyError:
+            pass
+        one = self.registry.Quantity(1, from_unit)
+        factor = one.to(to_unit).magnitude if one._is_multiplicative else None
+        with self._lock:
+            self._factors[key] = factor
+        return factor
+
+    def convert(self, amount: float, from_unit: str, to_unit: str) -> float:
+        """Convert `amount` from `from_unit` to `to_unit`; the same value as pint's `.to()`."""
+        factor = self.factor(from_unit, to_unit)
+        if factor is None:
+            return self.registry.Quantity(amount, from_unit).to(to_unit).magnitude
+        return amount * factor
+
+    def convert_many(
+        self, amounts: Sequence[float], from_units: Sequence[str], to_unit: str, strict: bool = True
+    ) -> list[Optional[float]]:
+        """Convert a whole list of amounts, each in its own unit, to `to_unit` in one call.
+
+        Each distinct unit is resolved once. With `strict=False` amounts
+        that cannot be converted (unknown or incompatible units, missing
+        amounts) come back as None instead of raising.
+        """
+        factors = {}
+        for unit in set(from_units):
+            try:
+                factors[unit] = self.factor(unit, to_unit)
+            except conversion_errors():
+                if strict:
+                    raise
+                factors[unit] = _FAILED
+
+        results = []
+        for amount, unit in zip(amounts, from_units, strict=True):
+            factor = factors[unit]
+            if factor is _FAILED or (amount is None and not strict):
+                results.append(None)
+            elif factor is None:
+                results.append(self.registry.Quantity(amount, unit).to(to_unit).magnitude)
+            else:
+                results.append(amount * factor)
+        return results
+
+    def warm(self, units: Iterable[str], to_units: Iterable[str]):
+        """Precompute the factor table for every pair of `units` and `to_units` that converts."""
+        to_units = list(to_units)
+        for unit in units:
+            for to_unit in to_units:
+                try:
+                    self.factor(unit, to_unit)
+                except conversion_errors():
+                    continue
+
+    def clear(self):
+        with self._lock:
+            self._factors.clear()
+
+
+conversions = ConversionEngine()
+
+
+def __getattr__(name):
+    # `ureg` and `CONVERSION_ERRORS` import pint, so they are only resolved when asked for.
+    if name == "ureg":
+        return shared_registry()
+    if name == "CONVERSION_ERRORS":
+        return conversion_errors()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
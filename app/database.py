@@ -0,0 +1,298 @@
+"""Engine and connection pool settings for the database named by `DATABASE_URL`,
+and routing of read-only requests to replicas."""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool
+
+from app.metrics import db_pool_checkout_seconds
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection.
+
+    The wait (including opening a new connection when the pool is below its
+    size) is observed in `db_pool_checkout_seconds`; a climbing tail means
+    the pool is too small for the number of threads using it.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_seconds.observe(time.perf_counter() - start)
+
+
+def engine_options(
+    url: str,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_timeout: float = 30,
+    pool_recycle: int = 1800,
+    pool_pre_ping: bool = True,
+    statement_timeout: int = 0,
+    application_name: str = "cookbook",
+    pgbouncer: bool = False,
+) -> dict:
+    """Return `SQLALCHEMY_ENGINE_OPTIONS` for `url`.
+
+    Server databases get a sized `TimedQueuePool` that pings connections
+    before use and replaces them after `pool_recycle` seconds, so a
+    failover costs one reconnect instead of a failed request. On PostgreSQL
+    the connection is tagged with `application_name`, and a
+    `statement_timeout` (milliseconds, 0 for none) is sent as a startup
+    option; PgBouncer rejects startup options, so with `pgbouncer` it is
+    applied per transaction by `init_app` instead. SQLite keeps
+    SQLAlchemy's pool; its connections are tuned by `init_app`.
+    """
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        return {}
+
+    options = {
+        "poolclass": TimedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": pool_pre_ping,
+    }
+    if backend == "postgresql":
+        connect_args = {"application_name": application_name}
+        if statement_timeout and not pgbouncer:
+            connect_args["options"] = f"-c statement_timeout={int(statement_timeout)}"
+        options["connect_args"] = connect_args
+    return options
+
+
+def init_app(app, db):
+    """Apply the settings that need engine events and set up replica routing.
+
+    Call after `db.init_app(app)`.
+    """
+    with app.app_context():
+        engines = db.engines
+    for engine in engines.values():
+        configure_engine(engine, app.config)
+
+    replicas = [engine for key, engine in engines.items() if key is not None and key.startswith(REPLICA_BIND_PREFIX)]
+    if replicas:
+        app.extensions["replica_router"] = ReplicaRouter(
+            replicas,
+            check_interval=app.config.get("DATABASE_REPLICA_CHECK_INTERVAL", 10),
+            max_lag=app.config.get("DATABASE_REPLICA_MAX_LAG") or None,
+        )
+        window = app.config.get("DATABASE_READ_YOUR_WRITES", 5)
+        if not event.contains(db.session, "after_flush", _mark_written):
+            event.listen(db.session, "after_flush", _mark_written)
+        app.after_request(lambda response: _pin_after_write(response, window))
+
+
+def configure_engine(engine, config):
+    """Register the per-connection and per-transaction hooks `engine`'s dialect needs."""
+    if engine.dialect.name == "sqlite":
+        if config.get("SQLITE_TUNED", True):
+            _configure_sqlite(engine, config)
+    elif engine.dialect.name == "postgresql":
+        timeout = int(config.get("DATABASE_STATEMENT_TIMEOUT") or 0)
+        if config.get("DATABASE_PGBOUNCER") and timeout:
+            _set_statement_timeout_per_transaction(engine, timeout)
+
+
+def _set_statement_timeout_per_transaction(engine, timeout: int):
+    @event.listens_for(engine, "begin")
+    def _set_statement_timeout(conn):
+        # SET LOCAL ends with the transaction, so nothing leaks to the next
+        # client PgBouncer hands this server connection to.
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout}")
+
+
+# Set for code that writes outside a request (CLI commands, jobs); see `writing`.
+_writing: ContextVar[bool] = ContextVar("writing", default=False)
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+@contextmanager
+def writing():
+    """Mark transactions begun inside the block as writes (`BEGIN IMMEDIATE` on SQLite).
+
+    Requests with an unsafe method are writes already; use this for writes
+    made outside a request, e.g. in a CLI command.
+    """
+    token = _writing.set(True)
+    try:
+        yield
+    finally:
+        _writing.reset(token)
+
+
+def is_write() -> bool:
+    """Whether the current transaction is expected to write."""
+    if _writing.get():
+        return True
+    return has_request_context() and request.method not in SAFE_METHODS
+
+
+def _configure_sqlite(engine, config):
+    """Tune every SQLite connection for several worker processes sharing one file.
+
+    WAL lets readers carry on while a write is in progress, and
+    `synchronous=NORMAL` is safe with WAL (a power loss can only drop the
+    last commits, never corrupt the file). Write transactions start with
+    `BEGIN IMMEDIATE`, taking SQLite's single write lock before reading
+    anything: writers queue on that lock for up to `busy_timeout` instead of
+    failing with "database is locked" when a deferred transaction has to
+    upgrade after another process committed.
+    """
+    pragmas = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(config.get("SQLITE_BUSY_TIMEOUT", 15000)),
+        "cache_size": int(config.get("SQLITE_CACHE_SIZE", -64000)),
+        "mmap_size": int(config.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    }
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        # Take transaction control away from the sqlite3 module so "begin" below decides how they start.
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if is_write() else "BEGIN")
+
+
+# Binds in SQLALCHEMY_BINDS whose key starts with this are read replicas of the default database.
+REPLICA_BIND_PREFIX = "replica"
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+
+class _Replica:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        # Unknown until the first probe answers; reads use the primary meanwhile.
+        self.healthy = False
+        self.checked_until = 0.0
+
+
+class ReplicaRouter:
+    """Picks a healthy replica engine for a read.
+
+    Each replica is probed at most every `check_interval` seconds (per
+    process): it must answer a query and, on PostgreSQL with `max_lag` set,
+    not be more than `max_lag` seconds behind. Probes run on a background
+    thread, so a slow or unreachable replica never holds up a request;
+    requests use the last result meanwhile. A replica whose connection
+    breaks mid-request is marked down until its next probe. With no
+    healthy replica, reads fall back to the primary.
+    """
+
+    def __init__(self, engines, check_interval: float = 10, max_lag: Optional[float] = None):
+        self.replicas = [_Replica(engine) for engine in engines]
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._lock = threading.Lock()
+        for replica in self.replicas:
+            event.listen(replica.engine, "handle_error", self._on_error(replica))
+
+    def engine(self) -> Optional[Engine]:
+        healthy = [replica for replica in self.replicas if self._is_healthy(replica)]
+        return random.choice(healthy).engine if healthy else None
+
+    def _is_healthy(self, replica: _Replica) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now >= replica.checked_until:
+                # Claim the probe so no other request starts one until it is due again.
+                replica.checked_until = now + self.check_interval
+                threading.Thread(target=self._probe, args=(replica,), name="replica-probe", daemon=True).start()
+        return replica.healthy
+
+    def _probe(self, replica: _Replica):
+        replica.healthy = self.check(replica.engine)
+
+    def refresh(self):
+        """Probe every replica now, in the calling thread."""
+        for replica in self.replicas:
+            with self._lock:
+                replica.checked_until = time.monotonic() + self.check_interval
+            self._probe(replica)
+
+    def check(self, engine: Engine) -> bool:
+        try:
+            with engine.connect() as conn:
+                if self.max_lag is not None and engine.dialect.name == "postgresql":
+                    lag = conn.exec_driver_sql(
+                        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+                    ).scalar()
+                    return (lag or 0) <= self.max_lag
+                conn.exec_driver_sql("SELECT 1")
+        except SQLAlchemyError:
+            return False
+        return True
+
+    def _on_error(self, replica: _Replica):
+        def handle_error(context):
+            if context.is_disconnect:
+                replica.healthy = False
+                replica.checked_until = time.monotonic() + self.check_interval
+
+        return handle_error
+
+
+def use_replica() -> bool:
+    """Whether reads may go to a replica: a safe-method request with no recent write by this client."""
+    if not has_request_context() or is_write() or g.get("db_wrote"):
+        return False
+    until = request.cookies.get(READ_YOUR_WRITES_COOKIE, type=float)
+    return until is None or until < time.time()
+
+
+def _mark_written(session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+def _pin_after_write(response, window: float):
+    # Send this client's reads to the primary until the replicas have caught up with its write.
+    if g.get("db_wrote") and window:
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE, str(time.time() + window), max_age=int(window) + 1, httponly=True, samesite="Lax"
+        )
+    return response
+
+
+class RoutingSession(Session):
+    """`db.session` class that sends reads of the default database to a replica when `use_replica()`.
+
+    Flushes and every request that may write use the primary. The replica is
+    picked once per request (and kept on `g`), so all reads of a request
+    see the same replica.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or self._flushing or not has_app_context():
+            return engine
+        router = current_app.extensions.get("replica_router")
+        if router is None or engine is not self._db.engines.get(None) or not use_replica():
+            return engine
+        if "db_replica" not in g:
+            g.db_replica = router.engine()
+        return g.db_replica or engine
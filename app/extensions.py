@@ -1,12 +1,37 @@
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
+from app.cache import PageCache
+from app.database import RoutingSession
 from app.storage import Storage
 
-db = SQLAlchemy()
+# Reads in GET requests go to a replica when SQLALCHEMY_BINDS has any (see app.database).
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 # Create a Storage instance without an app; `init_app` will finish initialization
 storage = Storage()
+# Backend is chosen from the app config in `init_app`
+page_cache = PageCache()
+
+
+def init_storage(app):
+    """Bind the storage backend named by `STORAGE_BACKEND` and return it.
+
+    The filesystem backend is the module-level `storage`; for "s3" it is
+    replaced by an `S3Storage`, so look it up as `extensions.storage` at
+    request time rather than importing the name.
+    """
+    global storage
+    kind = getattr(app, "config", {}).get("STORAGE_BACKEND", "filesystem")
+    if kind == "s3":
+        from app.s3_storage import S3Storage
+
+        storage = S3Storage().init_app(app)
+    elif kind == "filesystem":
+        storage.init_app(app)
+    else:
+        raise ValueError(f"unknown STORAGE_BACKEND {kind!r}")
+    return storage
 
 
 def init_app(app):
@@ -16,7 +41,7 @@ def init_app(app):
     import time and bound to the app in an `init_app` call.
     """
     # initialize storage with the app (will register in app.extensions)
-    storage.init_app(app)
+    init_storage(app)
 
     # initialize database and migration extensions
     db.init_app(app)
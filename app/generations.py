@@ -0,0 +1,36 @@
+"""Table-level generation counters shared by every process.
+
+A generation is a counter row incremented in the same transaction as a
+change to the data it covers. Any worker can then tell, with one primary-key
+lookup, whether state it derived from a whole table is still current: its
+process-local ingredient index, or a validator for a page built from the
+whole recipe table.
+"""
+
+from sqlalchemy import select, update
+
+from app.bulk import insert_ignore
+from app.extensions import db
+
+INGREDIENTS = "ingredients"
+RECIPES = "recipes"
+
+
+class Generation(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
+def bump(session, name: str) -> int:
+    """Increment generation `name` as part of `session`'s transaction and return its new value."""
+    stmt = update(Generation).where(Generation.name == name).values(value=Generation.value + 1)
+    value = session.connection().execute(stmt.returning(Generation.value)).scalar()
+    if value is None:
+        # The migration seeds the rows; databases made by create_all() start without them.
+        insert_ignore(session, Generation, [{"name": name, "value": 0}])
+        value = session.connection().execute(stmt.returning(Generation.value)).scalar_one()
+    return value
+
+
+def current(session, name: str) -> int:
+    return session.scalar(select(Generation.value).where(Generation.name == name)) or 0
@@ -0,0 +1,214 @@
+"""Resized and re-encoded variants of uploaded images.
+
+After an upload, `DerivativePipeline.submit` schedules generation of every
+configured width in every configured format on a small thread pool. Each
+variant is stored next to the original under `Storage.variant_key(key,
+width, format)`, so `get_image` can pick the best one with `choose` and fall
+back to the original while variants are still being generated (or when
+Pillow is not installed).
+
+Once generation finishes, the keys of the variants it produced are written
+to a manifest next to the original. `choose` reads that one object instead
+of probing every width and format (a HEAD request each on S3), and keeps it
+in a per-process LRU: keys are never reused, so a manifest never goes stale.
+"""
+
+import functools
+import io
+import json
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from app.cache import MemoryBackend
+
+# Pillow's modules, bound by `_load_pillow` the first time a variant is chosen or generated.
+Image = ImageOps = features = None
+
+logger = logging.getLogger(__name__)
+
+MIMETYPES = {"avif": "image/avif", "webp": "image/webp", "jpeg": "image/jpeg"}
+
+# Variant part of the key listing the variants generated for an image.
+MANIFEST = "variants.json"
+
+# Pillow save() options per format.
+SAVE_OPTIONS = {
+    "avif": {"quality": 60},
+    "webp": {"quality": 80, "method": 4},
+    "jpeg": {"quality": 82, "optimize": True, "progressive": True},
+}
+
+
+@functools.cache
+def _load_pillow() -> bool:
+    """Import Pillow; False when it is not installed."""
+    global Image, ImageOps, features
+    try:
+        from PIL import Image, ImageOps, features
+    except ImportError:  # pragma: no cover - Pillow is optional
+        return False
+    return True
+
+
+def available_formats(formats) -> tuple[str, ...]:
+    """Return the formats in `formats` this Pillow build can encode."""
+    if not _load_pillow():
+        return ()
+    supported = []
+    for name in formats:
+        if name == "jpeg" or (name in ("webp", "avif") and features.check(name)):
+            supported.append(name)
+    return tuple(supported)
+
+
+class DerivativePipeline:
+    """Generate and select width/format variants of stored images."""
+
+    def __init__(
+        self,
+        storage=None,
+        widths=(320, 640, 1024, 1600),
+        formats=("avif", "webp", "jpeg"),
+        workers=2,
+        manifest_cache_size=4096,
+    ):
+        self.storage = storage
+        self.widths = tuple(sorted(widths))
+        self.requested_formats = tuple(formats)
+        self._formats: Optional[tuple[str, ...]] = None
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._manifests = MemoryBackend(max_entries=manifest_cache_size)
+
+    def init_app(self, app, storage=None):
+        config = app.config
+        if storage is not None:
+            self.storage = storage
+        self.widths = tuple(sorted(config.get("IMAGE_DERIVATIVE_WIDTHS", self.widths)))
+        self.requested_formats = tuple(config.get("IMAGE_DERIVATIVE_FORMATS", self.requested_formats))
+        self._formats = None
+        self.workers = config.get("IMAGE_DERIVATIVE_WORKERS", self.workers)
+        self._manifests.clear()
+        app.extensions["image_derivatives"] = self
+        return self
+
+    @property
+    def formats(self) -> tuple[str, ...]:
+        """The requested formats Pillow can encode; Pillow is imported on first access, not at app setup."""
+        if self._formats is None:
+            self._formats = available_formats(self.requested_formats)
+        return self._formats
+
+    @formats.setter
+    def formats(self, formats):
+        self._formats = tuple(formats)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.formats and self.widths)
+
+    def submit(self, key: str) -> Optional[Future]:
+        """Schedule variant generation for `key` on the worker pool."""
+        if not self.enabled:
+            return None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image-derivatives")
+        return self._executor.submit(self._generate_logged, key)
+
+    def _generate_logged(self, key: str):
+        try:
+            return self.generate(key)
+        except Exception:
+            logger.exception("failed to generate derivatives for image %s", key)
+            raise
+
+    def generate(self, key: str) -> list[str]:
+        """Write every missing variant of `key`, then its manifest, and return the keys written.
+
+        Widths at or above the original's width are skipped; the original
+        already serves those requests.
+        """
+        if not self.enabled:
+            return []
+        written, variants = [], []
+        with self.storage.open(key) as f:
+            # Pillow seeks while decoding; bucket bodies are forward-only streams.
+            source = f if f.seekable() else io.BytesIO(f.read())
+            original = Image.open(source)
+            original.load()
+        with original:
+            original = ImageOps.exif_transpose(original)
+            for width in self.widths:
+                if width >= original.width:
+                    break
+                height = max(1, round(original.height * width / original.width))
+                resized = None
+                for fmt in self.formats:
+                    variant = self.storage.variant_key(key, width, fmt)
+                    variants.append(variant)
+                    if self.storage.exists(variant):
+                        continue
+                    if resized is None:
+                        resized = original.resize((width, height), Image.Resampling.LANCZOS)
+                    image = resized.convert("RGB") if fmt == "jpeg" and resized.mode != "RGB" else resized
+                    buffer = io.BytesIO()
+                    image.save(buffer, format=fmt.upper(), **SAVE_OPTIONS[fmt])
+                    self.storage.update(variant, buffer.getvalue())
+                    written.append(variant)
+        self.storage.update(self.storage.variant_key(key, MANIFEST), json.dumps(variants).encode())
+        return written
+
+    def variants(self, key: str) -> Optional[frozenset[str]]:
+        """Return the keys of the generated variants of `key`; None until generation has finished."""
+        manifest = self._manifests.get(key, "")
+        if manifest is None:
+            try:
+                with self.storage.open(self.storage.variant_key(key, MANIFEST)) as f:
+                    manifest = f.read().decode()
+            except FileNotFoundError:
+                return None
+            self._manifests.set(key, "", manifest)
+        return frozenset(json.loads(manifest))
+
+    def pending(self, key: str) -> bool:
+        """Whether variants of `key` may still appear: generation is enabled and has not finished."""
+        return self.enabled and self.variants(key) is None
+
+    def choose(self, key: str, width: Optional[int], accept) -> Optional[tuple[str, str]]:
+        """Pick the stored variant to serve for a requested width and Accept header.
+
+        Returns `(variant_key, mimetype)`, or None to serve the original. The
+        smallest variant at least `width` pixels wide is used, in the first
+        format (in configured preference order) the client accepts.
+        """
+        if not self.enabled or not width:
+            return None
+        variants = self.variants(key)
+        if not variants:
+            return None
+        candidates = [w for w in self.widths if w >= width] or [self.widths[-1]]
+        # Only formats the client names explicitly: "*/*" is sent by browsers that cannot decode AVIF.
+        named = {value for value, quality in accept if quality > 0}
+        for fmt in self.formats:
+            if fmt != "jpeg" and MIMETYPES[fmt] not in named:
+                continue
+            for w in candidates:
+                variant = self.storage.variant_key(key, w, fmt)
+                if variant in variants:
+                    return variant, MIMETYPES[fmt]
+        return None
+
+    def srcset(self, url: str) -> str:
+        """Return an `<img srcset>` value for an image URL."""
+        if not self.enabled:
+            return ""
+        return ", ".join(f"{url}?w={w} {w}w" for w in self.widths)
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+pipeline = DerivativePipeline()
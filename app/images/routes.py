@@ -1,8 +1,44 @@
-from flask import abort, request, send_file
+from flask import abort, current_app, redirect, request
+from werkzeug.utils import send_file
 
 import app.extensions as extensions
+from app.conditional import make_etag
+from app.storage import Storage, UploadTooLarge
 
 from . import bp
+from .derivatives import pipeline
+
+# How long to cache the original served in place of a variant that is still being generated.
+PENDING_VARIANT_MAX_AGE = 60
+# How long to cache a redirect to a storage URL; presigned URLs must outlive it.
+REDIRECT_MAX_AGE = 300
+
+# Leading bytes of the image formats we accept, mapped to their mimetype.
+SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def sniff_mimetype(storage, key: str) -> str:
+    with storage.open(key) as f:
+        head = f.read(16)
+    for signature, mimetype in SIGNATURES:
+        if head.startswith(signature):
+            return mimetype
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:12] in (b"ftypavif", b"ftypavis"):
+        return "image/avif"
+    # Uploads have historically been served as JPEG.
+    return "image/jpeg"
+
+
+@bp.app_template_global()
+def image_srcset(url: str) -> str:
+    return pipeline.srcset(url)
 
 
 @bp.get("/<path:filename>")
@@ -11,10 +47,80 @@ def get_image(filename):
     storage = extensions.storage
     if storage is None:
         abort(500, "storage not initialized")
-    file_path = storage.read(filename)
-    if not file_path.exists():
-        abort(404)
-    return send_file(file_path, mimetype="image/jpeg")
+
+    width = request.args.get("w", type=int)
+    variant = pipeline.choose(filename, width, request.accept_mimetypes)
+    max_age, immutable = current_app.config.get("IMAGE_CACHE_MAX_AGE", 0), True
+    if variant is not None:
+        # The variant manifest is only written for an existing original; no need to check.
+        key, mimetype = variant
+    else:
+        if not storage.exists(filename):
+            abort(404)
+        key, mimetype = filename, None
+        if width and pipeline.pending(filename):
+            # The variant may still be generating; let clients ask again soon. Once the manifest
+            # exists without this width (e.g. wider than the original), the original is final.
+            max_age, immutable = PENDING_VARIANT_MAX_AGE, False
+
+    url = storage.url(key)
+    if url is not None:
+        # The bucket serves the bytes; only the redirect goes through the app.
+        response = redirect(url)
+        response.cache_control.public = True
+        response.cache_control.max_age = min(max_age, REDIRECT_MAX_AGE)
+    else:
+        response = send_image(storage, key, mimetype or sniff_mimetype(storage, key), max_age)
+        if immutable and max_age:
+            # Keys are never reused for different content.
+            response.cache_control.immutable = True
+    if pipeline.enabled:
+        response.vary.add("Accept")
+    return response
+
+
+def send_image(storage, key: str, mimetype: str, max_age: int):
+    """Send a stored file with a strong ETag derived from its key.
+
+    For the filesystem backend, depending on `IMAGE_OFFLOAD`, the body is
+    streamed from Python (with range support), or left to the front server
+    through `X-Sendfile` or nginx's `X-Accel-Redirect` (to
+    `IMAGE_ACCEL_REDIRECT_PREFIX` plus the file's path inside the storage
+    directory), which then also answers range requests. Other backends are
+    streamed from `storage.open`.
+    """
+    etag = make_etag(key)
+    if not isinstance(storage, Storage):
+        return send_file(
+            storage.open(key),
+            request.environ,
+            mimetype=mimetype,
+            etag=etag,
+            max_age=max_age,
+            response_class=current_app.response_class,
+        )
+
+    path = storage.read(key)
+    offload = current_app.config.get("IMAGE_OFFLOAD", "")
+    if offload == "x-accel-redirect":
+        response = current_app.response_class(mimetype=mimetype)
+        prefix = current_app.config.get("IMAGE_ACCEL_REDIRECT_PREFIX", "/_storage/").rstrip("/")
+        response.headers["X-Accel-Redirect"] = f"{prefix}/{path.relative_to(storage.dir).as_posix()}"
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        return response.make_conditional(request.environ)
+    if offload not in ("", "x-sendfile"):
+        raise ValueError(f"unknown IMAGE_OFFLOAD {offload!r}")
+    return send_file(
+        path,
+        request.environ,
+        mimetype=mimetype,
+        etag=etag,
+        max_age=max_age,
+        use_x_sendfile=offload == "x-sendfile",
+        response_class=current_app.response_class,
+    )
 
 
 @bp.post("/")
@@ -25,4 +131,9 @@ def post_image():
     storage = extensions.storage
     if storage is None:
         abort(500, "storage not initialized")
-    return storage.create(file)
+    try:
+        key = storage.create(file)
+    except UploadTooLarge as e:
+        abort(413, str(e))
+    pipeline.submit(key)
+    return key
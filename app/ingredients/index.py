@@ -0,0 +1,65 @@
+from sqlalchemy import event, select
+
+from app import generations
+from app.extensions import db
+from app.recipes.models import Ingredient
+from app.typeahead import TypeaheadIndex
+
+PENDING_KEY = "ingredient_index_pending"
+GENERATION_KEY = "ingredient_index_generation"
+
+
+def _load_ingredients():
+    rows = db.session.execute(select(Ingredient.slug, Ingredient.name)).all()
+    return ((slug, name, (name, slug)) for slug, name in rows)
+
+
+# Workers see each other's ingredient changes through the shared generation within `check_interval` seconds.
+ingredient_index = TypeaheadIndex(
+    loader=_load_ingredients, version=lambda: generations.current(db.session, generations.INGREDIENTS)
+)
+
+
+def stage(session, ingredient: Ingredient, deleted: bool = False):
+    """Record an ingredient change to apply to the index once `session` commits.
+
+    Flushed ORM changes are picked up automatically; call this for rows written
+    outside the unit of work (e.g. Core bulk inserts).
+    """
+    pending = session.info.setdefault(PENDING_KEY, {})
+    pending[ingredient.slug] = None if deleted else ingredient.name
+
+
+@event.listens_for(db.session, "after_flush")
+def _track_ingredient_changes(session, flush_context):
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Ingredient):
+            stage(session, obj)
+    for obj in session.deleted:
+        if isinstance(obj, Ingredient):
+            stage(session, obj, deleted=True)
+
+
+@event.listens_for(db.session, "before_commit")
+def _bump_ingredient_generation(session):
+    session.flush()
+    if session.info.get(PENDING_KEY):
+        session.info[GENERATION_KEY] = generations.bump(session, generations.INGREDIENTS)
+
+
+@event.listens_for(db.session, "after_commit")
+def _apply_ingredient_changes(session):
+    for slug, name in session.info.pop(PENDING_KEY, {}).items():
+        if name is None:
+            ingredient_index.discard(slug)
+        else:
+            ingredient_index.add(slug, name, name, slug)
+    if (generation := session.info.pop(GENERATION_KEY, None)) is not None:
+        # This process applied its own change; only other writers' changes need a reload.
+        ingredient_index.advance(generation - 1, generation)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_ingredient_changes(session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(GENERATION_KEY, None)
@@ -1,11 +1,8 @@
 from flask import request
-from sqlalchemy import or_
 
-from app.extensions import db
-
-from ..recipes.models import Ingredient
 from ..recipes.schemas import IngredientSchema
 from . import bp
+from .index import ingredient_index
 
 
 @bp.get("/datalist-options/")
@@ -13,15 +10,5 @@ def datalist_options():
     query = request.args.get("q", "").strip()
     if not query:
         return []
-    results = (
-        db.session.execute(
-            db.select(Ingredient).where(
-                or_(
-                    Ingredient.slug.icontains(query, autoescape=True), Ingredient.name.icontains(query, autoescape=True)
-                )
-            )
-        )
-        .scalars()
-        .all()
-    )
-    return [IngredientSchema.model_validate(i, from_attributes=True).model_dump() for i in results]
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
+    return [IngredientSchema(slug=slug, name=name).model_dump() for slug, name in ingredient_index.search(query, limit)]
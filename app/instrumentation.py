@@ -0,0 +1,182 @@
+"""Per-request timing: latency, SQL and template render time, exported as metrics.
+
+Every request records its latency, number of queries, time spent in SQL
+and rendering templates into the histograms below, labelled with the
+endpoint. Queries slower than `METRICS_SLOW_QUERY_MS` are counted and the
+most recent ones kept with their statement. With `METRICS_SERVER_TIMING`,
+the same figures for the current request go out in a `Server-Timing`
+header, where browser dev tools show them.
+
+`/_debug/metrics` serves every metric in the Prometheus text format,
+added up across workers when `METRICS_DIR` names a directory they share;
+`/_debug/slow-queries` lists this worker's slow query samples. Both need
+`Authorization: Bearer <METRICS_TOKEN>`, or debug/testing mode when no
+token is set.
+"""
+
+import hmac
+import time
+from collections import deque
+
+from flask import Blueprint, Response, abort, current_app, g, has_request_context, request
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+
+from app import metrics
+
+request_duration_seconds = metrics.histogram(
+    "cookbook_request_duration_seconds", "Time to handle a request.", labelnames=("endpoint", "method")
+)
+request_queries = metrics.histogram(
+    "cookbook_request_queries",
+    "SQL statements executed per request.",
+    labelnames=("endpoint",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+request_sql_seconds = metrics.histogram(
+    "cookbook_request_sql_seconds", "Time spent executing SQL per request.", labelnames=("endpoint",)
+)
+template_render_seconds = metrics.histogram(
+    "cookbook_template_render_seconds", "Time to render a template.", labelnames=("template",)
+)
+slow_queries = metrics.counter(
+    "cookbook_slow_queries", "SQL statements slower than METRICS_SLOW_QUERY_MS.", labelnames=("endpoint",)
+)
+
+SLOW_QUERY_SAMPLES = 50
+# Most recent slow queries in this process: {"endpoint", "statement", "seconds", "at"}.
+slow_query_samples: deque = deque(maxlen=SLOW_QUERY_SAMPLES)
+
+bp = Blueprint("debug", __name__, url_prefix="/_debug")
+
+
+class _RequestTiming:
+    __slots__ = ("start", "queries", "sql", "render", "templates")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql = 0.0
+        self.render = 0.0
+        self.templates = []
+
+
+def _timing():
+    return g.get("request_timing") if has_request_context() else None
+
+
+def _endpoint() -> str:
+    return request.endpoint or "<unmatched>"
+
+
+def init_app(app, db):
+    """Hook the timers into `app` and every engine of `db`; call after `db.init_app(app)`."""
+    app.config.setdefault("METRICS_SLOW_QUERY_MS", 100)
+    app.config.setdefault("METRICS_SERVER_TIMING", False)
+    directory = app.config.get("METRICS_DIR")
+    app.extensions["metrics_dir"] = metrics.MetricsDirectory(directory) if directory else None
+
+    with app.app_context():
+        engines = db.engines.values()
+    for engine in engines:
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.register_blueprint(bp)
+
+
+def _start_request():
+    g.request_timing = _RequestTiming()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's own execution context: a statement that raises (no after_cursor_execute)
+    # leaves nothing behind on the pooled connection.
+    context.query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.query_start
+    timing = _timing()
+    if timing is None:
+        return
+    timing.queries += 1
+    timing.sql += elapsed
+    if elapsed * 1000 >= current_app.config["METRICS_SLOW_QUERY_MS"]:
+        slow_queries.inc(_endpoint())
+        slow_query_samples.append(
+            {"endpoint": _endpoint(), "statement": statement, "seconds": round(elapsed, 6), "at": time.time()}
+        )
+
+
+def _before_render(sender, template, context, **extra):
+    if (timing := _timing()) is not None:
+        timing.templates.append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    timing = _timing()
+    if timing is None or not timing.templates:
+        return
+    elapsed = time.perf_counter() - timing.templates.pop()
+    template_render_seconds.observe(elapsed, template.name or "<string>")
+    # Nested templates (includes rendered with render_template) only count once.
+    if not timing.templates:
+        timing.render += elapsed
+
+
+def _finish_request(response):
+    timing = _timing()
+    if timing is None:
+        return response
+    total = time.perf_counter() - timing.start
+    endpoint = _endpoint()
+    request_duration_seconds.observe(total, endpoint, request.method)
+    request_queries.observe(timing.queries, endpoint)
+    request_sql_seconds.observe(timing.sql, endpoint)
+
+    if current_app.config["METRICS_SERVER_TIMING"]:
+        response.headers["Server-Timing"] = ", ".join(
+            (
+                f'db;dur={timing.sql * 1000:.1f};desc="{timing.queries} queries"',
+                f"render;dur={timing.render * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            )
+        )
+    if (directory := current_app.extensions.get("metrics_dir")) is not None:
+        directory.flush()
+    return response
+
+
+def flush(app):
+    """Write this process's values to the shared `METRICS_DIR` now, e.g. when a worker exits."""
+    if (directory := app.extensions.get("metrics_dir")) is not None:
+        directory.flush(force=True)
+
+
+@bp.before_request
+def _authorize():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        given = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(given.encode(), token.encode()):
+            abort(403)
+    elif not (current_app.debug or current_app.testing):
+        abort(404)
+
+
+@bp.get("/metrics")
+def metrics_endpoint():
+    directory = current_app.extensions.get("metrics_dir")
+    others = directory.collect() if directory is not None else ()
+    return Response(metrics.render(others=others), mimetype="text/plain; version=0.0.4")
+
+
+@bp.get("/slow-queries")
+def slow_queries_endpoint():
+    return {"threshold_ms": current_app.config["METRICS_SLOW_QUERY_MS"], "samples": list(slow_query_samples)}
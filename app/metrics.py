@@ -0,0 +1,252 @@
+"""Minimal metrics kept in process and rendered in the Prometheus text format.
+
+Each gunicorn worker has its own copy of every metric. With a shared
+directory (`MetricsDirectory`), workers periodically write their values
+there and the endpoint serving the metrics adds up every worker's file.
+"""
+
+import copy
+import json
+import math
+import os
+import threading
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Union
+
+# Seconds; fine enough at the bottom for pool waits and fast queries.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # label values -> value (see subclasses)
+        self._series: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def state(self) -> list:
+        """The values as JSON-serializable `[label values, value]` pairs."""
+        with self._lock:
+            return [[list(labels), copy.deepcopy(value)] for labels, value in self._series.items()]
+
+    def merged(self, states) -> "_Metric":
+        """Return a copy holding this metric's values plus those of `states` (from other processes)."""
+        result = self._empty()
+        for state in (self.state(), *states):
+            for labels, value in state:
+                result._add(tuple(labels), value)
+        return result
+
+    def _empty(self) -> "_Metric":
+        return type(self)(self.name, self.documentation, self.labelnames)
+
+    def _add(self, labels: tuple, value):
+        raise NotImplementedError
+
+    def samples(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter with optional labels; `inc(*label_values, amount=1)`."""
+
+    type = "counter"
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def _add(self, labels, value):
+        self._series[labels] = self._series.get(labels, 0) + value
+
+    def samples(self):
+        """Yield `(suffix, labels, value)` for every exported sample."""
+        with self._lock:
+            series = sorted(self._series.items())
+        for values, value in series:
+            yield "_total", dict(zip(self.labelnames, values)), value
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with optional labels, like a Prometheus histogram.
+
+    `observe(value, *label_values)` records one value; label values are
+    given in the order of `labelnames`.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _empty(self):
+        return Histogram(self.name, self.documentation, self.labelnames, self.buckets)
+
+    def observe(self, value: float, *label_values):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # [count per bucket (non-cumulative) + overflow, sum]
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def _add(self, labels, value):
+        counts, total = value
+        series = self._series.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0])
+        series[0] = [a + b for a, b in zip(series[0], counts)]
+        series[1] += total
+
+    def samples(self):
+        """Yield `(suffix, labels, value)` for every exported sample."""
+        with self._lock:
+            series = [(values, list(counts), total) for values, (counts, total) in self._series.items()]
+        for values, counts, total in sorted(series):
+            labels = dict(zip(self.labelnames, values))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+registry: list = []
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    """Create a histogram and add it to the exported `registry`."""
+    metric = Histogram(name, documentation, labelnames, buckets)
+    registry.append(metric)
+    return metric
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Create a counter and add it to the exported `registry`."""
+    metric = Counter(name, documentation, labelnames)
+    registry.append(metric)
+    return metric
+
+
+def _reset_after_fork():
+    # Values observed in the parent (e.g. while preloading the app) belong to the parent.
+    for metric in registry:
+        metric.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def render(metrics=None, others: Sequence[dict] = ()) -> str:
+    """Return `metrics` (default: the whole registry) in the Prometheus text exposition format.
+
+    `others` are `{metric name: state}` mappings from other processes
+    (see `MetricsDirectory.collect`), added to this process's values.
+    """
+    lines = []
+    for metric in registry if metrics is None else metrics:
+        if others:
+            metric = metric.merged([other[metric.name] for other in others if metric.name in other])
+        lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for suffix, labels, value in metric.samples():
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            series = f"{metric.name}{suffix}{{{label_text}}}" if labels else f"{metric.name}{suffix}"
+            lines.append(f"{series} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsDirectory:
+    """Directory where every worker process keeps a file with its metric values.
+
+    `flush()` rewrites this process's file (atomically, at most every
+    `interval` seconds unless forced), so the file lags the live values by
+    up to `interval`; a flush skipped for that reason is made by a timer
+    once the interval is up. Files of exited workers are kept so their
+    counts are not lost; `clear()` the directory when the server starts
+    (gunicorn.conf.py does), as with prometheus_client's multiprocess mode.
+    """
+
+    def __init__(self, path: Union[str, Path], interval: float = 1.0):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self._pid = None
+        self._file = None
+        self._flushed = 0.0
+        self._timer = None
+        self._lock = threading.Lock()
+
+    @property
+    def file(self) -> Path:
+        # Named after the process that writes it, and only decided in that process (after any fork).
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._file = self.path / f"metrics-{self._pid}-{time.time_ns()}.json"
+            self._flushed = 0.0
+        return self._file
+
+    def flush(self, force: bool = False):
+        with self._lock:
+            now = time.monotonic()
+            file = self.file
+            if not force and now - self._flushed < self.interval:
+                self._schedule(self.interval - (now - self._flushed))
+                return
+            self._flushed = now
+            temp = file.with_suffix(".tmp")
+            temp.write_text(json.dumps({metric.name: metric.state() for metric in registry}))
+            os.replace(temp, file)
+
+    def _schedule(self, delay: float):
+        # A timer inherited through fork is not running in the child, so each process starts its own.
+        if self._timer is not None and self._timer.is_alive():
+            return
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def clear(self):
+        """Delete every process's file, e.g. those left by the previous run of the server."""
+        for path in (*self.path.glob("metrics-*.json"), *self.path.glob("metrics-*.tmp")):
+            path.unlink(missing_ok=True)
+
+    def collect(self) -> list[dict]:
+        """Return the values written by every other process."""
+        own = self.file
+        states = []
+        for path in self.path.glob("metrics-*.json"):
+            if path == own:
+                continue
+            try:
+                states.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return states
+
+
+db_pool_checkout_seconds = histogram(
+    "cookbook_db_pool_checkout_seconds", "Time spent waiting for a database connection from the pool."
+)
@@ -0,0 +1,64 @@
+"""Warm read-mostly state in the gunicorn master before it forks the workers.
+
+With `preload_app` (see gunicorn.conf.py) the master creates the app once
+and `warm` builds what every worker would otherwise build for itself on
+its first requests: the pint unit registry and conversion factor table,
+the compiled Jinja templates and the ingredient typeahead index. They are
+then moved to the GC's permanent generation with `gc.freeze()`, so
+collections in the workers never write to (and so copy) their memory
+pages and the workers keep sharing them copy-on-write.
+
+Database connections are not shared: connections opened while warming
+stay with the master, and each worker starts with empty pools.
+"""
+
+import gc
+import logging
+import os
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.conversions import conversions
+from app.conversions.engine import shared_registry
+from app.extensions import db
+from app.ingredients.index import ingredient_index
+from app.recipes.models import RecipeIngredient
+
+logger = logging.getLogger(__name__)
+
+# Converted on recipe pages besides the units already in the database.
+COMMON_UNITS = ("ml", "l", "cup", "tbsp", "tsp", "fluid_ounce", "pint", "quart", "gallon", "g", "kg", "oz", "lb")
+TARGET_UNITS = ("ml",)
+
+
+def warm(app) -> dict:
+    """Build the shared caches of `app`, freeze them for the GC and return what was loaded."""
+    shared_registry()
+    templates = app.jinja_env.list_templates()
+    for name in templates:
+        app.jinja_env.get_template(name)
+
+    units = set(COMMON_UNITS)
+    with app.app_context():
+        try:
+            units.update(u for u in db.session.scalars(select(RecipeIngredient.unit).distinct()) if u)
+            ingredient_index.ensure_loaded()
+        except SQLAlchemyError as exc:
+            # E.g. before the first migration; workers fill these on first use instead.
+            logger.warning("preload skipped the database: %s", exc)
+        finally:
+            db.session.remove()
+        engines = list(db.engines.values())
+    conversions.warm(sorted(units), TARGET_UNITS)
+
+    os.register_at_fork(after_in_child=lambda: reset_pools(engines))
+    gc.collect()
+    gc.freeze()
+    return {"templates": len(templates), "units": len(units), "ingredients": len(ingredient_index)}
+
+
+def reset_pools(engines):
+    """Give a forked worker fresh connection pools, leaving the parent's connections open for the parent."""
+    for engine in engines:
+        engine.dispose(close=False)
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 bp = Blueprint("recipes", __name__, url_prefix="/recipes/")
 
-from app.recipes import routes  # noqa: F401,E402
+from app.recipes import cli, routes  # noqa: F401,E402
@@ -0,0 +1,109 @@
+"""Track which recipes a transaction touches.
+
+Derived data (the search index, caches) needs to know which recipes changed,
+whether the change came from the recipe row itself, one of its
+`RecipeIngredient` rows or an `Ingredient` it references. The session hooks
+below collect those slugs as the unit of work flushes and announce them
+through two signals:
+
+* `recipes_flushed` is sent from `before_commit`, inside the transaction, so
+  receivers can write derived rows atomically with the change.
+* `recipes_committed` is sent from `after_commit`, once the change is durable,
+  for side effects outside the database.
+
+Both are sent with `changed` and `deleted` sets of recipe slugs. Changed
+recipes get their `version` and `updated_at` bumped before commit, and the
+`recipes` generation (`app.generations`) is bumped for any change, which is
+what HTTP validators and cache keys are derived from.
+"""
+
+from blinker import Namespace
+from sqlalchemy import event, inspect, select, update
+
+from app import generations
+from app.extensions import db
+from app.recipes.models import Ingredient, Recipe, RecipeIngredient, utcnow
+
+_signals = Namespace()
+
+recipes_flushed = _signals.signal("recipes-flushed")
+recipes_committed = _signals.signal("recipes-committed")
+
+FLUSHED_KEY = "recipes_flushed"
+COMMITTED_KEY = "recipes_committed"
+
+# Ingredient columns that show up in recipe output.
+INGREDIENT_FIELDS = ("name", "density")
+
+
+def _pending(session, key) -> tuple[set, set]:
+    return session.info.setdefault(key, (set(), set()))
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_recipe_changes(session, flush_context):
+    changed, deleted = _pending(session, FLUSHED_KEY)
+    ingredient_slugs = set()
+
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, Recipe):
+            (deleted if obj in session.deleted else changed).add(obj.slug)
+        elif isinstance(obj, RecipeIngredient):
+            changed.add(obj.recipe_slug)
+        elif isinstance(obj, Ingredient) and obj in session.dirty:
+            state = inspect(obj)
+            if any(state.attrs[f].history.has_changes() for f in INGREDIENT_FIELDS):
+                ingredient_slugs.add(obj.slug)
+
+    if ingredient_slugs:
+        # Use the connection directly: session.execute() would autoflush mid-flush.
+        changed.update(
+            session.connection()
+            .execute(select(RecipeIngredient.recipe_slug).where(RecipeIngredient.ingredient_slug.in_(ingredient_slugs)))
+            .scalars()
+        )
+
+    changed.discard(None)
+    changed -= deleted
+
+
+@event.listens_for(db.session, "before_commit")
+def _announce_flushed_recipes(session):
+    session.flush()
+    changed, deleted = session.info.pop(FLUSHED_KEY, (set(), set()))
+    if not changed and not deleted:
+        return
+    recipes_flushed.send(session, changed=changed, deleted=deleted)
+
+    committed_changed, committed_deleted = _pending(session, COMMITTED_KEY)
+    committed_changed.update(changed)
+    committed_deleted.update(deleted)
+
+
+@recipes_flushed.connect
+def _bump_recipe_versions(session, changed, deleted):
+    if changed:
+        session.connection().execute(
+            update(Recipe)
+            .where(Recipe.slug.in_(changed))
+            .values(version=Recipe.version + 1, updated_at=utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+
+@recipes_flushed.connect
+def _bump_recipes_generation(session, changed, deleted):
+    generations.bump(session, generations.RECIPES)
+
+
+@event.listens_for(db.session, "after_commit")
+def _announce_committed_recipes(session):
+    changed, deleted = session.info.pop(COMMITTED_KEY, (set(), set()))
+    if changed or deleted:
+        recipes_committed.send(session, changed=changed - deleted, deleted=deleted)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget_recipe_changes(session):
+    session.info.pop(FLUSHED_KEY, None)
+    session.info.pop(COMMITTED_KEY, None)
@@ -0,0 +1,42 @@
+import click
+
+import app.extensions as extensions
+from app.database import writing
+from app.extensions import db
+
+from . import bp
+from .exporter import DEFAULT_BATCH_SIZE, export_ndjson, export_tar
+from .importer import DEFAULT_CHUNK_SIZE, import_recipes
+
+
+@bp.cli.command("import")
+@click.argument("file", type=click.File("rb"), default="-")
+@click.option("--chunk-size", default=DEFAULT_CHUNK_SIZE, show_default=True, help="Recipes committed per batch.")
+def import_command(file, chunk_size):
+    """Import recipes from an NDJSON FILE (or stdin), one recipe object per line."""
+
+    def progress(report):
+        for error in report.errors:
+            click.echo(f"line {error.line}: {error.error}", err=True)
+        report.errors.clear()
+        click.echo(f"{report.imported} imported, {report.failed} failed", err=True)
+
+    with writing():
+        report = import_recipes(db.session, file, chunk_size=chunk_size, on_chunk=progress)
+    click.echo(f"Imported {report.imported} recipes, {report.failed} failed.")
+    if report.failed:
+        raise SystemExit(1)
+
+
+@bp.cli.command("export")
+@click.argument("output", type=click.File("wb"), default="-")
+@click.option("--format", "export_format", type=click.Choice(["ndjson", "tar"]), default="ndjson", show_default=True)
+@click.option("--batch-size", default=DEFAULT_BATCH_SIZE, show_default=True, help="Recipes loaded per query.")
+def export_command(output, export_format, batch_size):
+    """Export every recipe to OUTPUT (or stdout) as NDJSON, or as a tar that also holds the images."""
+    if export_format == "tar":
+        chunks = export_tar(db.session, extensions.storage, batch_size)
+    else:
+        chunks = export_ndjson(db.session, batch_size)
+    for chunk in chunks:
+        output.write(chunk)
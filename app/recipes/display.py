@@ -0,0 +1,81 @@
+"""Keep the stored display values of recipe ingredients up to date.
+
+`RecipeIngredient.pretty` and `.weight` read the `pretty`/`weight` columns
+written here. New and edited ingredient rows are filled in before they are
+flushed, and when an ingredient's name or density changes every row using
+it is recomputed in the same flush, converting all their amounts with one
+`convert_many` call. The hook is registered on the app's session by
+`init_app`, called from `create_app`.
+"""
+
+from sqlalchemy import event, inspect, select
+
+from app.conversions import conversions
+from app.extensions import db
+from app.recipes.changes import INGREDIENT_FIELDS
+from app.recipes.models import Ingredient, RecipeIngredient, _round_weight, pretty_text
+
+ROW_FIELDS = ("amount", "unit", "ingredient_slug", "ingredient")
+
+
+def _changed(obj, fields) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[f].history.has_changes() for f in fields)
+
+
+def _ingredient(session, row):
+    ingredient = row.ingredient
+    if ingredient is not None and (row.ingredient_slug in (None, ingredient.slug) or _changed(row, ("ingredient",))):
+        return ingredient
+    # Rows created or repointed through the foreign key alone have no (current) relationship loaded.
+    return session.get(Ingredient, row.ingredient_slug)
+
+
+def refresh(session, rows):
+    """Recompute and assign the display values of `rows`."""
+    ingredients = [_ingredient(session, row) for row in rows]
+
+    weighed = [(row, ing) for row, ing in zip(rows, ingredients) if ing is not None and ing.density is not None]
+    volumes = conversions.convert_many(
+        [row.amount for row, _ in weighed], [row.unit for row, _ in weighed], "ml", strict=False
+    )
+    weights = {id(row): _round_weight(ing.density * v) for (row, ing), v in zip(weighed, volumes) if v is not None}
+
+    for row, ingredient in zip(rows, ingredients):
+        if ingredient is None:
+            continue
+        pretty = pretty_text(row.amount, row.unit, ingredient.name)
+        weight = weights.get(id(row))
+        # Only assign real changes so unchanged rows are not updated.
+        if row._pretty != pretty:
+            row._pretty = pretty
+        if row._weight != weight:
+            row._weight = weight
+
+
+def _materialize_display_values(session, flush_context, instances):
+    rows = {
+        obj
+        for obj in session.new | session.dirty
+        if isinstance(obj, RecipeIngredient) and (obj in session.new or _changed(obj, ROW_FIELDS))
+    }
+    ingredient_slugs = {
+        obj.slug for obj in session.dirty if isinstance(obj, Ingredient) and _changed(obj, INGREDIENT_FIELDS)
+    }
+
+    with session.no_autoflush:
+        if ingredient_slugs:
+            rows.update(
+                session.scalars(
+                    select(RecipeIngredient).where(RecipeIngredient.ingredient_slug.in_(ingredient_slugs))
+                ).all()
+            )
+        rows -= set(session.deleted)
+        if rows:
+            refresh(session, list(rows))
+
+
+def init_app(app):
+    """Fill in display values on every flush of `db.session`."""
+    if not event.contains(db.session, "before_flush", _materialize_display_values):
+        event.listen(db.session, "before_flush", _materialize_display_values)
@@ -0,0 +1,100 @@
+"""Streaming export of the whole recipe catalogue.
+
+Recipes are read in batches through a server-side cursor (`yield_per`), with
+each batch's ingredients and tags loaded by `recipe_graph`, and serialized
+through `RecipeOut.from_recipe`, so memory use depends on the batch size,
+not the catalogue size. The output is NDJSON that `flask recipes import`
+reads back, or a tar stream holding the NDJSON in one member per batch plus
+every image the recipes reference under `images/`.
+"""
+
+import io
+import json
+import os
+import tarfile
+import time
+from collections.abc import Iterator
+
+from sqlalchemy import select
+
+from app.recipes.models import Recipe, recipe_graph
+from app.recipes.schemas import RecipeOut
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def _batches(session, batch_size: int) -> Iterator[list[Recipe]]:
+    stmt = (
+        select(Recipe)
+        .options(*recipe_graph(tags=True))
+        .order_by(Recipe.slug)
+        .execution_options(yield_per=batch_size, stream_results=True)
+    )
+    yield from session.scalars(stmt).partitions()
+
+
+def _lines(recipes: list[Recipe]) -> bytes:
+    return b"".join(RecipeOut.from_recipe(recipe).to_json(exclude_none=True) + b"\n" for recipe in recipes)
+
+
+def export_ndjson(session, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[bytes]:
+    """Yield the catalogue as NDJSON, one batch of lines at a time."""
+    for recipes in _batches(session, batch_size):
+        yield _lines(recipes)
+
+
+class _TarBuffer:
+    """Write-only file object collecting what `tarfile` writes until it is drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def export_tar(session, storage, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[bytes]:
+    """Yield an uncompressed tar with `recipes-NNNNN.ndjson` batches and the images they use.
+
+    Each image is streamed from `storage` into the archive once, however
+    many recipes reference it; missing images are skipped.
+    """
+    buffer = _TarBuffer()
+    written = set()
+    with tarfile.open(fileobj=buffer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+        for number, recipes in enumerate(_batches(session, batch_size), start=1):
+            data = _lines(recipes)
+            _add(tar, f"recipes-{number:05d}.ndjson", io.BytesIO(data), len(data))
+            yield buffer.drain()
+
+            for recipe in recipes:
+                for key in json.loads(recipe.images) if recipe.images else []:
+                    if key in written or not storage.exists(key):
+                        continue
+                    written.add(key)
+                    with storage.open(key) as f:
+                        _add(tar, f"images/{key}", *_sized(f))
+                    yield buffer.drain()
+    yield buffer.drain()
+
+
+def _sized(f):
+    """Return a file object and its size, reading bodies of unknown size into memory."""
+    try:
+        return f, os.fstat(f.fileno()).st_size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        data = f.read()
+        return io.BytesIO(data), len(data)
+
+
+def _add(tar: tarfile.TarFile, name: str, fileobj, size: int):
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(time.time())
+    info.mode = 0o644
+    tar.addfile(info, fileobj)
@@ -0,0 +1,115 @@
+"""Bulk import of recipes from NDJSON (one `CreateRecipe` JSON object per line).
+
+Records are read lazily and handled `chunk_size` at a time, so memory stays
+bounded whatever the input size. Each chunk is validated, its ingredients
+and tags are resolved together, its recipes are flushed together and it is
+committed once. A bad record (invalid JSON, failed validation, a slug that
+is already taken) is reported with its line number and skipped; the rest of
+the chunk is still imported.
+"""
+
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.recipes.models import Recipe
+from app.recipes.schemas import CreateRecipe
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class RecordError(BaseModel):
+    line: int
+    slug: str | None = None
+    error: str
+
+
+class ImportReport(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: list[RecordError] = []
+
+
+def _records(lines: Iterable) -> Iterator[tuple[int, bytes | str]]:
+    for number, line in enumerate(lines, start=1):
+        if line.strip():
+            yield number, line
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'record'}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+def import_recipes(session, lines: Iterable, chunk_size: int = DEFAULT_CHUNK_SIZE, on_chunk=None) -> ImportReport:
+    """Import NDJSON `lines` (bytes or str) into `session`, committing once per chunk.
+
+    `on_chunk(report)` is called after every committed chunk, e.g. to show
+    progress.
+    """
+    report = ImportReport()
+    records = _records(lines)
+    while chunk := list(islice(records, chunk_size)):
+        errors = len(report.errors)
+        _import_chunk(session, chunk, report)
+        report.errors[errors:] = sorted(report.errors[errors:], key=lambda e: e.line)
+        if on_chunk is not None:
+            on_chunk(report)
+    return report
+
+
+def _import_chunk(session, chunk, report: ImportReport):
+    valid = []
+    seen = set()
+    for number, line in chunk:
+        try:
+            data = CreateRecipe.model_validate_json(line)
+            slug = data.db_slug
+            if not slug:
+                raise ValueError("Recipe name must produce a non-empty slug")
+            if slug in seen:
+                raise ValueError(f"duplicate slug {slug!r} in this import")
+        except (ValidationError, ValueError) as e:
+            _fail(report, number, None, e)
+            continue
+        seen.add(slug)
+        valid.append((number, slug, data))
+
+    taken = set(session.scalars(select(Recipe.slug).where(Recipe.slug.in_(seen))))
+    pending = []
+    for number, slug, data in valid:
+        if slug in taken:
+            _fail(report, number, slug, ValueError(f"a recipe with slug {slug!r} already exists"))
+        else:
+            pending.append((number, slug, data))
+    if not pending:
+        return
+
+    try:
+        ingredients, tags = CreateRecipe.resolve(session, [data for _, _, data in pending])
+        for _, _, data in pending:
+            data.to_db(session, ingredients=ingredients, tags=tags, flush=False)
+        session.commit()
+    except IntegrityError:
+        # Another writer took one of the slugs since we checked; find it one record at a time.
+        session.rollback()
+        for number, slug, data in pending:
+            try:
+                data.to_db(session)
+                session.commit()
+            except (IntegrityError, ValueError) as e:
+                session.rollback()
+                _fail(report, number, slug, e)
+            else:
+                report.imported += 1
+        return
+    report.imported += len(pending)
+
+
+def _fail(report: ImportReport, line: int, slug: str | None, error: Exception):
+    report.failed += 1
+    report.errors.append(RecordError(line=line, slug=slug, error=_error_message(error)))
@@ -1,12 +1,17 @@
 import json
+from datetime import datetime, timezone
 from fractions import Fraction
+from typing import Optional
 
-from pint import Quantity as Q_
-from pint import UnitRegistry
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.conversions import conversions
 from app.extensions import db
 
-ureg = UnitRegistry()
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
 
 
 class Recipe(db.Model):
@@ -30,6 +35,10 @@ class Recipe(db.Model):
 
     images = db.Column(db.Text, nullable=True)
 
+    # Bumped whenever the recipe or anything shown with it changes (see app.recipes.changes).
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, default=utcnow, server_default=db.func.now())
+
     @property
     def image_paths(self) -> list[str]:
         if self.images:
@@ -67,50 +76,84 @@ class RecipeIngredient(db.Model):
     recipe = db.relationship("Recipe", back_populates="recipe_ingredients")
     ingredient = db.relationship("Ingredient", back_populates="recipes")
 
-    _pretty = None
+    # Display values, written with the row and refreshed when its ingredient changes
+    # (see app.recipes.display), so reads need neither Fraction nor pint.
+    _pretty = db.Column("pretty", db.Text, nullable=True)
+    _weight = db.Column("weight", db.Float, nullable=True)
 
     @property
     def pretty(self):
-        if self._pretty:
+        if self._pretty is not None:
             return self._pretty
-
-        amount = self.amount
-
-        # Handle fractions and mixed numbers
-        if amount is not None and amount % 1 != 0:
-            amount = Fraction(self.amount)
-            if amount.numerator // amount.denominator >= 1:
-                amount = f"{amount.numerator // amount.denominator} {amount.numerator % amount.denominator}/{amount.denominator}"
-            else:
-                amount = str(amount)
-        else:
-            amount = str(int(amount)) if amount else None
-        # Handle whole items and non-measured ingredients
-        if self.unit:
-            output = amount, self.unit, self.ingredient.name
-        elif amount:
-            output = amount, self.ingredient.name
-        else:
-            output = [self.ingredient.name]
-
-        r = " ".join(output)
-        self._pretty = r
-        return r
-
-    _weight = None
+        return pretty_text(self.amount, self.unit, self.ingredient.name)
 
     def amount_in_unit(self, unit: str):
-        # TODO: see if there's a way to do
-        return Q_(self.amount, self.unit).to(unit).magnitude
+        return conversions.convert(self.amount, self.unit, unit)
 
     @property
     def weight(self):
-        if self._weight:
-            return self._weight if self._weight != 0 else None
-        elif self.ingredient.density is None:
-            self._weight = 0
+        if self._weight is not None:
+            return self._weight
+        if self._pretty is not None:
+            # Materialized without a weight: no density or no convertible amount.
             return None
+        return weight_grams(self.amount, self.unit, self.ingredient.density)
+
+    @staticmethod
+    def prime_weights(rows: list["RecipeIngredient"]):
+        """Compute the weights of rows written before weights were stored with one conversion call.
+
+        Rows whose amount cannot be converted to a volume keep computing
+        (and raising) lazily, as before.
+        """
+        rows = [
+            row for row in rows if row._pretty is None and row.amount is not None and row.ingredient.density is not None
+        ]
+        volumes = conversions.convert_many([r.amount for r in rows], [r.unit for r in rows], "ml", strict=False)
+        for row, volume in zip(rows, volumes):
+            if volume is not None:
+                # Not a change to the row; don't mark it dirty.
+                set_committed_value(row, "_weight", _round_weight(row.ingredient.density * volume))
+
+
+def pretty_text(amount, unit, name) -> str:
+    """Format an ingredient line, e.g. "1 1/2 cup Flour"."""
+    # Handle fractions and mixed numbers
+    if amount is not None and amount % 1 != 0:
+        fraction = Fraction(amount)
+        if fraction.numerator // fraction.denominator >= 1:
+            whole, rest = divmod(fraction.numerator, fraction.denominator)
+            amount = f"{whole} {rest}/{fraction.denominator}"
         else:
-            weight = self.ingredient.density * self.amount_in_unit("ml")
-            output = int(weight) + round(weight - int(weight), 2)
-            return output if int(output) != output else int(output)
+            amount = str(fraction)
+    else:
+        amount = str(int(amount)) if amount else None
+    # Whole items, non-measured ingredients and units without an amount ("pinch Salt") leave parts out.
+    return " ".join(part for part in (amount, unit, name) if part)
+
+
+def weight_grams(amount, unit, density) -> Optional[float]:
+    """Return the rounded weight of an amount of an ingredient, or None if it has no density."""
+    if density is None:
+        return None
+    return _round_weight(density * conversions.convert(amount, unit, "ml"))
+
+
+def _round_weight(weight: float):
+    output = int(weight) + round(weight - int(weight), 2)
+    return output if int(output) != output else int(output)
+
+
+def recipe_graph(tags: bool = False, ingredients: bool = True) -> tuple:
+    """Loader options that fetch everything a recipe page shows with the recipe.
+
+    Ingredient rows and their ingredients come in one extra SELECT ... IN
+    query (a join, so `pretty`/`weight` never lazy-load an ingredient), and
+    tags in one more when asked for, however many ingredients there are.
+    """
+    options = ()
+    if ingredients:
+        options += (selectinload(Recipe.recipe_ingredients).joinedload(RecipeIngredient.ingredient, innerjoin=True),)
+    if tags:
+        options += (selectinload(Recipe.tags),)
+    return options
@@ -0,0 +1,44 @@
+from app.extensions import db
+
+
+class KeysetPagination:
+    """A page of rows seeked by a unique, ordered key instead of an OFFSET.
+
+    Pages are addressed by the key of the row just outside them: `after` for
+    the page following a row, `before` for the page preceding it. Each page
+    costs one indexed range scan no matter how deep it is, and no total
+    count is taken, so `pages`/`total` are unavailable in this mode.
+    """
+
+    def __init__(self, select, key, per_page: int, after: str | None = None, before: str | None = None):
+        self.per_page = per_page
+        self.after = after
+        self.before = before
+
+        rows = list(db.session.execute(self.window(select, key, per_page, after, before)).scalars())
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+
+        if before is not None:
+            rows.reverse()
+            self.has_prev, self.has_next = has_more, True
+        else:
+            self.has_prev, self.has_next = bool(after), has_more
+
+        self.items = rows
+        keys = [getattr(row, key.key) for row in rows]
+        self.prev_cursor = keys[0] if keys and self.has_prev else None
+        self.next_cursor = keys[-1] if keys and self.has_next else None
+
+    @staticmethod
+    def window(select, key, per_page: int, after: str | None = None, before: str | None = None):
+        """Limit `select` to the rows of the page, plus one to detect a further page."""
+        if before is not None:
+            stmt = select.where(key < before).order_by(key.desc())
+        else:
+            stmt = select.where(key > after) if after else select
+            stmt = stmt.order_by(key)
+        return stmt.limit(per_page + 1)
+
+    def __iter__(self):
+        return iter(self.items)
@@ -1,21 +1,82 @@
-from flask import abort, render_template, request
+from flask import Response, abort, redirect, render_template, request, stream_with_context, url_for
 from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError
 
-from app.extensions import db
+import app.extensions as extensions
+from app import generations
+from app.conditional import make_etag, not_modified, with_validators
+from app.extensions import db, page_cache
 
 from . import bp
-from .models import Recipe
-from .schemas import CreateRecipe
+from .exporter import DEFAULT_BATCH_SIZE, export_ndjson, export_tar
+from .importer import DEFAULT_CHUNK_SIZE, import_recipes
+from .models import Recipe, recipe_graph
+from .pagination import KeysetPagination
+from .schemas import CreateRecipe, RecipeOut, RecipePage
+from .search import search_statement
+
+
+@bp.app_template_global()
+def url_with_args(**updates):
+    """Return the current URL with the given query arguments replaced.
+
+    Arguments updated to None are dropped from the URL.
+    """
+    args = request.args.to_dict()
+    for key, value in updates.items():
+        if value is None:
+            args.pop(key, None)
+        else:
+            args[key] = value
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+
+def _listing_etag() -> str:
+    """Fingerprint the recipes a listing page depends on without loading them.
+
+    Any recipe change bumps the recipes generation, so the generation plus
+    the page arguments (page or cursor, page size, fields) in the URL
+    identify a listing page's content.
+    """
+    return make_etag(request.full_path, generations.current(db.session, generations.RECIPES), page_cache.version)
 
 
 @bp.get("/")
 def get_recipes():
-    page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 10, type=int)
-    pagination = Recipe.query.paginate(page=page, per_page=per_page, error_out=False)
+    keyset = None
+    if "after" in request.args or "before" in request.args:
+        # Opt-in keyset mode: seek on the primary key and skip the COUNT(*).
+        keyset = {
+            "per_page": min(max(per_page, 1), 100),
+            "after": request.args.get("after"),
+            "before": request.args.get("before"),
+        }
+
+    etag = _listing_etag()
+    if (response := not_modified(etag)) is not None:
+        return response
+
+    if keyset is not None:
+        pagination = KeysetPagination(db.select(Recipe), Recipe.slug, **keyset)
+    else:
+        page = request.args.get("page", 1, type=int)
+        pagination = db.paginate(db.select(Recipe).order_by(Recipe.slug), page=page, per_page=per_page, error_out=False)
     recipes = pagination.items
-    return render_template("recipes.html", recipes=recipes, pagination=pagination)
+    return with_validators(render_template("recipes.html", recipes=recipes, pagination=pagination), etag)
+
+
+@bp.get("/search/")
+def search_recipes():
+    query = request.args.get("q", "").strip()
+    stmt = search_statement(query, db.engine.dialect.name)
+    if stmt is None:
+        return redirect(url_for(".get_recipes"))
+
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 10, type=int)
+    pagination = db.paginate(stmt, page=page, per_page=per_page, error_out=False)
+    return render_template("recipes.html", recipes=pagination.items, pagination=pagination, query=query)
 
 
 @bp.route("/new/", methods=["GET", "POST"])
@@ -41,6 +102,98 @@ def new_recipe():
     return {"slug": recipe.slug}, 201
 
 
+@bp.post("/bulk/")
+def bulk_import():
+    """Import NDJSON recipes streamed in the request body; see `app.recipes.importer`."""
+    chunk_size = min(max(request.args.get("chunk_size", DEFAULT_CHUNK_SIZE, type=int), 1), 5000)
+    report = import_recipes(db.session, request.stream, chunk_size=chunk_size)
+    return report.model_dump(), 200
+
+
+@bp.get("/export/")
+def export():
+    """Stream every recipe as NDJSON, or with `?format=tar` as a tar that also holds the images."""
+    export_format = request.args.get("format", "ndjson")
+    batch_size = min(max(request.args.get("batch_size", DEFAULT_BATCH_SIZE, type=int), 1), 5000)
+    if export_format == "ndjson":
+        body, mimetype = export_ndjson(db.session, batch_size), "application/x-ndjson"
+    elif export_format == "tar":
+        body, mimetype = export_tar(db.session, extensions.storage, batch_size), "application/x-tar"
+    else:
+        return abort(400)
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=recipes.{export_format}"},
+    )
+
+
+def _api_fields() -> frozenset[str] | None:
+    """Parse the `?fields=` sparse fieldset, rejecting unknown names with a 400."""
+    if "fields" not in request.args:
+        return None
+    fields = frozenset(filter(None, (f.strip() for f in request.args["fields"].split(","))))
+    unknown = fields - RecipeOut.model_fields.keys()
+    if not fields or unknown:
+        return abort(400, f"unknown fields: {', '.join(sorted(unknown))}" if unknown else "no fields requested")
+    return fields
+
+
+def _api_options(fields: frozenset[str] | None) -> tuple:
+    """The `recipe_graph` loads the requested fields need."""
+    if fields is None:
+        return recipe_graph(tags=True)
+    return recipe_graph(tags="tags" in fields, ingredients="recipe_ingredients" in fields)
+
+
+def _json(body: bytes | str) -> Response:
+    return Response(body, mimetype="application/json")
+
+
+def api_cache_key(recipe_slug: str, fields: frozenset[str] | None) -> str:
+    return f"api:{recipe_slug}:{','.join(sorted(fields)) if fields else '*'}"
+
+
+@bp.get("/get/")
+def api_recipes():
+    """JSON listing, keyset-paginated on the slug (`after`/`before`, `per_page` up to 100)."""
+    fields = _api_fields()
+    keyset = {
+        "per_page": min(max(request.args.get("per_page", 20, type=int), 1), 100),
+        "after": request.args.get("after"),
+        "before": request.args.get("before"),
+    }
+    etag = _listing_etag()
+    if (response := not_modified(etag)) is not None:
+        return response
+
+    pagination = KeysetPagination(db.select(Recipe).options(*_api_options(fields)), Recipe.slug, **keyset)
+    page = RecipePage.model_construct(
+        items=[RecipeOut.from_recipe(recipe, fields) for recipe in pagination],
+        next=pagination.next_cursor,
+        previous=pagination.prev_cursor,
+    )
+    return with_validators(_json(page.to_json(fields)), etag)
+
+
 @bp.get("/get/<slug>/")
 def get_recipe(slug):
-    return abort(405)
+    """One recipe as JSON, revalidated and cached like the book page (see `app.book.routes`)."""
+    fields = _api_fields()
+    stamp = db.session.execute(db.select(Recipe.version, Recipe.updated_at).where(Recipe.slug == slug)).one_or_none()
+    if stamp is None:
+        return abort(404)
+
+    # The timestamp keeps a deleted and recreated recipe (version 1 again) from matching.
+    etag = make_etag("api", slug, sorted(fields or ()), stamp.version, stamp.updated_at, page_cache.version)
+    if (response := not_modified(etag, stamp.updated_at)) is not None:
+        return response
+
+    # Every fieldset is its own cache entry, versioned by the same stamp.
+    key, version = api_cache_key(slug, fields), f"{stamp.version}:{stamp.updated_at.isoformat()}"
+    body = page_cache.get(key, version)
+    if body is None:
+        recipe = db.one_or_404(db.select(Recipe).options(*_api_options(fields)).where(Recipe.slug == slug))
+        body = RecipeOut.from_recipe(recipe, fields).to_json(include=fields)
+        page_cache.set(key, body.decode(), version)
+    return with_validators(_json(body), etag, stamp.updated_at)
@@ -1,9 +1,11 @@
+import json
 import re
+from collections.abc import Collection
 
 from pydantic import BaseModel, ConfigDict, Field, PositiveFloat, field_validator
-from sqlalchemy import select
 from sqlalchemy.orm.scoping import scoped_session as Session
 
+from app.bulk import get_or_create_all
 from app.recipes.models import Ingredient, Recipe, RecipeIngredient
 from app.tags.models import RecipeTag, Tag
 
@@ -63,35 +65,73 @@ class CreateRecipe(BaseModel):
             return None
         return value
 
-    def to_db(self, session: Session) -> Recipe:
+    @property
+    def db_slug(self) -> str:
+        """The slug the recipe is stored under: the given slug or name, lowercased with runs of other chars as "_"."""
+        return re.sub(r"_+", "_", re.sub(r"[^_a-z0-9]+", "_", (self.slug or self.name).lower())).strip("_")
+
+    def to_db(
+        self,
+        session: Session,
+        ingredients: dict[str, Ingredient] | None = None,
+        tags: dict[str, Tag] | None = None,
+        flush: bool = True,
+    ) -> Recipe:
+        """Add the recipe to `session` and return it.
+
+        `ingredients`/`tags` are the rows returned by `resolve`; pass them
+        (and `flush=False`) when adding many recipes to resolve and flush
+        them all at once.
+        """
         recipe = Recipe(**self.model_dump(mode="python", exclude={"recipe_ingredients", "tags"}, exclude_unset=True))
-        slug = re.sub(r"_+", "_", re.sub(r"[^_a-z0-9]+", "_", (recipe.slug or recipe.name).lower())).strip("_")
+        slug = self.db_slug
         if not slug:
             raise ValueError("Recipe name must produce a non-empty slug")
         recipe.slug = slug
 
-        for i in self.tags or []:
-            if not (tag := session.execute(select(Tag).where(Tag.name == i)).scalar_one_or_none()):
-                tag = Tag(name=i)
-                session.add(tag)
-            session.add(RecipeTag(recipe=recipe, tag=tag))
+        if ingredients is None or tags is None:
+            # Resolve every ingredient and tag up front in a fixed number of statements.
+            ingredients, tags = self.resolve(session, [self])
+        for name in dict.fromkeys(t.lower() for t in self.tags or []):
+            session.add(RecipeTag(recipe=recipe, tag=tags[name]))
 
         for i in self.recipe_ingredients:
-            if (ingredient := session.get(Ingredient, i.slug)) is None:
-                ingredient = Ingredient(**i.model_dump(mode="python", exclude_unset=True, include={"slug", "name"}))
-                session.add(ingredient)
-
             recipe_ingredient = RecipeIngredient(
-                amount=i.amount, unit=i.unit, ingredient_list=i.ingredient_list, ingredient=ingredient
+                amount=i.amount, unit=i.unit, ingredient_list=i.ingredient_list, ingredient=ingredients[i.slug]
             )
             recipe.recipe_ingredients.append(recipe_ingredient)
             session.add(recipe_ingredient)
 
         session.add(recipe)
-        # Flush to assign relationship FKs and surface DB errors before commit.
-        session.flush()
+        if flush:
+            # Flush to assign relationship FKs and surface DB errors before commit.
+            session.flush()
         return recipe
 
+    @staticmethod
+    def resolve(session: Session, recipes: list["CreateRecipe"]) -> tuple[dict[str, Ingredient], dict[str, Tag]]:
+        """Load every ingredient and tag `recipes` use, creating the missing ones.
+
+        Takes the same few statements for one recipe or a thousand; see
+        `app.bulk.get_or_create_all`.
+        """
+        # Imported here: the ingredients package imports these schemas.
+        from app.ingredients.index import stage as ingredient_index_stage
+
+        ingredient_rows, tag_rows = {}, {}
+        for recipe in recipes:
+            for i in recipe.recipe_ingredients:
+                ingredient_rows.setdefault(i.slug, {"slug": i.slug, "name": i.name})
+            for name in recipe.tags or []:
+                tag_rows.setdefault(name.lower(), {"name": name.lower()})
+
+        ingredients, created = get_or_create_all(session, Ingredient, Ingredient.slug, list(ingredient_rows.values()))
+        # Bulk-inserted rows bypass the unit of work; tell the typeahead index about them.
+        for slug in created:
+            ingredient_index_stage(session, ingredients[slug])
+        tags, _ = get_or_create_all(session, Tag, Tag.name, list(tag_rows.values()))
+        return ingredients, tags
+
 
 class RecipeOut(BaseModel):
     slug: str
@@ -100,4 +140,61 @@ class RecipeOut(BaseModel):
     name: str
     sidebar: str | None = None
 
+    cook_time: float | None = None
+    prep_time: float | None = None
+    cook_temp: float | None = None
+    servings: float | None = None
+    images: list[str] | None = None
+    tags: list[str] | None = None
+
     model_config = ConfigDict(from_attributes=True)
+
+    @classmethod
+    def from_recipe(cls, recipe: Recipe, fields: Collection[str] | None = None) -> "RecipeOut":
+        """Build the output model from a loaded recipe without re-validating it.
+
+        The database already holds valid data, so the fields are copied
+        with `model_construct`; serializing the result with `to_json` then
+        stays in pydantic-core. Only `fields` (default: all) are filled in,
+        so relationships that are not asked for are never touched. Load the
+        recipe with `recipe_graph(tags=True)` to avoid lazy loads.
+        """
+        return cls.model_construct(
+            **{name: _RECIPE_OUT_VALUES.get(name, _attribute(name))(recipe) for name in fields or cls.model_fields}
+        )
+
+    def to_json(self, include=None, exclude_none: bool = False) -> bytes:
+        """Serialize straight to JSON bytes (no intermediate dict or str)."""
+        return self.__pydantic_serializer__.to_json(self, include=include, exclude_none=exclude_none)
+
+
+def _attribute(name: str):
+    return lambda recipe: getattr(recipe, name)
+
+
+_RECIPE_OUT_VALUES = {
+    "images": lambda recipe: json.loads(recipe.images) if recipe.images else None,
+    "tags": lambda recipe: [tag.name for tag in recipe.tags] or None,
+    "recipe_ingredients": lambda recipe: [
+        RecipeIngredientSchema.model_construct(
+            amount=row.amount,
+            unit=row.unit,
+            ingredient_list=row.ingredient_list,
+            slug=row.ingredient_slug,
+            name=row.ingredient.name,
+        )
+        for row in recipe.recipe_ingredients
+    ],
+}
+
+
+class RecipePage(BaseModel):
+    """A keyset-paginated page of recipes; `next`/`previous` are the cursors for `after`/`before`."""
+
+    items: list[RecipeOut]
+    next: str | None = None
+    previous: str | None = None
+
+    def to_json(self, fields: Collection[str] | None = None) -> bytes:
+        include = None if fields is None else {"items": {"__all__": set(fields)}, "next": True, "previous": True}
+        return self.__pydantic_serializer__.to_json(self, include=include)
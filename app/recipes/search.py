@@ -0,0 +1,129 @@
+"""Full-text search over recipes.
+
+Searchable text lives in a `recipe_search` side table holding one row per
+recipe with its name, directions, sidebar and ingredient names. On SQLite it
+is an FTS5 virtual table ranked with bm25; on PostgreSQL it is a plain table
+with a weighted, generated `tsvector` column behind a GIN index plus a
+`pg_trgm` index on the name for typo-tolerant matches.
+
+The table is not part of the ORM metadata. It is created and dropped along
+with it, and kept in sync from `recipes_flushed` in the same transaction as
+the recipe change.
+"""
+
+import re
+
+from sqlalchemy import DDL, column, delete, event, func, insert, literal_column, or_, select, table
+
+from app.extensions import db
+from app.recipes.changes import recipes_flushed
+from app.recipes.models import Ingredient, Recipe, RecipeIngredient
+
+TABLE_NAME = "recipe_search"
+
+recipe_search = table(
+    TABLE_NAME,
+    column("slug"),
+    column("name"),
+    column("directions"),
+    column("sidebar"),
+    column("ingredients"),
+    column("document"),
+)
+
+SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE_NAME} USING fts5("
+    "slug UNINDEXED, name, directions, sidebar, ingredients, tokenize = 'porter unicode61')"
+)
+# bm25 weights per FTS5 column, in declaration order; name matches count most.
+SQLITE_BM25_WEIGHTS = (0.0, 10.0, 1.0, 2.0, 5.0)
+
+POSTGRES_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+        slug VARCHAR(100) PRIMARY KEY,
+        name TEXT,
+        directions TEXT,
+        sidebar TEXT,
+        ingredients TEXT,
+        document TSVECTOR GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(ingredients, '')), 'B')
+            || setweight(to_tsvector('english', coalesce(sidebar, '')), 'C')
+            || setweight(to_tsvector('english', coalesce(directions, '')), 'D')
+        ) STORED
+    )""",
+    f"CREATE INDEX IF NOT EXISTS ix_{TABLE_NAME}_document ON {TABLE_NAME} USING gin (document)",
+    f"CREATE INDEX IF NOT EXISTS ix_{TABLE_NAME}_name_trgm ON {TABLE_NAME} USING gin (name gin_trgm_ops)",
+)
+
+event.listen(db.metadata, "after_create", DDL(SQLITE_DDL).execute_if(dialect="sqlite"))
+for statement in POSTGRES_DDL:
+    event.listen(db.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(db.metadata, "before_drop", DDL(f"DROP TABLE IF EXISTS {TABLE_NAME}"))
+
+
+def _documents(slugs=None):
+    """Select the searchable text for the given recipes (or all) from the live tables."""
+    ingredients = (
+        select(RecipeIngredient.recipe_slug, func.aggregate_strings(Ingredient.name, " ").label("names"))
+        .join(Ingredient, Ingredient.slug == RecipeIngredient.ingredient_slug)
+        .group_by(RecipeIngredient.recipe_slug)
+    )
+    documents = select(Recipe.slug, Recipe.name, Recipe.directions, Recipe.sidebar)
+    if slugs is not None:
+        ingredients = ingredients.where(RecipeIngredient.recipe_slug.in_(slugs))
+        documents = documents.where(Recipe.slug.in_(slugs))
+    ingredients = ingredients.subquery()
+    return documents.add_columns(ingredients.c.names).outerjoin(ingredients, ingredients.c.recipe_slug == Recipe.slug)
+
+
+def reindex(connection, slugs=None):
+    """Rewrite the search rows for `slugs`, or for every recipe when omitted.
+
+    Slugs that no longer have a recipe are removed from the index.
+    """
+    if slugs is None:
+        connection.execute(delete(recipe_search))
+    else:
+        slugs = list(slugs)
+        if not slugs:
+            return
+        connection.execute(delete(recipe_search).where(recipe_search.c.slug.in_(slugs)))
+    connection.execute(
+        insert(recipe_search).from_select(["slug", "name", "directions", "sidebar", "ingredients"], _documents(slugs))
+    )
+
+
+@recipes_flushed.connect
+def _reindex_flushed_recipes(session, changed, deleted):
+    reindex(session.connection(), changed | deleted)
+
+
+def _terms(query: str) -> list[str]:
+    return re.findall(r"\w+", query.lower())
+
+
+def search_statement(query: str, dialect: str):
+    """Build a select of `Recipe` rows matching `query`, best match first.
+
+    Every word of the query must match, as a prefix, somewhere in the
+    recipe's searchable text. Returns None when the query has no words.
+    """
+    terms = _terms(query)
+    if not terms:
+        return None
+
+    stmt = select(Recipe).join(recipe_search, recipe_search.c.slug == Recipe.slug)
+
+    if dialect == "postgresql":
+        tsquery = func.to_tsquery("english", " & ".join(f"{t}:*" for t in terms))
+        document = recipe_search.c.document
+        rank = func.ts_rank_cd(document, tsquery) + func.similarity(recipe_search.c.name, query)
+        return stmt.where(or_(document.op("@@")(tsquery), recipe_search.c.name.op("%")(query))).order_by(
+            rank.desc(), Recipe.slug
+        )
+
+    match = " ".join(f'"{t}"*' for t in terms)
+    rank = func.bm25(literal_column(TABLE_NAME), *SQLITE_BM25_WEIGHTS)
+    return stmt.where(literal_column(TABLE_NAME).op("MATCH")(match)).order_by(rank, Recipe.slug)
@@ -0,0 +1,352 @@
+"""Storage backend for S3-compatible object stores.
+
+`S3Storage` keeps uploads in a bucket so any number of web containers can
+share them. One boto3 client (thread-safe, with a bounded connection pool)
+is shared by every request in the process. Uploads are streamed: small ones
+go up in a single PUT, larger ones as a multipart upload of `part_size`
+parts, so memory per upload stays bounded whatever the file size. Clients
+can be sent to the object through a presigned (or public) URL instead of
+having a worker relay the bytes.
+
+`LocalS3Client` is an in-process stand-in implementing the subset of the
+boto3 S3 client API the backend uses, for tests and development without an
+object store.
+"""
+
+import hashlib
+import io
+import mimetypes
+import threading
+import uuid
+from collections.abc import Iterator
+from typing import BinaryIO, Optional
+from urllib.parse import quote
+
+from app.storage import CHUNK_SIZE, Storage, UploadTooLarge, _chunks
+
+# S3 rejects multipart parts smaller than this, except the last one.
+MIN_PART_SIZE = 5 * 1024 * 1024
+NOT_FOUND_CODES = ("404", "NoSuchKey", "NotFound")
+
+
+def _error_code(error: Exception) -> Optional[str]:
+    return getattr(error, "response", {}).get("Error", {}).get("Code")
+
+
+class S3Storage:
+    """Storage backend keeping files in an S3-compatible bucket.
+
+    Keys are UUIDs, stored under `prefix` in `bucket`; variants are stored
+    next to their original (`<key>.<parts>`) and deleted with it.
+    Content-addressed mode is only supported by the filesystem backend.
+    """
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        client=None,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        max_pool_connections: int = 10,
+        max_size: Optional[int] = None,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        part_size: int = 8 * 1024 * 1024,
+        presign: bool = True,
+        url_expires: int = 3600,
+        public_url: Optional[str] = None,
+    ):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.max_pool_connections = max_pool_connections
+        self.max_size = max_size
+        self.multipart_threshold = multipart_threshold
+        self.part_size = part_size
+        self.presign = presign
+        self.url_expires = url_expires
+        self.public_url = public_url
+        self._client = client
+        self._client_lock = threading.Lock()
+
+    def init_app(self, app):
+        config = app.config
+        if config.get("STORAGE_CONTENT_ADDRESSED"):
+            raise ValueError("STORAGE_CONTENT_ADDRESSED is only supported by the filesystem storage backend")
+        self.bucket = config.get("STORAGE_S3_BUCKET", self.bucket)
+        if not self.bucket:
+            raise ValueError("STORAGE_S3_BUCKET must be set to use the s3 storage backend")
+        self.prefix = config.get("STORAGE_S3_PREFIX", self.prefix)
+        self.endpoint_url = config.get("STORAGE_S3_ENDPOINT_URL", self.endpoint_url)
+        self.region = config.get("STORAGE_S3_REGION", self.region)
+        self.max_pool_connections = config.get("STORAGE_S3_MAX_POOL_CONNECTIONS", self.max_pool_connections)
+        self.presign = config.get("STORAGE_S3_PRESIGN", self.presign)
+        self.url_expires = config.get("STORAGE_S3_URL_EXPIRES", self.url_expires)
+        self.public_url = config.get("STORAGE_S3_PUBLIC_URL", self.public_url)
+        self.max_size = config.get("STORAGE_MAX_UPLOAD_SIZE", self.max_size)
+
+        if not hasattr(app, "extensions"):
+            app.extensions = {}
+        app.extensions["storage"] = self
+        return self
+
+    @property
+    def client(self):
+        """The shared boto3 client, created on first use."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import boto3
+                    from botocore.config import Config
+
+                    self._client = boto3.client(
+                        "s3",
+                        endpoint_url=self.endpoint_url,
+                        region_name=self.region,
+                        config=Config(
+                            max_pool_connections=self.max_pool_connections,
+                            retries={"max_attempts": 3, "mode": "standard"},
+                        ),
+                    )
+        return self._client
+
+    def _object_key(self, key: str) -> str:
+        return self.prefix + key
+
+    def create(self, file) -> str:
+        key = str(uuid.uuid4())
+        self._upload(key, file)
+        return key
+
+    def update(self, key: str, value) -> None:
+        self._upload(key, value)
+
+    def _upload(self, key: str, file):
+        """Stream `file` to the bucket, switching to a multipart upload once it outgrows one part."""
+        object_key = self._object_key(key)
+        # Uploads through Flask carry the client's content type; keep it for direct downloads. Other
+        # values (e.g. image variants, "<key>.640.webp") get the type of their key's extension.
+        content_type = getattr(file, "mimetype", None) or mimetypes.guess_type(key)[0]
+        extra = {"ContentType": content_type} if content_type else {}
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        parts = []
+        try:
+            for chunk in _chunks(file):
+                size += len(chunk)
+                if self.max_size is not None and size > self.max_size:
+                    raise UploadTooLarge(f"upload exceeds the maximum size of {self.max_size} bytes")
+                buffer += chunk
+                if upload_id is None and len(buffer) <= self.multipart_threshold:
+                    continue
+                if upload_id is None:
+                    upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=object_key, **extra)[
+                        "UploadId"
+                    ]
+                while len(buffer) >= self.part_size:
+                    parts.append(
+                        self._upload_part(object_key, upload_id, len(parts) + 1, bytes(buffer[: self.part_size]))
+                    )
+                    del buffer[: self.part_size]
+
+            if upload_id is None:
+                self.client.put_object(Bucket=self.bucket, Key=object_key, Body=bytes(buffer), **extra)
+                return
+            if buffer or not parts:
+                parts.append(self._upload_part(object_key, upload_id, len(parts) + 1, bytes(buffer)))
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=object_key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+            )
+        except BaseException:
+            if upload_id is not None:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=object_key, UploadId=upload_id)
+            raise
+
+    def _upload_part(self, object_key: str, upload_id: str, number: int, body: bytes) -> dict:
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=object_key, UploadId=upload_id, PartNumber=number, Body=body
+        )
+        return {"ETag": response["ETag"], "PartNumber": number}
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))["Body"]
+        except Exception as e:
+            if _error_code(e) in NOT_FOUND_CODES:
+                raise FileNotFoundError(key) from e
+            raise
+
+    def stream(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        body = self.open(key)
+        try:
+            while chunk := body.read(chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except Exception as e:
+            if _error_code(e) in NOT_FOUND_CODES:
+                return False
+            raise
+        return True
+
+    def delete(self, key: str) -> None:
+        object_key = self._object_key(key)
+        self.client.delete_object(Bucket=self.bucket, Key=object_key)
+        token = None
+        while True:
+            kwargs = {"ContinuationToken": token} if token else {}
+            listing = self.client.list_objects_v2(Bucket=self.bucket, Prefix=object_key + ".", **kwargs)
+            variants = [{"Key": item["Key"]} for item in listing.get("Contents", [])]
+            if variants:
+                self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": variants, "Quiet": True})
+            if not listing.get("IsTruncated"):
+                return
+            token = listing["NextContinuationToken"]
+
+    def url(self, key: str) -> Optional[str]:
+        object_key = self._object_key(key)
+        if self.public_url:
+            return f"{self.public_url.rstrip('/')}/{quote(object_key)}"
+        if self.presign:
+            return self.client.generate_presigned_url(
+                "get_object", Params={"Bucket": self.bucket, "Key": object_key}, ExpiresIn=self.url_expires
+            )
+        return None
+
+    variant_key = staticmethod(Storage.variant_key)
+
+    # convenience magic methods, as on the filesystem backend
+    def __iadd__(self, file):
+        return self.create(file)
+
+    def __delitem__(self, item):
+        self.delete(item)
+
+
+class LocalClientError(Exception):
+    """Error shaped like botocore's ClientError, carrying the S3 error code."""
+
+    def __init__(self, code: str, message: str = ""):
+        super().__init__(f"{code}: {message}" if message else code)
+        self.response = {"Error": {"Code": code, "Message": message}}
+
+
+class LocalS3Client:
+    """In-process, in-memory stand-in for a boto3 S3 client.
+
+    Implements the calls `S3Storage` makes, including S3's multipart rules
+    (parts of at least `min_part_size` except the last), and counts calls
+    per operation in `calls` so tests can assert on the traffic.
+    """
+
+    def __init__(self, min_part_size: int = MIN_PART_SIZE, endpoint: str = "http://s3.local"):
+        self.min_part_size = min_part_size
+        self.endpoint = endpoint
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.content_types: dict[tuple[str, str], Optional[str]] = {}
+        self.uploads: dict[str, tuple[str, str, dict[int, bytes]]] = {}
+        self.calls: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, operation: str):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def _get(self, bucket: str, key: str) -> bytes:
+        try:
+            return self.objects[bucket, key]
+        except KeyError:
+            raise LocalClientError("NoSuchKey", key) from None
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        with self._lock:
+            self._count("put_object")
+            self.objects[Bucket, Key] = bytes(Body)
+            self.content_types[Bucket, Key] = kwargs.get("ContentType")
+        return {"ETag": hashlib.md5(Body).hexdigest()}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        with self._lock:
+            self._count("get_object")
+            data = self._get(Bucket, Key)
+        return {"Body": io.BytesIO(data), "ContentLength": len(data)}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        with self._lock:
+            self._count("head_object")
+            if (Bucket, Key) not in self.objects:
+                raise LocalClientError("404", "Not Found")
+            return {"ContentLength": len(self.objects[Bucket, Key])}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        with self._lock:
+            self._count("delete_object")
+            self.objects.pop((Bucket, Key), None)
+        return {}
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        with self._lock:
+            self._count("delete_objects")
+            for item in Delete["Objects"]:
+                self.objects.pop((Bucket, item["Key"]), None)
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix="", MaxKeys=1000, ContinuationToken=None, **kwargs):
+        with self._lock:
+            self._count("list_objects_v2")
+            keys = sorted(k for b, k in self.objects if b == Bucket and k.startswith(Prefix))
+        if ContinuationToken:
+            keys = [k for k in keys if k > ContinuationToken]
+        page, truncated = keys[:MaxKeys], len(keys) > MaxKeys
+        response = {
+            "Contents": [{"Key": k, "Size": len(self.objects[Bucket, k])} for k in page],
+            "IsTruncated": truncated,
+        }
+        if truncated:
+            response["NextContinuationToken"] = page[-1]
+        return response
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        with self._lock:
+            self._count("create_multipart_upload")
+            upload_id = uuid.uuid4().hex
+            self.uploads[upload_id] = (Bucket, Key, {})
+            self.content_types[Bucket, Key] = kwargs.get("ContentType")
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        with self._lock:
+            self._count("upload_part")
+            if UploadId not in self.uploads:
+                raise LocalClientError("NoSuchUpload", UploadId)
+            self.uploads[UploadId][2][PartNumber] = bytes(Body)
+        return {"ETag": hashlib.md5(Body).hexdigest()}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        with self._lock:
+            self._count("complete_multipart_upload")
+            if UploadId not in self.uploads:
+                raise LocalClientError("NoSuchUpload", UploadId)
+            _, _, stored = self.uploads[UploadId]
+            numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+            if numbers != sorted(numbers) or any(n not in stored for n in numbers):
+                raise LocalClientError("InvalidPart")
+            if any(len(stored[n]) < self.min_part_size for n in numbers[:-1]):
+                raise LocalClientError("EntityTooSmall")
+            self.objects[Bucket, Key] = b"".join(stored[n] for n in numbers)
+            del self.uploads[UploadId]
+        return {"Bucket": Bucket, "Key": Key}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        with self._lock:
+            self._count("abort_multipart_upload")
+            self.uploads.pop(UploadId, None)
+        return {}
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn=3600, **kwargs):
+        return f"{self.endpoint}/{Params['Bucket']}/{quote(Params['Key'])}?X-Amz-Expires={ExpiresIn}"
@@ -1,17 +1,94 @@
+import glob
+import hashlib
 import os
+import re
+import tempfile
 import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Union
+from typing import BinaryIO, Optional, Protocol, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+CHUNK_SIZE = 64 * 1024
+
+# Keys produced in content-addressed mode: a hex SHA-256 digest.
+CONTENT_KEY = re.compile(r"[0-9a-f]{64}")
+# A content key optionally followed by a variant suffix, e.g. "<digest>.640.webp".
+SHARDED_KEY = re.compile(r"[0-9a-f]{64}(\..+)?")
+
+# Mode for stored files: what open() would create. mkstemp() makes them 0600,
+# which the web server can't read when it serves files via X-Sendfile/X-Accel-Redirect.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+class UploadTooLarge(ValueError):
+    """Raised by `Storage.create` when an upload exceeds the configured maximum size."""
+
+
+class StorageBackend(Protocol):
+    """Where uploaded files live: a local directory (`Storage`) or a bucket (`app.s3_storage.S3Storage`)."""
+
+    def create(self, file) -> str:
+        """Store bytes or a file-like object under a new key and return the key."""
+        ...
+
+    def update(self, key: str, value) -> None: ...
+
+    def open(self, key: str) -> BinaryIO:
+        """Return a readable binary stream; raises FileNotFoundError for unknown keys."""
+        ...
+
+    def stream(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]: ...
+
+    def exists(self, key: str) -> bool: ...
+
+    def delete(self, key: str) -> None:
+        """Delete a stored file together with its variants."""
+        ...
+
+    def url(self, key: str) -> Optional[str]:
+        """Return a URL clients can fetch the file from directly, or None to serve it ourselves."""
+        ...
+
+    @staticmethod
+    def variant_key(key: str, *parts) -> str: ...
 
 
 class Storage:
     dir: Path
-    """Abstract class for storing data in a bucket."""
+    """Storage backend keeping files in a local directory.
+
+    By default every upload is stored under a fresh UUID. In content-addressed
+    mode the key is the SHA-256 of the data instead: blobs are sharded into
+    `ab/cd/<digest>` fan-out directories, identical uploads share a single
+    blob, and a reference count kept next to each blob makes `delete` remove
+    it only once every upload of it has been deleted.
+
+    Uploads are always streamed to a temp file in CHUNK_SIZE pieces and renamed
+    into place, so memory per upload is constant and a crash mid-write never
+    leaves a truncated file behind. `max_size` (bytes) caps the upload size.
+    """
 
-    def __init__(self, dir: Optional[Union[str, Path]] = None):
+    def __init__(
+        self,
+        dir: Optional[Union[str, Path]] = None,
+        content_addressed: bool = False,
+        fanout: tuple[int, ...] = (2, 2),
+        max_size: Optional[int] = None,
+    ):
         # Don't require an app at construction time. If a dir is provided,
         # prepare it now; otherwise final initialization happens in init_app().
         self.dir = Path(dir) if dir is not None else None
+        self.content_addressed = content_addressed
+        self.fanout = fanout
+        self.max_size = max_size
         if self.dir is not None and not self.dir.exists():
             os.makedirs(self.dir)
 
@@ -36,6 +113,10 @@ class Storage:
         if not self.dir.exists():
             os.makedirs(self.dir)
 
+        config = getattr(app, "config", {})
+        self.content_addressed = config.get("STORAGE_CONTENT_ADDRESSED", self.content_addressed)
+        self.max_size = config.get("STORAGE_MAX_UPLOAD_SIZE", self.max_size)
+
         # Standard Flask pattern: register on app.extensions if app provided
         if app is not None:
             if not hasattr(app, "extensions"):
@@ -45,26 +126,36 @@ class Storage:
         return self
 
     def create(self, file) -> str:
-        """Store a file and return its UUID string key.
+        """Store a file and return its string key.
 
         Accepts a werkzeug FileStorage-like object (has .read()) or raw bytes.
-        Requires that `init_app` has previously been called (or a dir was
-        provided at construction).
+        The key is a UUID, or the SHA-256 hex digest of the data in
+        content-addressed mode. Requires that `init_app` has previously been
+        called (or a dir was provided at construction).
         """
         if self.dir is None:
             raise RuntimeError("storage not initialized; call init_app(app) or provide dir")
 
-        # Read bytes from FileStorage or accept bytes directly
-        if hasattr(file, "read"):
-            data = file.read()
-        else:
-            data = file
+        if not self.content_addressed:
+            key = str(uuid.uuid4())
+            tmp_path, _ = self._write_temp(file)
+            # Publish the complete file in one step so readers never see a partial upload.
+            os.replace(tmp_path, self.dir / key)
+            return key
 
-        file_uuid = uuid.uuid4()
-        file_path = self.dir / str(file_uuid)
-        with file_path.open("wb") as f:
-            f.write(data)
-        return str(file_uuid)
+        tmp_path, digest = self._write_temp(file, hashlib.sha256())
+        key = digest.hexdigest()
+        path = self._path(key)
+        try:
+            with self._locked():
+                # Identical content may already be stored; then only add a reference.
+                if not path.exists():
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(tmp_path, path)
+                self._add_ref(path, 1)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return key
 
     def read(self, key) -> Path:
         """Return the Path to the stored file for the given key.
@@ -74,20 +165,134 @@ class Storage:
         """
         if self.dir is None:
             raise RuntimeError("storage not initialized; call init_app(app) or provide dir")
-        return self.dir / key
+        return self._path(key)
+
+    def open(self, key: str) -> BinaryIO:
+        return self.read(key).open("rb")
+
+    def stream(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        with self.open(key) as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def exists(self, key: str) -> bool:
+        return self.dir is not None and self._path(key).is_file()
+
+    def url(self, key: str) -> Optional[str]:
+        # Local files are sent by the app (or the front server, see IMAGE_OFFLOAD).
+        return None
+
+    def refcount(self, key) -> int:
+        """Return how many uploads reference a content-addressed blob."""
+        try:
+            return int(self._refs_path(self._path(key)).read_text())
+        except FileNotFoundError:
+            return 0
 
     def update(self, filename, new_value):
         # Optional: implement overwrite behavior
-        p = self.dir / filename
-        with p.open("wb") as f:
-            f.write(new_value)
+        if CONTENT_KEY.fullmatch(filename):
+            raise ValueError("content-addressed blobs are immutable; create a new one instead")
+        path = self._path(filename)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path, _ = self._write_temp(new_value)
+        os.replace(tmp_path, path)
 
     def delete(self, filename):
+        """Delete a stored file together with its variants.
+
+        A content-addressed blob is only removed once its last reference is
+        deleted.
+        """
         if self.dir is None:
             return
-        p = self.dir / filename
+        p = self._path(filename)
+        if CONTENT_KEY.fullmatch(filename):
+            with self._locked():
+                if p.exists() and self._add_ref(p, -1) <= 0:
+                    p.unlink()
+                    self._delete_variants(p)
+            return
         if p.exists():
             p.unlink()
+            self._delete_variants(p)
+
+    @staticmethod
+    def variant_key(key: str, *parts) -> str:
+        """Return the key of a file derived from `key`, e.g. a resized image.
+
+        Variants are stored next to the original and deleted with it.
+        """
+        return ".".join([key, *map(str, parts)])
+
+    def _delete_variants(self, path: Path):
+        for variant in path.parent.glob(glob.escape(path.name) + ".*"):
+            variant.unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        if not SHARDED_KEY.fullmatch(key):
+            return self.dir / key
+        shards, start = [], 0
+        for width in self.fanout:
+            shards.append(key[start : start + width])
+            start += width
+        return self.dir.joinpath(*shards, key)
+
+    @staticmethod
+    def _refs_path(path: Path) -> Path:
+        return path.with_name(path.name + ".refs")
+
+    def _add_ref(self, path: Path, delta: int) -> int:
+        """Adjust a blob's reference count; callers must hold `_locked()`."""
+        refs = self._refs_path(path)
+        try:
+            count = int(refs.read_text())
+        except FileNotFoundError:
+            count = 0
+        count += delta
+        if count > 0:
+            refs.write_text(str(count))
+        return count
+
+    @contextmanager
+    def _locked(self):
+        """Serialize reference-count updates across threads and processes."""
+        with (self.dir / ".lock").open("a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write_temp(self, file, digest=None):
+        """Copy `file` to a temp file in the storage dir in fixed-size chunks.
+
+        Memory use is bounded by CHUNK_SIZE whatever the upload size. The data
+        is fed to `digest` (a hashlib object) if one is given, and the copy
+        is aborted with UploadTooLarge once it exceeds `max_size`. The temp
+        file is given FILE_MODE and synced to disk before returning so it can
+        be renamed into place atomically.
+        """
+        fd, name = tempfile.mkstemp(dir=self.dir, prefix=".upload-")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in _chunks(file):
+                    size += len(chunk)
+                    if self.max_size is not None and size > self.max_size:
+                        raise UploadTooLarge(f"upload exceeds the maximum size of {self.max_size} bytes")
+                    if digest is not None:
+                        digest.update(chunk)
+                    out.write(chunk)
+                out.flush()
+                os.fchmod(out.fileno(), FILE_MODE)
+                os.fsync(out.fileno())
+        except BaseException:
+            os.unlink(name)
+            raise
+        return Path(name), digest
 
     # convenience magic methods
     def __iadd__(self, file):
@@ -98,3 +303,21 @@ class Storage:
 
     def __delitem__(self, item):
         self.delete(item)
+
+
+def _chunks(file):
+    """Yield the contents of a file-like object or bytes in CHUNK_SIZE pieces."""
+    if not hasattr(file, "read"):
+        view = memoryview(file)
+        for start in range(0, len(view), CHUNK_SIZE):
+            yield view[start : start + CHUNK_SIZE]
+        return
+    try:
+        chunk = file.read(CHUNK_SIZE)
+    except TypeError:
+        # Minimal file-likes whose read() takes no size argument.
+        yield file.read()
+        return
+    while chunk:
+        yield chunk
+        chunk = file.read(CHUNK_SIZE)
@@ -0,0 +1,208 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Iterable, Optional
+
+GRAM_SIZE = 3
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def _grams(text: str, size: int) -> set[str]:
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class TypeaheadIndex:
+    """Process-local prefix and substring index for short labelled entries.
+
+    Every entry is a key (e.g. an ingredient slug) with a display label and
+    one or more searchable texts. Prefix lookups are answered from a sorted
+    array of normalized texts via bisection, and substring lookups from an
+    n-gram posting index (all 1- and 2-grams plus trigrams), so a query never
+    has to scan every entry.
+
+    The index is filled lazily from `loader` on first use and can be emptied
+    with `clear()` to force a rebuild. Changes made by other processes are
+    picked up through `version`: at most every `check_interval` seconds it is
+    called, and the index is rebuilt when it returns something other than it
+    did when the index was loaded.
+    """
+
+    def __init__(
+        self,
+        loader: Optional[Callable[[], Iterable[tuple[str, str, tuple[str, ...]]]]] = None,
+        version: Optional[Callable[[], object]] = None,
+        check_interval: float = 5.0,
+    ):
+        self.loader = loader
+        self.version = version
+        self.check_interval = check_interval
+        self.loaded = False
+        self._loaded_version = None
+        self._checked = 0.0
+        self._lock = threading.RLock()
+        self._labels: dict[str, str] = {}
+        self._texts: dict[str, tuple[str, ...]] = {}
+        self._grams: dict[str, set[str]] = {}
+        self._prefixes: list[tuple[str, str]] = []
+
+    def __len__(self):
+        return len(self._labels)
+
+    def __contains__(self, key):
+        return key in self._labels
+
+    def clear(self):
+        with self._lock:
+            self._labels.clear()
+            self._texts.clear()
+            self._grams.clear()
+            self._prefixes = []
+            self.loaded = False
+
+    def load(self, entries: Iterable[tuple[str, str, tuple[str, ...]]]):
+        """Replace the index contents with `(key, label, texts)` entries."""
+        with self._lock:
+            self.clear()
+            for key, label, texts in entries:
+                self._add(key, label, texts, ordered=False)
+            self._prefixes.sort()
+            self.loaded = True
+
+    def ensure_loaded(self):
+        if self.loaded and not self._check_due():
+            return
+        with self._lock:
+            if self.loaded and self._check_due():
+                self._checked = time.monotonic()
+                if self.version() != self._loaded_version:
+                    self.loaded = False
+            if not self.loaded:
+                # Read the version first: a change committed while loading triggers another rebuild.
+                version = self.version() if self.version is not None else None
+                self.load(self.loader() if self.loader is not None else ())
+                self._loaded_version, self._checked = version, time.monotonic()
+
+    def advance(self, previous, version):
+        """Record that `add()`/`discard()` calls took the index from source `previous` to `version`.
+
+        The writer's own process then skips the rebuild that the version
+        change would trigger. If the index was loaded at another version, it
+        is missing other changes, so it is rebuilt as usual.
+        """
+        with self._lock:
+            if self.loaded and self._loaded_version == previous:
+                self._loaded_version = version
+
+    def _check_due(self) -> bool:
+        return self.version is not None and time.monotonic() - self._checked >= self.check_interval
+
+    def add(self, key: str, label: str, *texts: str):
+        """Insert or replace a single entry. A no-op until the index is loaded."""
+        with self._lock:
+            if not self.loaded:
+                return
+            self._discard(key)
+            self._add(key, label, texts or (label,))
+
+    def discard(self, key: str):
+        with self._lock:
+            if self.loaded:
+                self._discard(key)
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[str, str]]:
+        """Return up to `limit` `(key, label)` pairs whose texts contain `query`, best first.
+
+        Entries whose text equals the query rank first, then texts starting with
+        the query, then texts with a word starting with the query, then any other
+        substring match. Ties are broken by the shortest matching text and then
+        alphabetically by key.
+        """
+        query = _normalize(query)
+        if not query or limit <= 0:
+            return []
+        self.ensure_loaded()
+
+        with self._lock:
+            # Prefix matches always outrank other substring matches, so when
+            # there are enough of them the n-gram postings need not be touched.
+            ranked = self._rank(query, self._prefix_candidates(query))
+            if len(ranked) < limit:
+                ranked = self._rank(query, self._substring_candidates(query))
+            return [(key, self._labels[key]) for *_, key in ranked[:limit]]
+
+    def _rank(self, query: str, keys: Iterable[str]) -> list[tuple[int, int, str]]:
+        ranked = []
+        for key in keys:
+            best = None
+            for text in self._texts[key]:
+                position = text.find(query)
+                if position < 0:
+                    continue
+                if text == query:
+                    rank = 0
+                elif position == 0:
+                    rank = 1
+                elif text[position - 1] in " -_":
+                    rank = 2
+                else:
+                    rank = 3
+                if best is None or (rank, len(text)) < best:
+                    best = (rank, len(text))
+            if best is not None:
+                ranked.append((*best, key))
+        ranked.sort()
+        return ranked
+
+    def _prefix_candidates(self, query: str) -> set[str]:
+        candidates = set()
+        i = bisect_left(self._prefixes, (query, ""))
+        while i < len(self._prefixes) and self._prefixes[i][0].startswith(query):
+            candidates.add(self._prefixes[i][1])
+            i += 1
+        return candidates
+
+    def _substring_candidates(self, query: str) -> set[str]:
+        if len(query) < GRAM_SIZE:
+            # Every 1- and 2-gram is indexed, so short queries are a single lookup.
+            return set(self._grams.get(query, ()))
+
+        postings = sorted((self._grams.get(g, set()) for g in _grams(query, GRAM_SIZE)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return candidates
+
+    def _add(self, key: str, label: str, texts: Iterable[str], ordered: bool = True):
+        """Index an entry; with `ordered=False` prefixes are appended and the caller sorts them."""
+        normalized = tuple(dict.fromkeys(t for t in (_normalize(t) for t in texts) if t))
+        self._labels[key] = label
+        self._texts[key] = normalized
+        for text in normalized:
+            if ordered:
+                insort(self._prefixes, (text, key))
+            else:
+                self._prefixes.append((text, key))
+            for size in range(1, GRAM_SIZE + 1):
+                for gram in _grams(text, size):
+                    self._grams.setdefault(gram, set()).add(key)
+
+    def _discard(self, key: str):
+        if key not in self._labels:
+            return
+        for text in self._texts.pop(key):
+            i = bisect_left(self._prefixes, (text, key))
+            if i < len(self._prefixes) and self._prefixes[i] == (text, key):
+                del self._prefixes[i]
+            for size in range(1, GRAM_SIZE + 1):
+                for gram in _grams(text, size):
+                    posting = self._grams.get(gram)
+                    if posting is not None:
+                        posting.discard(key)
+                        if not posting:
+                            del self._grams[gram]
+        del self._labels[key]
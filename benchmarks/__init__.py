@@ -0,0 +1,5 @@
+"""Benchmarks for the cookbook app: a catalogue seeder, micro-benchmarks and a load driver.
+
+Run `python -m benchmarks --help`; results are written as JSON so runs can
+be compared.
+"""
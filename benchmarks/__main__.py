@@ -0,0 +1,94 @@
+"""Seed a database and run the benchmarks: `python -m benchmarks [options]`."""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the cookbook app.")
+    parser.add_argument("--recipes", type=int, default=10_000, help="catalogue size to seed (default 10000)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the synthetic catalogue")
+    parser.add_argument(
+        "--database", help="database URL; an existing catalogue is reused (default: a temporary SQLite file)"
+    )
+    parser.add_argument(
+        "--suite", choices=["all", "micro", "load", "importtime"], action="append", help="suites to run (repeatable)"
+    )
+    parser.add_argument("--only", action="append", help="run only micro-benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7, help="samples per micro-benchmark")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per concurrency level")
+    parser.add_argument("--concurrency", type=int, action="append", help="load driver threads (repeatable)")
+    parser.add_argument("--output", "-o", help="write the JSON results here (default: stdout)")
+    parser.add_argument(
+        "--save", action="store_true", help="also store the results under the git commit for `benchmarks.compare`"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    suites = set(args.suite or ["all"])
+    if "all" in suites:
+        suites = {"micro", "load", "importtime"}
+    with tempfile.TemporaryDirectory(prefix="cookbook-bench-") as tmpdir:
+        # The app reads its configuration on import, so point it at the database first.
+        os.environ["DATABASE_URL"] = args.database or f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+        os.environ.setdefault("METRICS_SERVER_TIMING", "false")
+
+        from sqlalchemy.engine import make_url
+
+        from app import create_app
+        from app.database import writing
+        from app.extensions import db
+
+        from . import importtime, load, micro
+        from .harness import Run, format_table, run_meta
+        from .seed import seed
+
+        app = create_app()
+        run = Run(
+            meta=run_meta(
+                recipes=args.recipes, seed=args.seed, database=make_url(os.environ["DATABASE_URL"]).get_backend_name()
+            )
+        )
+        with app.app_context():
+            db.create_all()
+            with writing():
+                added = seed(
+                    db.session,
+                    recipes=args.recipes,
+                    seed=args.seed,
+                    progress=lambda report: print(f"seeded {report.imported} recipes", file=sys.stderr, end="\r"),
+                )
+            print(f"\rseeded {added} recipes", file=sys.stderr)
+
+            client = app.test_client()
+            if "importtime" in suites:
+                run.results.append(importtime.run(args.repeat))
+            if "micro" in suites:
+                run.results += micro.run(client, args, names=args.only)
+            if "load" in suites:
+                slugs = micro._sample_slugs(200, args.seed)
+                for concurrency in args.concurrency or [1, 4]:
+                    run.results.append(load.drive(app, load.workload(slugs), args.duration, concurrency, args.seed))
+            db.session.remove()
+
+    print(format_table(run.results), file=sys.stderr)
+    if args.save:
+        from .compare import save
+
+        print(f"saved {save(run)}", file=sys.stderr)
+    if args.output:
+        Path(args.output).write_text(run.to_json())
+    elif not args.save:
+        print(run.to_json())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
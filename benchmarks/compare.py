@@ -0,0 +1,239 @@
+"""Compare a benchmark run with a stored baseline: `python -m benchmarks.compare [options]`.
+
+Runs saved with `python -m benchmarks --save` are stored in `.benchmarks/`
+under their git commit. By default the current commit's run is compared
+with the newest stored run of an ancestor commit. A benchmark only counts
+as changed when a Mann-Whitney U test says its samples differ (p < alpha);
+a gated benchmark that got slower by more than its threshold fails the
+comparison.
+"""
+
+import argparse
+import math
+import subprocess
+import sys
+from itertools import product
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from .harness import ROOT, Result, Run, _format_seconds, git_commit
+
+RESULTS_DIR = ROOT / ".benchmarks"
+# Largest slowdown (relative change of the median time) tolerated for the gated benchmarks.
+THRESHOLDS = {
+    "book": 0.10,
+    "datalist_options": 0.10,
+    "create_recipe.to_db": 0.10,
+    "storage.create": 0.10,
+    "importtime.app": 0.20,
+}
+ALPHA = 0.05
+
+
+def run_key(meta: dict) -> str:
+    return f"{meta['commit']}-dirty" if meta.get("dirty") else str(meta["commit"])
+
+
+def save(run: Run, directory: Path = RESULTS_DIR) -> Path:
+    """Store `run` under its commit, replacing an earlier run of the same commit."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{run_key(run.meta)}.json"
+    path.write_text(run.to_json())
+    return path
+
+
+def load(path: Path) -> Run:
+    return Run.model_validate_json(path.read_text())
+
+
+def find_baseline(current_key: str, directory: Path = RESULTS_DIR, max_commits: int = 500) -> Path | None:
+    """The stored run of the nearest commit in HEAD's history, other than `current_key` itself."""
+    history = subprocess.run(
+        ["git", "rev-list", f"--max-count={max_commits}", "HEAD"], cwd=ROOT, capture_output=True, text=True
+    ).stdout.split()
+    for commit in history:
+        path = directory / f"{commit}.json"
+        if commit != current_key and path.exists():
+            return path
+    return None
+
+
+def mann_whitney_u(a: list[float], b: list[float]) -> float:
+    """Two-sided p-value of the Mann-Whitney U test that `a` and `b` come from the same distribution.
+
+    Exact for small samples without ties, otherwise the normal approximation
+    with a tie correction.
+    """
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return 1.0
+    pooled = sorted((value, group) for group, values in enumerate((a, b)) for value in values)
+    ranks, ties, i = [0.0] * len(pooled), [], 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        if j > i:
+            ties.append(j - i + 1)
+        i = j + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, pooled) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    u = min(u, n1 * n2 - u)
+
+    if not ties and n1 * n2 <= 400:
+        return min(1.0, 2 * _exact_u_cdf(int(u), n1, n2))
+    mean = n1 * n2 / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - sum(t**3 - t for t in ties) / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - mean + 0.5) / math.sqrt(variance)
+    return min(1.0, math.erfc(-z / math.sqrt(2)))
+
+
+def _exact_u_cdf(u: int, n1: int, n2: int) -> float:
+    """P(U <= u) under the null hypothesis, counting rank arrangements."""
+    # counts[i][j][s]: arrangements of i + j values with U statistic s; built up one value at a time.
+    counts = {(0, 0): [1]}
+    for i, j in sorted(product(range(n1 + 1), range(n2 + 1)), key=sum):
+        if (i, j) == (0, 0):
+            continue
+        size = i * j + 1
+        total = [0] * size
+        if i:
+            # The largest value is from the first sample: it beats all j values of the second.
+            for s, c in enumerate(counts[(i - 1, j)]):
+                total[s + j] += c
+        if j:
+            for s, c in enumerate(counts[(i, j - 1)]):
+                total[s] += c
+        counts[(i, j)] = total
+    distribution = counts[(n1, n2)]
+    return sum(distribution[: u + 1]) / sum(distribution)
+
+
+class Comparison(BaseModel):
+    name: str
+    baseline: float
+    current: float
+    change: float
+    p_value: float
+    threshold: float | None = None
+
+    @property
+    def significant(self) -> bool:
+        return self.p_value < ALPHA
+
+    @property
+    def regression(self) -> bool:
+        return self.threshold is not None and self.significant and self.change > self.threshold
+
+    @property
+    def verdict(self) -> str:
+        if self.regression:
+            return "REGRESSION"
+        if not self.significant:
+            return "no change"
+        return "slower" if self.change > 0 else "faster"
+
+
+def compare(baseline: Run, current: Run, thresholds: dict[str, float] = THRESHOLDS) -> list[Comparison]:
+    """Compare the benchmarks present in both runs by their median time per operation."""
+    before = {result.name: result for result in baseline.results}
+    comparisons = []
+    for result in current.results:
+        old: Result | None = before.get(result.name)
+        if old is None:
+            continue
+        comparisons.append(
+            Comparison(
+                name=result.name,
+                baseline=old.median,
+                current=result.median,
+                change=result.median / old.median - 1 if old.median else 0.0,
+                p_value=mann_whitney_u(old.samples, result.samples),
+                threshold=thresholds.get(result.name),
+            )
+        )
+    return comparisons
+
+
+def format_comparisons(comparisons: list[Comparison]) -> str:
+    rows = [("benchmark", "baseline", "current", "change", "p", "limit", "")]
+    for c in comparisons:
+        rows.append(
+            (
+                c.name,
+                _format_seconds(c.baseline),
+                _format_seconds(c.current),
+                f"{c.change:+.1%}",
+                f"{c.p_value:.3f}",
+                f"+{c.threshold:.0%}" if c.threshold is not None else "",
+                c.verdict,
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(
+            cell.ljust(width) if i in (0, 6) else cell.rjust(width) for i, (cell, width) in enumerate(zip(row, widths))
+        ).rstrip()
+        for row in rows
+    )
+
+
+def _threshold(text: str) -> tuple[str, float]:
+    name, _, value = text.partition("=")
+    try:
+        return name, float(value.rstrip("%")) / (100 if value.endswith("%") else 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME=FRACTION or NAME=PERCENT%, got {text!r}") from None
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare", description=__doc__.split("\n")[0])
+    parser.add_argument("current", nargs="?", type=Path, help="run to check (default: the stored run of HEAD)")
+    parser.add_argument("--baseline", help="commit or result file to compare with (default: nearest stored ancestor)")
+    parser.add_argument(
+        "--threshold", type=_threshold, action="append", default=[], help="gate a benchmark: NAME=0.1 or NAME=10%%"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    current_path = args.current or RESULTS_DIR / f"{run_key(git_commit())}.json"
+    if not current_path.exists():
+        print(f"no results at {current_path}; run `python -m benchmarks --save` first", file=sys.stderr)
+        return 2
+    current = load(current_path)
+
+    if args.baseline:
+        baseline_path = Path(args.baseline)
+        if not baseline_path.exists():
+            baseline_path = RESULTS_DIR / f"{args.baseline}.json"
+    else:
+        baseline_path = find_baseline(run_key(current.meta))
+    if baseline_path is None or not baseline_path.exists():
+        print("no baseline stored yet; this run becomes the baseline for later commits", file=sys.stderr)
+        return 0
+    baseline = load(baseline_path)
+
+    for key in ("recipes", "python", "database"):
+        if baseline.meta.get(key) != current.meta.get(key):
+            print(f"warning: {key} differs: {baseline.meta.get(key)} -> {current.meta.get(key)}", file=sys.stderr)
+
+    comparisons = compare(baseline, current, {**THRESHOLDS, **dict(args.threshold)})
+    print(f"baseline {baseline_path.stem} -> current {current_path.stem}")
+    print(format_comparisons(comparisons))
+    regressions = [c.name for c in comparisons if c.regression]
+    if regressions:
+        print(f"\nregressions beyond threshold: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
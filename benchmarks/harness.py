@@ -0,0 +1,126 @@
+"""Timing and result reporting shared by the micro and load benchmarks."""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class Result(BaseModel):
+    """One benchmark: raw samples (seconds per operation) and their summary."""
+
+    name: str
+    samples: list[float]
+    # Operations per sample; for load runs, the number of requests.
+    number: int = 1
+    extra: dict = Field(default_factory=dict)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    def percentile(self, p: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def summary(self) -> dict:
+        return {
+            "median": self.median,
+            "mean": statistics.fmean(self.samples),
+            "stdev": statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "ops_per_sec": 1 / self.median if self.median else None,
+        }
+
+
+class Run(BaseModel):
+    meta: dict
+    results: list[Result] = Field(default_factory=list)
+
+    def to_json(self) -> str:
+        """The run as JSON, with each result's summary next to its samples."""
+        data = self.model_dump()
+        for result, dumped in zip(self.results, data["results"]):
+            dumped["summary"] = result.summary()
+        return json.dumps(data, indent=2)
+
+
+def measure(name: str, fn: Callable[[], object], repeat: int = 7, min_time: float = 0.2, **extra) -> Result:
+    """Time `fn` like `timeit`: calibrate a loop count taking at least `min_time`, then take `repeat` samples."""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    samples = [t / number for t in timer.repeat(repeat, number)]
+    return Result(name=name, samples=samples, number=number, extra=extra)
+
+
+def git_commit() -> dict:
+    """The checked-out commit, and whether the tree has uncommitted changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True
+            ).stdout.strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def run_meta(**extra) -> dict:
+    return {
+        **git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        **extra,
+    }
+
+
+def format_table(results: list[Result]) -> str:
+    rows = [("benchmark", "median", "p99", "ops/s")]
+    for result in results:
+        summary = result.summary()
+        rows.append(
+            (
+                result.name,
+                _format_seconds(summary["median"]),
+                _format_seconds(summary["p99"]),
+                f"{result.extra['throughput']:.1f}"
+                if "throughput" in result.extra
+                else f"{summary['ops_per_sec']:.1f}",
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(4)]
+    return "\n".join(
+        "  ".join(
+            cell.ljust(width) if i == 0 else cell.rjust(width) for i, (cell, width) in enumerate(zip(row, widths))
+        )
+        for row in rows
+    )
+
+
+def _format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
@@ -0,0 +1,60 @@
+"""Cold-start benchmark: how long `import app` and `create_app()` take in a fresh interpreter.
+
+Each sample starts a new Python process with `-X importtime`, so nothing is
+already in `sys.modules`; the sample is the time from `import app` to a
+configured application (the interpreter's own startup excluded).
+"""
+
+import os
+import subprocess
+import sys
+
+from .harness import ROOT, Result
+
+
+def parse(stderr: str) -> dict[str, tuple[int, int]]:
+    """Map module name to `(self_us, cumulative_us)` from `-X importtime` output."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+# Prints the seconds from importing the package to a created app.
+COLD_START = """
+import time
+start = time.perf_counter()
+import app
+app.create_app()
+print(time.perf_counter() - start)
+"""
+
+
+def sample() -> tuple[float, dict[str, tuple[int, int]]]:
+    """One cold start: its duration in seconds and the `-X importtime` table."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", COLD_START],
+        cwd=ROOT,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(completed.stdout), parse(completed.stderr)
+
+
+def run(repeat: int = 7, slowest: int = 10) -> Result:
+    """`repeat` cold starts; `extra["slowest"]` lists the modules costing the most in the last one."""
+    samples, times = [], {}
+    for _ in range(repeat):
+        seconds, times = sample()
+        samples.append(seconds)
+    heaviest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:slowest]
+    return Result(
+        name="importtime.app",
+        samples=samples,
+        extra={"slowest": [{"module": name, "self_ms": self_us / 1e3} for name, (self_us, _) in heaviest]},
+    )
@@ -0,0 +1,61 @@
+"""In-process WSGI load driver.
+
+Worker threads send a weighted mix of requests straight to the WSGI app
+(no sockets or HTTP server) for a fixed time and record each latency. In
+one process the GIL bounds throughput to about one core, so compare
+runs with each other rather than with a multi-worker deployment.
+"""
+
+import random
+import threading
+import time
+
+from werkzeug.test import Client
+
+from .harness import Result
+
+
+def workload(slugs: list[str]) -> list[tuple[float, str]]:
+    """A read-heavy mix of `(weight, url)` pairs like the site's traffic."""
+    mix = [(4.0, f"/book/{slug}/") for slug in slugs]
+    mix += [(1.0, f"/recipes/get/{slug}/") for slug in slugs[:10]]
+    mix += [(2.0, "/recipes/"), (1.0, "/recipes/?page=5"), (2.0, "/ingredients/datalist-options/?q=br")]
+    return mix
+
+
+def drive(app, requests: list[tuple[float, str]], duration: float = 10.0, concurrency: int = 4, seed: int = 0):
+    """Run the mix for `duration` seconds on `concurrency` threads; return a Result of request latencies."""
+    weights, urls = zip(*requests)
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index: int):
+        rng = random.Random(f"{seed}:{index}")
+        client = Client(app)
+        own, failed = [], 0
+        while time.perf_counter() < deadline:
+            url = rng.choices(urls, weights)[0]
+            start = time.perf_counter()
+            response = client.get(url)
+            own.append(time.perf_counter() - start)
+            failed += response.status_code >= 500
+            response.close()
+        with lock:
+            latencies.extend(own)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return Result(
+        name=f"load.c{concurrency}",
+        samples=latencies,
+        number=len(latencies),
+        extra={"throughput": len(latencies) / elapsed, "errors": sum(errors), "duration": elapsed},
+    )
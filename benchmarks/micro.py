@@ -0,0 +1,150 @@
+"""Micro-benchmarks of the hot paths, each run inside an app context on a seeded database."""
+
+import io
+import random
+import tempfile
+from itertools import islice
+
+from sqlalchemy import select
+
+from app.conversions.engine import CONVERSION_ERRORS
+from app.extensions import db, page_cache
+from app.recipes.models import Recipe, RecipeIngredient, pretty_text, recipe_graph, weight_grams
+from app.recipes.schemas import CreateRecipe
+from app.storage import Storage
+
+from .harness import Result, measure
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    """Register `fn(client, options) -> Result | list[Result]` under `name`."""
+
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+
+    return register
+
+
+def _sample_slugs(count: int, seed: int = 0) -> list[str]:
+    slugs = list(islice(db.session.scalars(select(Recipe.slug).order_by(Recipe.slug)), 10_000))
+    return random.Random(seed).sample(slugs, min(count, len(slugs)))
+
+
+def _loaded_rows() -> list[RecipeIngredient]:
+    slugs = _sample_slugs(50)
+    recipes = db.session.scalars(select(Recipe).options(*recipe_graph()).where(Recipe.slug.in_(slugs))).all()
+    return [row for recipe in recipes for row in recipe.recipe_ingredients]
+
+
+@benchmark("recipe_ingredient.pretty")
+def recipe_ingredient_pretty(client, options):
+    rows = _loaded_rows()
+    stored = measure("recipe_ingredient.pretty", lambda: [row.pretty for row in rows], options.repeat, rows=len(rows))
+    computed = measure(
+        "recipe_ingredient.pretty_text",
+        lambda: [pretty_text(row.amount, row.unit, row.ingredient.name) for row in rows],
+        options.repeat,
+        rows=len(rows),
+    )
+    return [stored, computed]
+
+
+@benchmark("recipe_ingredient.weight")
+def recipe_ingredient_weight(client, options):
+    rows = _loaded_rows()
+    stored = measure("recipe_ingredient.weight", lambda: [row.weight for row in rows], options.repeat, rows=len(rows))
+
+    def compute():
+        for row in rows:
+            try:
+                weight_grams(row.amount, row.unit, row.ingredient.density)
+            except CONVERSION_ERRORS:
+                pass
+
+    return [stored, measure("recipe_ingredient.weight_grams", compute, options.repeat, rows=len(rows))]
+
+
+@benchmark("create_recipe.to_db")
+def create_recipe_to_db(client, options):
+    ingredients = [
+        {"slug": f"ing-{i}", "name": f"Ingredient {i}", "amount": 1.5, "unit": "cup"} for i in range(0, 120, 10)
+    ]
+    data = CreateRecipe(
+        name="Benchmark recipe", directions="mix", tags=["tag-1", "tag-2"], recipe_ingredients=ingredients
+    )
+
+    def write():
+        data.to_db(db.session)
+        db.session.rollback()
+
+    return measure("create_recipe.to_db", write, repeat=options.repeat)
+
+
+@benchmark("datalist_options")
+def datalist_options(client, options):
+    prefixes = ["br", "smo", "fre", "dried s", "sugar", "x"]
+    client.get("/ingredients/datalist-options/?q=a")  # build the index
+
+    def query():
+        for prefix in prefixes:
+            client.get(f"/ingredients/datalist-options/?q={prefix}")
+
+    result = measure("datalist_options", query, repeat=options.repeat)
+    result.samples = [sample / len(prefixes) for sample in result.samples]
+    return result
+
+
+@benchmark("book")
+def book(client, options):
+    slugs = _sample_slugs(20)
+    urls = [f"/book/{slug}/" for slug in slugs]
+
+    def render():
+        for url in urls:
+            page_cache.clear()
+            client.get(url)
+
+    def cached():
+        for url in urls:
+            client.get(url)
+
+    cold = measure("book", render, repeat=options.repeat)
+    warm = measure("book.cached", cached, repeat=options.repeat)
+    for result in (cold, warm):
+        result.samples = [sample / len(urls) for sample in result.samples]
+    return [cold, warm]
+
+
+@benchmark("get_recipes")
+def get_recipes(client, options):
+    total = db.session.scalar(select(db.func.count()).select_from(Recipe))
+    deep_page = max(1, total // 10 // 2)
+    middle = db.session.scalar(select(Recipe.slug).order_by(Recipe.slug).offset(total // 2).limit(1))
+    return [
+        measure("get_recipes.first_page", lambda: client.get("/recipes/"), repeat=options.repeat),
+        measure("get_recipes.offset", lambda: client.get(f"/recipes/?page={deep_page}"), repeat=options.repeat),
+        measure("get_recipes.keyset", lambda: client.get(f"/recipes/?after={middle}"), repeat=options.repeat),
+    ]
+
+
+@benchmark("storage.create")
+def storage_create(client, options):
+    payload = random.Random(0).randbytes(64 * 1024)
+    with tempfile.TemporaryDirectory(prefix="cookbook-bench-") as directory:
+        storage = Storage(directory)
+        return measure(
+            "storage.create", lambda: storage.create(io.BytesIO(payload)), repeat=options.repeat, bytes=len(payload)
+        )
+
+
+def run(client, options, names=None) -> list[Result]:
+    results = []
+    for name, fn in BENCHMARKS.items():
+        if names and not any(selected in name for selected in names):
+            continue
+        outcome = fn(client, options)
+        results.extend(outcome if isinstance(outcome, list) else [outcome])
+    return results
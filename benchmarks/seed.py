@@ -0,0 +1,106 @@
+"""Synthetic catalogues for benchmarks.
+
+`seed` fills a database with a reproducible catalogue (the same `seed`
+gives the same recipes) through the normal write path: ingredients with
+densities are inserted first, then recipes go through `CreateRecipe` via
+the bulk importer, so display values are materialized as in production.
+"""
+
+import json
+import random
+from collections.abc import Iterator
+
+from sqlalchemy import func, select
+
+from app.bulk import insert_ignore
+from app.recipes.importer import import_recipes
+from app.recipes.models import Ingredient, Recipe
+
+ADJECTIVES = (
+    "brown", "white", "smoked", "fresh", "dried", "ground", "toasted", "sweet", "sour", "spicy",
+    "wild", "roasted", "pickled", "golden", "black", "red", "green", "sea", "whole", "light",
+)  # fmt: skip
+NOUNS = (
+    "flour", "sugar", "butter", "salt", "pepper", "rice", "beans", "milk", "cream", "cheese",
+    "onion", "garlic", "tomato", "lentils", "oats", "honey", "vinegar", "oil", "paprika", "basil",
+    "thyme", "lemon", "apple", "carrot", "potato", "yogurt", "stock", "mustard", "ginger", "cumin",
+)  # fmt: skip
+DISHES = ("stew", "salad", "bread", "soup", "cake", "pie", "curry", "risotto", "tart", "roast", "bake", "sauce")
+UNITS = ("g", "kg", "cup", "tbsp", "tsp", "ml", "l", "oz", "lb", "pinch", None)
+AMOUNTS = (0.25, 0.5, 0.75, 1, 1.5, 2, 3, 4, 100, 250, 500)
+LISTS = ("Ingredients", "Ingredients", "Ingredients", "Sauce", "Topping")
+
+
+def ingredient_names(count: int) -> list[str]:
+    """`count` distinct ingredient names: every adjective/noun pair, then numbered variants."""
+    pairs = [f"{adjective} {noun}" for noun in NOUNS for adjective in ADJECTIVES]
+    return [pairs[i % len(pairs)] + (f" {i // len(pairs)}" if i >= len(pairs) else "") for i in range(count)]
+
+
+def ingredient_rows(count: int, rng: random.Random) -> list[dict]:
+    rows = []
+    for i, name in enumerate(ingredient_names(count)):
+        # Names fit the 50 character columns; slugs are unique by index.
+        rows.append({"slug": f"ing-{i}", "name": name.title(), "density": round(rng.uniform(0.3, 1.5), 2)})
+    return rows
+
+
+def recipe_records(
+    recipes: int, ingredients: list[dict], tags: list[str], rng: random.Random, start: int = 0
+) -> Iterator[str]:
+    """Yield NDJSON `CreateRecipe` records for recipes `start` .. `start + recipes - 1`."""
+    for i in range(start, start + recipes):
+        lines = {}
+        for ingredient in rng.sample(ingredients, rng.randint(4, min(16, len(ingredients)))):
+            lines[ingredient["slug"]] = {
+                "slug": ingredient["slug"],
+                "name": ingredient["name"],
+                "amount": rng.choice(AMOUNTS),
+                "unit": rng.choice(UNITS),
+                "ingredient_list": rng.choice(LISTS),
+            }
+        yield json.dumps(
+            {
+                "slug": f"recipe_{i:07d}",
+                "name": f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS)} {rng.choice(DISHES)} {i}",
+                "directions": "\n".join(f"{step}. " + " ".join(rng.choices(NOUNS, k=12)) for step in range(1, 6)),
+                "cook_time": rng.choice((10, 20, 30, 45, 60, 90)),
+                "prep_time": rng.choice((5, 10, 15, 30)),
+                "servings": rng.randint(1, 8),
+                "tags": rng.sample(tags, rng.randint(0, 3)),
+                "recipe_ingredients": list(lines.values()),
+            }
+        )
+
+
+def seed(
+    session,
+    recipes: int = 10_000,
+    ingredients: int | None = None,
+    tags: int = 50,
+    seed: int = 0,
+    chunk_size: int = 1000,
+    progress=None,
+) -> int:
+    """Add synthetic recipes until the database holds `recipes`; return how many were added.
+
+    Ingredients default to one per 20 recipes (at least 200). Seeding is
+    resumable: recipes already present are kept and numbering continues.
+    """
+    rng = random.Random(seed)
+    ingredient_data = ingredient_rows(ingredients or max(200, recipes // 20), rng)
+    tag_names = [f"tag-{i}" for i in range(tags)]
+
+    existing = session.execute(select(func.count()).select_from(Recipe)).scalar_one()
+    if existing >= recipes:
+        return 0
+    for start in range(0, len(ingredient_data), chunk_size):
+        insert_ignore(session, Ingredient, ingredient_data[start : start + chunk_size])
+    session.commit()
+
+    rng = random.Random(f"{seed}:{existing}")
+    records = recipe_records(recipes - existing, ingredient_data, tag_names, rng, start=existing)
+    report = import_recipes(session, records, chunk_size=chunk_size, on_chunk=progress)
+    if report.failed:
+        raise RuntimeError(f"seeding failed for {report.failed} recipes: {report.errors[:3]}")
+    return report.imported
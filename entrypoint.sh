@@ -19,4 +19,4 @@ if ! pnpm run build; then
 fi
 
 echo "Starting gunicorn..."
-exec gunicorn --bind 0.0.0.0:5000 --workers 4 wsgi:wsgi_app
+exec gunicorn --config gunicorn.conf.py wsgi:wsgi_app
@@ -0,0 +1,34 @@
+"""gunicorn settings, read from the working directory: `gunicorn wsgi:wsgi_app`."""
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+# Create the app once in the master and fork the workers from it, sharing its warmed state (see app.preload).
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is created and before any worker forks.
+    if server.cfg.preload_app:
+        from app.preload import warm
+
+        server.log.info("Preloaded %s", warm(server.app.wsgi()))
+
+
+def on_starting(server):
+    # Runs in the master before any worker starts: drop the metric files of the previous run's workers.
+    from app.config import Config
+
+    if Config.METRICS_DIR:
+        from app.metrics import MetricsDirectory
+
+        MetricsDirectory(Config.METRICS_DIR).clear()
+
+
+def worker_exit(server, worker):
+    # Runs in the worker: write the values it counted since its last periodic flush.
+    if getattr(worker, "wsgi", None) is not None:
+        from app import instrumentation
+
+        instrumentation.flush(worker.wsgi)
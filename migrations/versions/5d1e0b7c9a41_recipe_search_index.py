@@ -0,0 +1,67 @@
+"""Recipe search index
+
+Revision ID: 5d1e0b7c9a41
+Revises: c7ec534265ff
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5d1e0b7c9a41'
+down_revision = 'c7ec534265ff'
+branch_labels = None
+depends_on = None
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS recipe_search USING fts5("
+    "slug UNINDEXED, name, directions, sidebar, ingredients, tokenize = 'porter unicode61')",
+]
+
+POSTGRES_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """CREATE TABLE IF NOT EXISTS recipe_search (
+        slug VARCHAR(100) PRIMARY KEY,
+        name TEXT,
+        directions TEXT,
+        sidebar TEXT,
+        ingredients TEXT,
+        document TSVECTOR GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(ingredients, '')), 'B')
+            || setweight(to_tsvector('english', coalesce(sidebar, '')), 'C')
+            || setweight(to_tsvector('english', coalesce(directions, '')), 'D')
+        ) STORED
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_recipe_search_document ON recipe_search USING gin (document)",
+    "CREATE INDEX IF NOT EXISTS ix_recipe_search_name_trgm ON recipe_search USING gin (name gin_trgm_ops)",
+]
+
+BACKFILL = """
+INSERT INTO recipe_search (slug, name, directions, sidebar, ingredients)
+SELECT recipe.slug, recipe.name, recipe.directions, recipe.sidebar, names.names
+FROM recipe
+LEFT OUTER JOIN (
+    SELECT recipe_ingredient.recipe_slug AS recipe_slug, {aggregate} AS names
+    FROM recipe_ingredient
+    JOIN ingredient ON ingredient.slug = recipe_ingredient.ingredient_slug
+    GROUP BY recipe_ingredient.recipe_slug
+) AS names ON names.recipe_slug = recipe.slug
+"""
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        statements = POSTGRES_UPGRADE
+        aggregate = "string_agg(ingredient.name, ' ')"
+    else:
+        statements = SQLITE_UPGRADE
+        aggregate = "group_concat(ingredient.name, ' ')"
+
+    for statement in statements:
+        op.execute(statement)
+    op.execute(BACKFILL.format(aggregate=aggregate))
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS recipe_search")
@@ -0,0 +1,109 @@
+"""Store recipe ingredient display values
+
+Revision ID: e4a7c1f2b893
+Revises: 9b3f2c6d1e58
+Create Date: 2026-10-18 17:52:09.614203
+
+"""
+from fractions import Fraction
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c1f2b893'
+down_revision = '9b3f2c6d1e58'
+branch_labels = None
+depends_on = None
+
+# The app's formatting as of this revision, frozen here so later changes to
+# app code cannot change (or break) what this migration writes.
+
+
+def _pretty_text(amount, unit, name):
+    if amount is not None and amount % 1 != 0:
+        fraction = Fraction(amount)
+        if fraction.numerator // fraction.denominator >= 1:
+            whole, rest = divmod(fraction.numerator, fraction.denominator)
+            amount = f'{whole} {rest}/{fraction.denominator}'
+        else:
+            amount = str(fraction)
+    else:
+        amount = str(int(amount)) if amount else None
+    return ' '.join(part for part in (amount, unit, name) if part)
+
+
+def _weight_grams(ureg, amount, unit, density):
+    if density is None:
+        return None
+    weight = density * ureg.Quantity(amount, unit).to('ml').magnitude
+    output = int(weight) + round(weight - int(weight), 2)
+    return output if int(output) != output else int(output)
+
+
+def upgrade():
+    with op.batch_alter_table('recipe_ingredient', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('pretty', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('weight', sa.Float(), nullable=True))
+
+    # Backfill with the same formatting the app uses when writing rows.
+    from pint import UnitRegistry
+    from pint.errors import DimensionalityError, UndefinedUnitError
+
+    ureg = UnitRegistry()
+    conversion_errors = (UndefinedUnitError, DimensionalityError, AttributeError, TypeError, ValueError)
+
+    recipe_ingredient = sa.table(
+        'recipe_ingredient',
+        sa.column('ingredient_list'),
+        sa.column('recipe_slug'),
+        sa.column('ingredient_slug'),
+        sa.column('amount'),
+        sa.column('unit'),
+        sa.column('pretty'),
+        sa.column('weight'),
+    )
+    ingredient = sa.table('ingredient', sa.column('slug'), sa.column('name'), sa.column('density'))
+
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(
+            recipe_ingredient.c.ingredient_list,
+            recipe_ingredient.c.recipe_slug,
+            recipe_ingredient.c.ingredient_slug,
+            recipe_ingredient.c.amount,
+            recipe_ingredient.c.unit,
+            ingredient.c.name,
+            ingredient.c.density,
+        ).join(ingredient, ingredient.c.slug == recipe_ingredient.c.ingredient_slug)
+    ).all()
+
+    values = []
+    for row in rows:
+        try:
+            weight = _weight_grams(ureg, row.amount, row.unit, row.density)
+        except conversion_errors:
+            weight = None
+        values.append(
+            {
+                'b_list': row.ingredient_list,
+                'b_recipe': row.recipe_slug,
+                'b_ingredient': row.ingredient_slug,
+                'pretty': _pretty_text(row.amount, row.unit, row.name),
+                'weight': weight,
+            }
+        )
+    if values:
+        bind.execute(
+            recipe_ingredient.update()
+            .where(recipe_ingredient.c.ingredient_list == sa.bindparam('b_list'))
+            .where(recipe_ingredient.c.recipe_slug == sa.bindparam('b_recipe'))
+            .where(recipe_ingredient.c.ingredient_slug == sa.bindparam('b_ingredient')),
+            values,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('recipe_ingredient', schema=None) as batch_op:
+        batch_op.drop_column('weight')
+        batch_op.drop_column('pretty')
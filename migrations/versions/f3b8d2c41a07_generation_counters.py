@@ -0,0 +1,29 @@
+"""Shared generation counters
+
+Revision ID: f3b8d2c41a07
+Revises: e4a7c1f2b893
+Create Date: 2026-10-18 18:20:11.402317
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d2c41a07'
+down_revision = 'e4a7c1f2b893'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    generation = op.create_table(
+        'generation',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('value', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.bulk_insert(generation, [{'name': 'ingredients', 'value': 0}, {'name': 'recipes', 'value': 0}])
+
+
+def downgrade():
+    op.drop_table('generation')
@@ -23,11 +23,13 @@ from werkzeug.serving import BaseWSGIServer, make_server
 # Ensure repository root is on sys.path so `import app` works
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from app import app
+from app import create_app
 from app.extensions import db
 from app.recipes.models import Ingredient
 from app.recipes.schemas import CreateRecipe, IngredientSchema
 
+app = create_app()
+
 
 class ScreenshotPage(BaseModel):
     path: str
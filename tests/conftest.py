@@ -3,10 +3,12 @@
 import sys
 import tempfile
 import uuid
+from contextlib import contextmanager
 from importlib import import_module
 from pathlib import Path
 
 import pytest
+from sqlalchemy import event
 
 # Ensure repository root is on sys.path so `import app` works in tests
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -59,11 +61,42 @@ def app():
 @pytest.fixture(scope="function")
 def db(app):
     """Create a fresh database for each test."""
+    from app.extensions import page_cache
+    from app.ingredients.index import ingredient_index
+
     with app.app_context():
         _db.create_all()
+        ingredient_index.clear()
+        page_cache.clear()
         yield _db
         _db.session.remove()
         _db.drop_all()
+        ingredient_index.clear()
+        page_cache.clear()
+
+
+@pytest.fixture
+def count_queries(db):
+    """Returns a context manager collecting the SQL statements executed inside it.
+
+    Transaction control (the `BEGIN` issued for SQLite) is not counted.
+    """
+
+    @contextmanager
+    def _count_queries():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if not statement.startswith("BEGIN"):
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+    return _count_queries
 
 
 @pytest.fixture
@@ -0,0 +1,106 @@
+"""Tests for the benchmark seeder and harness."""
+
+import json
+
+from sqlalchemy import func, select
+
+from app.recipes.models import Ingredient, Recipe
+from benchmarks import compare, importtime
+from benchmarks.harness import Result, Run, measure
+from benchmarks.load import drive, workload
+from benchmarks.seed import seed
+
+
+def count(db, model):
+    return db.session.execute(select(func.count()).select_from(model)).scalar_one()
+
+
+class TestSeed:
+    def test_seeds_reproducible_catalogue(self, db):
+        added = seed(db.session, recipes=30, ingredients=50, tags=5, chunk_size=10)
+
+        assert added == 30
+        assert count(db, Recipe) == 30
+        assert count(db, Ingredient) == 50
+        recipe = db.session.get(Recipe, "recipe_0000000")
+        assert 4 <= len(recipe.recipe_ingredients) <= 16
+        assert all(row.ingredient.density is not None for row in recipe.recipe_ingredients)
+
+    def test_resumes_up_to_the_requested_size(self, db):
+        seed(db.session, recipes=10, ingredients=50)
+
+        assert seed(db.session, recipes=15, ingredients=50) == 5
+        assert seed(db.session, recipes=15, ingredients=50) == 0
+        assert count(db, Recipe) == 15
+
+
+class TestHarness:
+    def test_measure_and_summary(self):
+        result = measure("noop", lambda: None, repeat=3, min_time=0.001)
+
+        assert len(result.samples) == 3 and result.number >= 1
+        summary = json.loads(Run(meta={"commit": "abc"}, results=[result]).to_json())["results"][0]["summary"]
+        assert summary["median"] == result.median
+
+    def test_percentiles(self):
+        result = Result(name="x", samples=[float(i) for i in range(1, 101)])
+
+        assert (result.percentile(50), result.percentile(99)) == (51.0, 100.0)
+
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   app.config\n"
+            "import time:      3000 |       3120 | app\n"
+        )
+
+        assert importtime.parse(output) == {"app.config": (120, 120), "app": (3000, 3120)}
+
+    def test_load_driver(self, app, db):
+        seed(db.session, recipes=5, ingredients=50)
+        slugs = list(db.session.scalars(select(Recipe.slug)))
+
+        result = drive(app, workload(slugs), duration=0.2, concurrency=2)
+
+        assert result.number == len(result.samples) > 0
+        assert result.extra["errors"] == 0
+        assert result.extra["throughput"] > 0
+
+
+def run(commit, **samples):
+    return Run(meta={"commit": commit}, results=[Result(name=name, samples=values) for name, values in samples.items()])
+
+
+class TestCompare:
+    def test_mann_whitney_u(self):
+        # Completely separated samples of 7: the smallest exact two-sided p-value, 2 / C(14, 7).
+        assert compare.mann_whitney_u(list(range(7)), list(range(7, 14))) == 2 / 3432
+        assert compare.mann_whitney_u([1, 3, 5, 7], [2, 4, 6, 8]) > 0.5
+        assert compare.mann_whitney_u([1.0] * 50, [1.0] * 50) == 1.0
+
+    def test_flags_significant_slowdowns_beyond_threshold(self):
+        fast = [1.0 + i / 100 for i in range(7)]
+        baseline = run("a", book=fast, datalist_options=fast, other=fast)
+        current = run(
+            "b",
+            book=[x * 1.5 for x in fast],
+            datalist_options=[x * 1.01 for x in fast],
+            other=[x * 1.5 for x in fast],
+        )
+
+        verdicts = {
+            c.name: c.verdict for c in compare.compare(baseline, current, {"book": 0.1, "datalist_options": 0.1})
+        }
+
+        assert verdicts == {"book": "REGRESSION", "datalist_options": "no change", "other": "slower"}
+        assert "REGRESSION" in compare.format_comparisons(compare.compare(baseline, current))
+
+    def test_main_compares_with_stored_baseline(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setattr(compare, "RESULTS_DIR", tmp_path)
+        samples = [1.0 + i / 100 for i in range(7)]
+        compare.save(run("base", book=samples), tmp_path)
+        current = compare.save(run("head", book=[x * 2 for x in samples]), tmp_path)
+
+        assert compare.main([str(current), "--baseline", "base"]) == 1
+        assert compare.main([str(current), "--baseline", "base", "--threshold", "book=150%"]) == 0
+        assert "base -> current head" in capsys.readouterr().out
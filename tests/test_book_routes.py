@@ -1,6 +1,10 @@
 """Tests for book view routes."""
 
-from app.recipes.models import Ingredient, RecipeIngredient
+import pytest
+from sqlalchemy import update
+
+from app.extensions import page_cache
+from app.recipes.models import Ingredient, Recipe, RecipeIngredient, utcnow
 
 
 class TestBookRoutes:
@@ -41,3 +45,98 @@ class TestBookRoutes:
     def test_book_view_missing_recipe_returns_404(self, client):
         response = client.get("/book/does-not-exist/")
         assert response.status_code == 404
+
+
+class TestBookPageCache:
+    @pytest.fixture
+    def recipe(self, db, sample_recipe):
+        recipe = sample_recipe(db, name="Cached Bread")
+        flour = Ingredient(slug="flour-cache", name="Flour", density=0.5)
+        db.session.add(
+            RecipeIngredient(ingredient_list="Dry", amount=100.0, unit="ml", recipe=recipe, ingredient=flour)
+        )
+        db.session.commit()
+        return recipe
+
+    def test_book_view_is_served_from_cache(self, client, db, recipe, monkeypatch):
+        first = client.get(f"/book/{recipe.slug}/")
+        assert first.status_code == 200
+
+        def fail(*args, **kwargs):
+            raise AssertionError("page should come from the cache")
+
+        monkeypatch.setattr("app.book.routes.render_template", fail)
+        second = client.get(f"/book/{recipe.slug}/")
+        assert second.data == first.data
+
+    def test_missing_recipe_is_not_cached(self, client, db):
+        client.get("/book/does-not-exist/")
+        assert page_cache.get("book:does-not-exist") is None
+
+    def test_change_committed_by_another_worker_is_not_served_stale(self, client, db, recipe):
+        client.get(f"/book/{recipe.slug}/")
+
+        # A bulk UPDATE fires no session hooks here, like a commit made in another process.
+        db.session.execute(
+            update(Recipe)
+            .where(Recipe.slug == recipe.slug)
+            .values(name="Elsewhere Bread", version=Recipe.version + 1, updated_at=utcnow())
+        )
+        db.session.commit()
+
+        assert b"Elsewhere Bread" in client.get(f"/book/{recipe.slug}/").data
+
+    def test_recipe_change_invalidates_page(self, client, db, recipe):
+        client.get(f"/book/{recipe.slug}/")
+
+        recipe.name = "Renamed Bread"
+        db.session.commit()
+
+        assert b"Renamed Bread" in client.get(f"/book/{recipe.slug}/").data
+
+    def test_recipe_ingredient_change_invalidates_page(self, client, db, recipe):
+        client.get(f"/book/{recipe.slug}/")
+
+        recipe.recipe_ingredients[0].ingredient_list = "Wet"
+        db.session.commit()
+
+        assert b"Wet" in client.get(f"/book/{recipe.slug}/").data
+
+    def test_ingredient_density_change_invalidates_page(self, client, db, recipe):
+        assert b'ingredient-weight">50' in client.get(f"/book/{recipe.slug}/").data
+
+        db.session.get(Ingredient, "flour-cache").density = 0.7
+        db.session.commit()
+
+        assert b'ingredient-weight">70' in client.get(f"/book/{recipe.slug}/").data
+
+    def test_deleted_recipe_is_evicted(self, client, db, recipe):
+        client.get(f"/book/{recipe.slug}/")
+
+        db.session.delete(recipe)
+        db.session.commit()
+
+        assert client.get(f"/book/{recipe.slug}/").status_code == 404
+
+
+class TestBookQueryCount:
+    def test_rendering_costs_a_fixed_number_of_queries(self, client, db, sample_recipe, count_queries):
+        recipe = sample_recipe(db, name="Big Stew")
+        for i in range(40):
+            ingredient = Ingredient(slug=f"stew-{i}", name=f"Stew Ingredient {i}", density=1.0)
+            db.session.add(
+                RecipeIngredient(
+                    ingredient_list=f"List {i % 3}", amount=i + 1.5, unit="ml", recipe=recipe, ingredient=ingredient
+                )
+            )
+        db.session.commit()
+        slug = recipe.slug
+        db.session.expunge_all()
+
+        with count_queries() as statements:
+            response = client.get(f"/book/{slug}/")
+
+        assert response.status_code == 200
+        assert b"Stew Ingredient 39" in response.data
+        # Version stamp, recipe, ingredient rows joined to their ingredients.
+        assert len(statements) == 3, statements
@@ -0,0 +1,107 @@
+"""Tests for the rendered-page cache."""
+
+import pytest
+
+from app.cache import MemoryBackend, NullBackend, PageCache, SQLiteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_entries=3)
+    return SQLiteBackend(tmp_path / "cache.sqlite3", max_entries=3)
+
+
+class TestCacheBackends:
+    def test_get_requires_matching_version(self, backend):
+        backend.set("book:soup", "1", "<html>v1</html>")
+
+        assert backend.get("book:soup", "1") == "<html>v1</html>"
+        assert backend.get("book:soup", "2") is None
+        assert backend.get("book:cake", "1") is None
+
+    def test_set_replaces_previous_version(self, backend):
+        backend.set("book:soup", "1", "old")
+        backend.set("book:soup", "2", "new")
+
+        assert backend.get("book:soup", "1") is None
+        assert backend.get("book:soup", "2") == "new"
+
+    def test_delete_and_clear(self, backend):
+        backend.set("a", "1", "A")
+        backend.set("b", "1", "B")
+
+        backend.delete("a")
+        assert backend.get("a", "1") is None
+        assert backend.get("b", "1") == "B"
+
+        backend.clear()
+        assert backend.get("b", "1") is None
+
+    def test_memory_backend_evicts_least_recently_used(self):
+        backend = MemoryBackend(max_entries=2)
+        backend.set("a", "1", "A")
+        backend.set("b", "1", "B")
+        backend.get("a", "1")
+        backend.set("c", "1", "C")
+
+        assert backend.get("a", "1") == "A"
+        assert backend.get("b", "1") is None
+
+    def test_sqlite_backend_is_shared_between_instances(self, tmp_path):
+        writer = SQLiteBackend(tmp_path / "cache.sqlite3")
+        reader = SQLiteBackend(tmp_path / "cache.sqlite3")
+
+        writer.set("book:soup", "1", "shared")
+        assert reader.get("book:soup", "1") == "shared"
+
+        reader.delete("book:soup")
+        assert writer.get("book:soup", "1") is None
+
+    def test_sqlite_backend_reconnects_after_fork(self, tmp_path, monkeypatch):
+        backend = SQLiteBackend(tmp_path / "cache.sqlite3")
+        parent = backend._connection()
+
+        monkeypatch.setattr("app.cache.os.getpid", lambda: -1)
+
+        assert backend._connection() is not parent
+        backend.set("book:soup", "1", "child")
+        assert backend.get("book:soup", "1") == "child"
+
+    def test_sqlite_backend_prunes_oldest_entries(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(SQLiteBackend, "PRUNE_EVERY", 1)
+        backend = SQLiteBackend(tmp_path / "cache.sqlite3", max_entries=2)
+        for key in "abc":
+            backend.set(key, "1", key)
+
+        assert backend.get("a", "1") is None
+        assert backend.get("c", "1") == "c"
+
+
+class TestPageCache:
+    def test_init_app_selects_backend_from_config(self, app, tmp_path):
+        cache = PageCache()
+
+        app.config.update(PAGE_CACHE_BACKEND="sqlite", PAGE_CACHE_PATH=str(tmp_path / "pages.sqlite3"))
+        try:
+            cache.init_app(app)
+            assert isinstance(cache.backend, SQLiteBackend)
+            assert (tmp_path / "pages.sqlite3").exists()
+
+            app.config["PAGE_CACHE_BACKEND"] = "null"
+            cache.init_app(app)
+            assert isinstance(cache.backend, NullBackend)
+
+            app.config["PAGE_CACHE_BACKEND"] = "redis"
+            with pytest.raises(ValueError, match="unknown PAGE_CACHE_BACKEND"):
+                cache.init_app(app)
+        finally:
+            app.config.update(PAGE_CACHE_BACKEND="memory", PAGE_CACHE_PATH=None)
+
+    def test_version_salt_invalidates_entries(self):
+        cache = PageCache(MemoryBackend())
+        cache.set("book:soup", "html")
+        assert cache.get("book:soup") == "html"
+
+        cache.version = "2"
+        assert cache.get("book:soup") is None
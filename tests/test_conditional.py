@@ -0,0 +1,155 @@
+"""Tests for ETag / Last-Modified conditional responses."""
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+from werkzeug.http import http_date
+
+from app.recipes.models import Ingredient, Recipe, RecipeIngredient, utcnow
+
+
+@pytest.fixture
+def recipe(db, sample_recipe):
+    recipe = sample_recipe(db, name="Conditional Bread")
+    flour = Ingredient(slug="flour-etag", name="Flour", density=0.5)
+    db.session.add(RecipeIngredient(ingredient_list="Dry", amount=1.0, unit="cup", recipe=recipe, ingredient=flour))
+    db.session.commit()
+    return recipe
+
+
+class TestRecipeVersion:
+    def test_version_increases_on_recipe_and_ingredient_changes(self, db, recipe):
+        start = recipe.version
+
+        recipe.name = "Renamed"
+        db.session.commit()
+        assert recipe.version == start + 1
+
+        db.session.get(Ingredient, "flour-etag").density = 0.6
+        db.session.commit()
+        assert recipe.version == start + 2
+
+        recipe.recipe_ingredients[0].amount = 2.0
+        db.session.commit()
+        assert recipe.version == start + 3
+
+    def test_updated_at_moves_forward(self, db, recipe):
+        before = recipe.updated_at
+        recipe.sidebar = "Tip"
+        db.session.commit()
+        assert recipe.updated_at > before
+
+
+class TestBookConditional:
+    def test_book_sets_validators(self, client, db, recipe):
+        response = client.get(f"/book/{recipe.slug}/")
+
+        assert response.status_code == 200
+        assert response.headers["ETag"].startswith('"')
+        assert not response.headers["ETag"].startswith("W/")
+        assert "Last-Modified" in response.headers
+        assert "no-cache" in response.headers["Cache-Control"]
+
+    def test_book_if_none_match_returns_304_without_rendering(self, client, db, recipe, monkeypatch):
+        etag = client.get(f"/book/{recipe.slug}/").headers["ETag"]
+
+        def fail(*args, **kwargs):
+            raise AssertionError("template should not be rendered")
+
+        monkeypatch.setattr("app.book.routes.render_template", fail)
+        monkeypatch.setattr("app.book.routes.page_cache.get", fail)
+        response = client.get(f"/book/{recipe.slug}/", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.data == b""
+        assert response.headers["ETag"] == etag
+
+    def test_book_etag_changes_when_recipe_is_recreated(self, client, db, sample_recipe):
+        recipe = sample_recipe(db)
+        slug = recipe.slug
+        etag = client.get(f"/book/{slug}/").headers["ETag"]
+        db.session.delete(recipe)
+        db.session.commit()
+        db.session.add(Recipe(slug=slug, name="Recreated", directions="x"))
+        db.session.commit()
+
+        response = client.get(f"/book/{slug}/", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert b"Recreated" in response.data
+
+    def test_book_if_modified_since(self, client, db, recipe):
+        last_modified = client.get(f"/book/{recipe.slug}/").last_modified
+
+        same = {"If-Modified-Since": http_date(last_modified)}
+        assert client.get(f"/book/{recipe.slug}/", headers=same).status_code == 304
+        earlier = {"If-Modified-Since": http_date(last_modified - timedelta(days=1))}
+        assert client.get(f"/book/{recipe.slug}/", headers=earlier).status_code == 200
+
+    def test_book_etag_changes_with_content(self, client, db, recipe):
+        etag = client.get(f"/book/{recipe.slug}/").headers["ETag"]
+
+        db.session.get(Ingredient, "flour-etag").density = 0.9
+        db.session.commit()
+
+        response = client.get(f"/book/{recipe.slug}/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_missing_book_returns_404(self, client, db):
+        assert client.get("/book/missing/", headers={"If-None-Match": '"x"'}).status_code == 404
+
+
+class TestListingConditional:
+    def test_listing_if_none_match_returns_304(self, client, db, recipe):
+        etag = client.get("/recipes/").headers["ETag"]
+
+        assert client.get("/recipes/", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_listing_etag_depends_on_page_args(self, client, db, recipe):
+        assert client.get("/recipes/").headers["ETag"] != client.get("/recipes/?per_page=5").headers["ETag"]
+
+    @pytest.mark.parametrize("path", ["/recipes/", "/recipes/?after="])
+    def test_listing_etag_changes_on_insert_update_and_delete(self, client, db, recipe, path):
+        seen = {client.get(path).headers["ETag"]}
+
+        db.session.add(Recipe(slug="another", name="Another", directions="x"))
+        db.session.commit()
+        seen.add(client.get(path).headers["ETag"])
+
+        recipe.name = "Renamed"
+        db.session.commit()
+        seen.add(client.get(path).headers["ETag"])
+
+        db.session.delete(db.session.get(Recipe, "another"))
+        db.session.commit()
+        seen.add(client.get(path).headers["ETag"])
+
+        assert len(seen) == 4
+
+    def test_offset_listing_revalidation_reads_one_counter_row(self, client, db, recipe, count_queries):
+        etag = client.get("/recipes/").headers["ETag"]
+
+        with count_queries() as statements:
+            response = client.get("/recipes/", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert len(statements) == 1 and "generation" in statements[0], statements
+
+    def test_keyset_listing_revalidates_after_a_delete(self, client, db):
+        for slug in ("ks-a", "ks-b", "ks-c", "ks-d"):
+            db.session.add(Recipe(slug=slug, name=slug, directions="x"))
+        db.session.commit()
+        # Identical stamps, so the page's window aggregates cannot tell its rows apart.
+        db.session.execute(update(Recipe).values(version=1, updated_at=utcnow()))
+        db.session.commit()
+        path = "/recipes/?after=ks-&per_page=2"
+        etag = client.get(path).headers["ETag"]
+
+        db.session.delete(db.session.get(Recipe, "ks-a"))
+        db.session.commit()
+        response = client.get(path, headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert b"ks-a" not in response.data
@@ -0,0 +1,99 @@
+"""Tests for the cached unit conversion engine."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from pint.errors import DimensionalityError, UndefinedUnitError
+
+from app.conversions import ConversionEngine, ureg
+from app.conversions.engine import build_registry
+from app.recipes.models import Ingredient, RecipeIngredient
+
+UNITS = ["ml", "l", "cup", "cups", "tbsp", "tsp", "fluid_ounce", "gallon", "pint", "quart", "cc"]
+AMOUNTS = [0.125, 1, 1.5, 2.25, 3, 100.0, 1 / 3, 12345.678]
+
+
+@pytest.fixture
+def engine():
+    return ConversionEngine()
+
+
+class TestConversionEngine:
+    @pytest.mark.parametrize("unit", UNITS)
+    def test_matches_pint_exactly(self, engine, unit):
+        for target in ("ml", "cup", "l"):
+            for amount in AMOUNTS:
+                assert engine.convert(amount, unit, target) == ureg.Quantity(amount, unit).to(target).magnitude
+
+    def test_offset_units_go_through_pint(self, engine):
+        assert engine.factor("degC", "degF") is None
+        assert engine.convert(100, "degC", "degF") == ureg.Quantity(100, "degC").to("degF").magnitude
+
+    def test_factor_is_resolved_once(self, engine, monkeypatch):
+        expected = ureg.Quantity(2, "cup").to("ml").magnitude
+        engine.convert(1, "cup", "ml")
+        monkeypatch.setattr(engine.registry, "Quantity", None)
+
+        assert engine.convert(2, "cup", "ml") == expected
+
+    def test_errors_match_pint(self, engine):
+        with pytest.raises(DimensionalityError):
+            engine.convert(1, "g", "ml")
+        with pytest.raises(UndefinedUnitError):
+            engine.convert(1, "handful", "ml")
+
+    def test_convert_many(self, engine):
+        amounts, units = [1, 2, 3], ["cup", "tbsp", "cup"]
+
+        assert engine.convert_many(amounts, units, "ml") == [
+            ureg.Quantity(a, u).to("ml").magnitude for a, u in zip(amounts, units)
+        ]
+
+    def test_convert_many_lenient(self, engine):
+        result = engine.convert_many([1, 2, None, 4], ["cup", "g", "cup", "handful"], "ml", strict=False)
+
+        assert result == [ureg.Quantity(1, "cup").to("ml").magnitude, None, None, None]
+        with pytest.raises(DimensionalityError):
+            engine.convert_many([1, 2], ["cup", "g"], "ml")
+
+    def test_warm_fills_the_factor_table(self, engine):
+        engine.warm(["cup", "g", "handful"], ["ml", "l"])
+
+        assert set(engine._factors) == {("cup", "ml"), ("cup", "l")}
+
+
+def test_prime_weights_matches_weight(db, sample_recipe):
+    recipe = sample_recipe(db)
+    flour = Ingredient(slug="flour-weights", name="Flour", density=0.53)
+    salt = Ingredient(slug="salt-weights", name="Salt", density=None)
+    rows = [
+        RecipeIngredient(ingredient_list="a", amount=2.5, unit="cup", recipe=recipe, ingredient=flour),
+        RecipeIngredient(ingredient_list="b", amount=1, unit="tbsp", recipe=recipe, ingredient=flour),
+        RecipeIngredient(ingredient_list="a", amount=1, unit="tsp", recipe=recipe, ingredient=salt),
+    ]
+    expected = [row.weight for row in rows]
+    for row in rows:
+        row._weight = None
+
+    RecipeIngredient.prime_weights(rows)
+
+    assert [row._weight for row in rows[:2]] == expected[:2]
+    assert [row.weight for row in rows] == expected
+
+
+def test_creating_the_app_leaves_pint_unloaded():
+    code = "import sys, app; app.create_app(); print('pint' in sys.modules)"
+    root = Path(__file__).resolve().parents[1]
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "False"
+
+
+def test_registry_cache_round_trip(tmp_path):
+    parsed = build_registry(str(tmp_path))
+    cached = build_registry(str(tmp_path))
+
+    assert any(tmp_path.iterdir())
+    assert cached.Quantity(2, "cup").to("ml").magnitude == parsed.Quantity(2, "cup").to("ml").magnitude
@@ -0,0 +1,221 @@
+"""Tests for engine and pool configuration."""
+
+import threading
+import time
+
+import pytest
+from flask import Flask, request
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine, event, text
+
+from app.database import (
+    RoutingSession,
+    TimedQueuePool,
+    configure_engine,
+    engine_options,
+    init_app,
+    is_write,
+    writing,
+)
+from app.metrics import db_pool_checkout_seconds
+
+PG_URL = "postgresql+psycopg2://cookbook@db/cookbook"
+
+
+class TestEngineOptions:
+    def test_sqlite_keeps_defaults(self):
+        assert engine_options("sqlite:///app.db") == {}
+
+    def test_postgres_pool_settings(self):
+        options = engine_options(PG_URL, pool_size=3, max_overflow=2, pool_recycle=600, statement_timeout=5000)
+
+        engine = create_engine(PG_URL, **options)
+
+        assert isinstance(engine.pool, TimedQueuePool)
+        assert engine.pool.size() == 3
+        assert engine.pool._max_overflow == 2
+        assert engine.pool._recycle == 600
+        assert engine.pool._pre_ping
+        assert options["connect_args"] == {"application_name": "cookbook", "options": "-c statement_timeout=5000"}
+
+    def test_pgbouncer_mode_sends_no_startup_options(self):
+        options = engine_options(PG_URL, statement_timeout=5000, pgbouncer=True)
+
+        assert options["connect_args"] == {"application_name": "cookbook"}
+
+    def test_pool_checkout_wait_is_recorded(self, tmp_path):
+        db_pool_checkout_seconds.clear()
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, pool_size=1)
+
+        for _ in range(3):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        counts = [value for suffix, _, value in db_pool_checkout_seconds.samples() if suffix == "_count"]
+        assert counts == [3]
+
+
+class TestSQLite:
+    def engine(self, path, **config):
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        configure_engine(engine, config)
+        return engine
+
+    def test_pragmas_are_set_on_every_connection(self, tmp_path):
+        engine = self.engine(tmp_path / "app.db", SQLITE_BUSY_TIMEOUT=1234)
+
+        with engine.connect() as conn:
+            pragmas = {
+                name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in ("journal_mode", "busy_timeout")
+            }
+            synchronous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+
+        assert pragmas == {"journal_mode": "wal", "busy_timeout": 1234}
+        assert synchronous == 1  # NORMAL
+
+    def test_writes_begin_immediate(self, tmp_path):
+        engine = self.engine(tmp_path / "app.db")
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        with engine.begin() as conn:
+            conn.execute(text("SELECT 1"))
+        with writing(), engine.begin() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert [s for s in statements if s.startswith("BEGIN")] == ["BEGIN", "BEGIN IMMEDIATE"]
+
+    def test_concurrent_writer_waits_instead_of_failing(self, tmp_path):
+        engine = self.engine(tmp_path / "app.db")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (n INTEGER)"))
+        other_committed = threading.Event()
+
+        def other_writer():
+            with writing(), engine.begin() as conn:
+                conn.execute(text("INSERT INTO t VALUES (1)"))
+            other_committed.set()
+
+        with writing(), engine.begin() as conn:
+            # Read first, then let another writer queue up before this transaction writes.
+            conn.execute(text("SELECT count(*) FROM t")).scalar()
+            thread = threading.Thread(target=other_writer)
+            thread.start()
+            assert not other_committed.wait(0.2)
+            conn.execute(text("INSERT INTO t VALUES (2)"))
+        thread.join(5)
+
+        assert other_committed.is_set()
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT n FROM t ORDER BY rowid")).scalars().all() == [2, 1]
+
+    def test_unsafe_request_methods_are_writes(self, app):
+        with app.test_request_context("/", method="POST"):
+            assert is_write()
+        with app.test_request_context("/"):
+            assert not is_write()
+
+
+class TestReplicaRouting:
+    @pytest.fixture
+    def routed(self, tmp_path):
+        """A small app with a primary and one replica, each holding a row naming itself."""
+        app = Flask(__name__)
+        app.config.update(
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+            SQLALCHEMY_BINDS={"replica_0": f"sqlite:///{tmp_path / 'replica.db'}"},
+            DATABASE_READ_YOUR_WRITES=5,
+        )
+        db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+        class Node(db.Model):
+            name = db.Column(db.String, primary_key=True)
+
+        db.init_app(app)
+        init_app(app, db)
+        with app.app_context():
+            for key, name in ((None, "primary"), ("replica_0", "replica")):
+                with db.engines[key].begin() as conn:
+                    db.metadata.create_all(conn)
+                    conn.execute(Node.__table__.insert(), {"name": name})
+        app.extensions["replica_router"].refresh()
+
+        @app.route("/", methods=["GET", "POST"])
+        def index():
+            if request.method == "POST":
+                db.session.add(Node(name=request.form["name"]))
+                db.session.commit()
+            return ",".join(db.session.scalars(db.select(Node.name).order_by(Node.name)))
+
+        return app, db
+
+    def test_get_reads_from_replica_and_post_from_primary(self, routed):
+        app, _ = routed
+        client = app.test_client()
+
+        assert client.get("/").text == "replica"
+        assert client.post("/", data={"name": "new"}).text == "new,primary"
+
+    def test_client_reads_its_writes_for_a_while(self, routed, monkeypatch):
+        app, _ = routed
+        writer, other = app.test_client(), app.test_client()
+
+        writer.post("/", data={"name": "new"})
+
+        assert writer.get("/").text == "new,primary"
+        assert other.get("/").text == "replica"
+        later = time.time() + 10
+        monkeypatch.setattr(time, "time", lambda: later)
+        assert writer.get("/").text == "replica"
+
+    def test_unhealthy_replica_falls_back_to_primary(self, routed, monkeypatch):
+        app, _ = routed
+        router = app.extensions["replica_router"]
+        monkeypatch.setattr(router, "check", lambda engine: False)
+        router.refresh()
+
+        assert app.test_client().get("/").text == "primary"
+
+    def test_replicas_are_primary_until_first_probe(self, routed):
+        app, _ = routed
+        router = app.extensions["replica_router"]
+        router.replicas[0].healthy = False
+
+        assert app.test_client().get("/").text == "primary"
+
+    def test_probes_run_outside_the_request(self, routed, monkeypatch):
+        app, _ = routed
+        router = app.extensions["replica_router"]
+        probing, release = threading.Event(), threading.Event()
+
+        def slow_check(engine):
+            probing.set()
+            release.wait(5)
+            return False
+
+        monkeypatch.setattr(router, "check", slow_check)
+        router.replicas[0].checked_until = 0
+        try:
+            # The due probe starts in the background; the request keeps the last result.
+            assert app.test_client().get("/").text == "replica"
+            assert probing.wait(5)
+        finally:
+            release.set()
+
+    def test_replica_is_chosen_once_per_request(self, routed, monkeypatch):
+        app, db = routed
+        router = app.extensions["replica_router"]
+        calls = []
+        choose = router.engine
+        monkeypatch.setattr(router, "engine", lambda: calls.append(1) or choose())
+
+        with app.test_request_context("/"):
+            db.session.execute(text("SELECT 1"))
+            db.session.execute(text("SELECT 2"))
+
+        assert len(calls) == 1
+
+    def test_outside_requests_use_primary(self, routed):
+        app, db = routed
+        with app.app_context():
+            assert db.session.get_bind() is db.engines[None]
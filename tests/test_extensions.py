@@ -29,3 +29,19 @@ def test_init_app_initializes_extensions(monkeypatch, tmp_path):
     assert app.extensions["storage"] is extensions.storage
     assert calls[0] == ("db", app)
     assert calls[1] == ("migrate", app, extensions.db)
+
+
+def test_init_storage_selects_s3_backend(monkeypatch):
+    from app.s3_storage import S3Storage
+
+    monkeypatch.setattr(extensions, "storage", extensions.storage)
+
+    class DummyApp:
+        config = {"STORAGE_BACKEND": "s3", "STORAGE_S3_BUCKET": "images"}
+
+    app = DummyApp()
+    storage = extensions.init_storage(app)
+
+    assert isinstance(storage, S3Storage)
+    assert extensions.storage is storage
+    assert app.extensions["storage"] is storage
@@ -0,0 +1,158 @@
+"""Tests for resized/re-encoded image variants."""
+
+import io
+import json
+
+import pytest
+from werkzeug.datastructures import MIMEAccept
+
+import app.extensions as extensions
+from app.images.derivatives import MANIFEST, DerivativePipeline, pipeline
+from app.storage import Storage
+
+
+def accept(*mimetypes):
+    return MIMEAccept([(m, 1) for m in mimetypes])
+
+
+def store_variants(storage, key, *variants):
+    """Store variants of `key` and their manifest, as `DerivativePipeline.generate` does."""
+    for variant in variants:
+        storage.update(variant, variant.encode())
+    storage.update(Storage.variant_key(key, MANIFEST), json.dumps(variants).encode())
+
+
+@pytest.fixture
+def derivatives(tmp_path):
+    images = DerivativePipeline(storage=Storage(dir=tmp_path), widths=(320, 640))
+    images.formats = ("webp", "jpeg")
+    return images
+
+
+class TestChoose:
+    def test_no_width_serves_original(self, derivatives):
+        assert derivatives.choose("key", None, accept("image/webp")) is None
+
+    def test_picks_smallest_variant_covering_width(self, derivatives):
+        store_variants(derivatives.storage, "key", "key.320.jpeg", "key.640.jpeg")
+
+        assert derivatives.choose("key", 400, accept("image/jpeg")) == ("key.640.jpeg", "image/jpeg")
+        assert derivatives.choose("key", 100, accept("image/jpeg")) == ("key.320.jpeg", "image/jpeg")
+
+    def test_prefers_formats_the_client_names(self, derivatives):
+        store_variants(derivatives.storage, "key", "key.320.webp", "key.320.jpeg")
+
+        assert derivatives.choose("key", 320, accept("image/webp", "*/*")) == ("key.320.webp", "image/webp")
+        # A wildcard alone does not imply support for modern formats.
+        assert derivatives.choose("key", 320, accept("*/*")) == ("key.320.jpeg", "image/jpeg")
+
+    def test_missing_variants_fall_back_to_original(self, derivatives):
+        assert derivatives.choose("key", 320, accept("image/webp")) is None
+
+    def test_variants_outside_the_manifest_are_not_served(self, derivatives):
+        # Written, but generation has not finished.
+        derivatives.storage.update("key.320.jpeg", b"jpeg")
+
+        assert derivatives.choose("key", 320, accept("image/jpeg")) is None
+
+    def test_manifest_is_read_once(self, derivatives, monkeypatch):
+        store_variants(derivatives.storage, "key", "key.320.jpeg")
+        derivatives.choose("key", 320, accept("image/jpeg"))
+
+        monkeypatch.setattr(derivatives.storage, "open", None)
+        monkeypatch.setattr(derivatives.storage, "exists", None)
+        assert derivatives.choose("key", 320, accept("image/jpeg")) == ("key.320.jpeg", "image/jpeg")
+
+    def test_srcset_lists_configured_widths(self, derivatives):
+        assert derivatives.srcset("/images/key") == "/images/key?w=320 320w, /images/key?w=640 640w"
+
+    def test_disabled_without_formats(self, derivatives):
+        derivatives.formats = ()
+        assert derivatives.srcset("/images/key") == ""
+        assert derivatives.submit("key") is None
+
+
+class TestImageRouteNegotiation:
+    def test_serves_variant_for_width_and_accept(self, client, monkeypatch):
+        monkeypatch.setattr(pipeline, "formats", ("webp", "jpeg"))
+        monkeypatch.setattr(pipeline, "submit", lambda key: None)
+        key = client.post(
+            "/images/",
+            data={"file": (io.BytesIO(b"\xff\xd8\xff original"), "a.jpg")},
+            content_type="multipart/form-data",
+        ).get_data(as_text=True)
+        store_variants(extensions.storage, key, Storage.variant_key(key, 320, "webp"))
+
+        response = client.get(f"/images/{key}?w=300", headers={"Accept": "image/webp,*/*"})
+        assert response.data == Storage.variant_key(key, 320, "webp").encode()
+        assert response.mimetype == "image/webp"
+        assert "Accept" in response.vary
+
+        response = client.get(f"/images/{key}", headers={"Accept": "image/webp,*/*"})
+        assert response.data == b"\xff\xd8\xff original"
+
+    def test_original_mimetype_is_sniffed(self, client):
+        png = b"\x89PNG\r\n\x1a\n rest"
+        key = client.post(
+            "/images/", data={"file": (io.BytesIO(png), "a.png")}, content_type="multipart/form-data"
+        ).get_data(as_text=True)
+
+        assert client.get(f"/images/{key}").mimetype == "image/png"
+
+
+class TestGenerate:
+    def test_generates_each_width_below_the_original(self, derivatives):
+        Image = pytest.importorskip("PIL.Image")
+        buffer = io.BytesIO()
+        Image.new("RGB", (500, 250), "red").save(buffer, format="PNG")
+        key = derivatives.storage.create(buffer.getvalue())
+        derivatives.formats = ("jpeg",)
+
+        assert derivatives.generate(key) == [Storage.variant_key(key, 320, "jpeg")]
+        with Image.open(derivatives.storage.read(Storage.variant_key(key, 320, "jpeg"))) as variant:
+            assert variant.size == (320, 160)
+        assert derivatives.variants(key) == {Storage.variant_key(key, 320, "jpeg")}
+        # Already generated variants are not rewritten.
+        assert derivatives.generate(key) == []
+
+
+def test_book_view_emits_srcset(client, db, sample_recipe, monkeypatch):
+    monkeypatch.setattr(pipeline, "formats", ("jpeg",))
+    recipe = sample_recipe(db)
+    recipe.images = '["abc"]'
+    db.session.commit()
+
+    response = client.get(f"/book/{recipe.slug}/")
+
+    assert b'srcset="/images/abc?w=320 320w' in response.data
+
+
+def test_pending_variant_is_not_cached_long(client, monkeypatch):
+    monkeypatch.setattr(pipeline, "formats", ("jpeg",))
+    monkeypatch.setattr(pipeline, "submit", lambda key: None)
+    key = client.post(
+        "/images/", data={"file": (io.BytesIO(b"original"), "a.jpg")}, content_type="multipart/form-data"
+    ).get_data(as_text=True)
+
+    response = client.get(f"/images/{key}?w=320")
+
+    assert response.data == b"original"
+    assert response.cache_control.max_age == 60
+    assert not response.cache_control.immutable
+
+
+def test_width_missing_from_finished_manifest_is_cached_long(app, client, monkeypatch):
+    monkeypatch.setattr(pipeline, "formats", ("jpeg",))
+    monkeypatch.setattr(pipeline, "submit", lambda key: None)
+    monkeypatch.setitem(app.config, "IMAGE_CACHE_MAX_AGE", 86400)
+    key = client.post(
+        "/images/", data={"file": (io.BytesIO(b"original"), "a.jpg")}, content_type="multipart/form-data"
+    ).get_data(as_text=True)
+    # Generation finished without variants: the original is narrower than every width.
+    store_variants(extensions.storage, key)
+
+    response = client.get(f"/images/{key}?w=1600")
+
+    assert response.data == b"original"
+    assert response.cache_control.max_age == 86400
+    assert response.cache_control.immutable
@@ -40,6 +40,15 @@ class TestImageRoutes:
         assert response.data == b"fake image data"
         assert response.mimetype == "image/jpeg"
 
+    def test_post_image_too_large(self, client, monkeypatch):
+        """Test that uploads over the size limit are rejected."""
+        monkeypatch.setattr(extensions.storage, "max_size", 4)
+        data = {"file": (io.BytesIO(b"fake image data"), "test.jpg")}
+
+        response = client.post("/images/", data=data, content_type="multipart/form-data")
+
+        assert response.status_code == 413
+
     def test_get_nonexistent_image(self, client):
         """Test retrieving an image that doesn't exist."""
         response = client.get("/images/nonexistent-image-id")
@@ -55,3 +64,63 @@ class TestImageRoutes:
         data = {"file": (io.BytesIO(b"fake image data"), "test.jpg")}
         response = client.post("/images/", data=data, content_type="multipart/form-data")
         assert response.status_code == 500
+
+
+class TestImageCaching:
+    """Test suite for image cache headers and proxy offload."""
+
+    def upload(self, client, data=b"\xff\xd8\xff fake image data"):
+        response = client.post(
+            "/images/", data={"file": (io.BytesIO(data), "a.jpg")}, content_type="multipart/form-data"
+        )
+        return response.get_data(as_text=True)
+
+    def test_images_are_cacheable_forever(self, client):
+        key = self.upload(client)
+
+        response = client.get(f"/images/{key}")
+
+        assert response.cache_control.public
+        assert response.cache_control.max_age == 31536000
+        assert response.cache_control.immutable
+        etag, weak = response.get_etag()
+        assert etag and not weak
+
+    def test_matching_etag_returns_304(self, client):
+        key = self.upload(client)
+        etag = client.get(f"/images/{key}").headers["ETag"]
+
+        response = client.get(f"/images/{key}", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.data == b""
+
+    def test_range_request(self, client):
+        key = self.upload(client, b"0123456789")
+
+        response = client.get(f"/images/{key}", headers={"Range": "bytes=2-5"})
+
+        assert response.status_code == 206
+        assert response.data == b"2345"
+        assert response.headers["Content-Range"] == "bytes 2-5/10"
+
+    def test_x_accel_redirect(self, client, app, monkeypatch):
+        key = self.upload(client)
+        monkeypatch.setitem(app.config, "IMAGE_OFFLOAD", "x-accel-redirect")
+        monkeypatch.setitem(app.config, "IMAGE_ACCEL_REDIRECT_PREFIX", "/_storage/")
+
+        response = client.get(f"/images/{key}")
+
+        assert response.headers["X-Accel-Redirect"] == f"/_storage/{key}"
+        assert response.data == b""
+        assert response.mimetype == "image/jpeg"
+        assert response.cache_control.immutable
+
+    def test_x_sendfile(self, client, app, monkeypatch):
+        key = self.upload(client)
+        monkeypatch.setitem(app.config, "IMAGE_OFFLOAD", "x-sendfile")
+
+        response = client.get(f"/images/{key}")
+
+        assert response.headers["X-Sendfile"] == str(extensions.storage.read(key))
+        assert response.data == b""
@@ -1,8 +1,12 @@
 """Tests for ingredient routes."""
 
 import pytest
+from sqlalchemy import insert
 
+from app import generations
+from app.ingredients.index import ingredient_index
 from app.recipes.models import Ingredient
+from app.recipes.schemas import CreateRecipe
 
 
 class TestIngredientRoutes:
@@ -118,3 +122,63 @@ class TestIngredientRoutes:
         data = response.get_json()
         assert len(data) == 1
         assert data[0]["slug"] == "choc-chips"
+
+    def test_datalist_options_ranks_prefix_matches_first(self, client, db):
+        """Test that names starting with the query come before inner matches."""
+        response = client.get("/ingredients/datalist-options/?q=b")
+        data = response.get_json()
+        assert {item["slug"] for item in data[:3]} == {"bread-flour", "brown-sugar", "butter"}
+
+    def test_datalist_options_limit(self, client, db):
+        """Test that the limit parameter caps the number of results."""
+        response = client.get("/ingredients/datalist-options/?q=a&limit=3")
+        assert len(response.get_json()) == 3
+
+    def test_datalist_options_includes_ingredients_created_with_recipe(self, client, db):
+        """Test that ingredients inserted by CreateRecipe are searchable after commit."""
+        assert client.get("/ingredients/datalist-options/?q=nutmeg").get_json() == []
+
+        CreateRecipe(
+            name="Spiced Cake",
+            directions="Bake",
+            recipe_ingredients=[{"slug": "nutmeg", "name": "Ground Nutmeg"}],
+        ).to_db(db.session)
+        db.session.commit()
+
+        data = client.get("/ingredients/datalist-options/?q=nutmeg").get_json()
+        assert data == [{"slug": "nutmeg", "name": "Ground Nutmeg"}]
+
+    def test_datalist_options_ignores_rolled_back_ingredients(self, client, db):
+        """Test that uncommitted ingredients never reach the index."""
+        client.get("/ingredients/datalist-options/?q=flour")
+        db.session.add(Ingredient(slug="rye-flour", name="Rye Flour"))
+        db.session.flush()
+        db.session.rollback()
+
+        data = client.get("/ingredients/datalist-options/?q=rye").get_json()
+        assert data == []
+
+    def test_datalist_options_sees_ingredients_committed_by_other_workers(self, client, db, monkeypatch):
+        """Test that a change made in another process shows up once the generation check runs."""
+        client.get("/ingredients/datalist-options/?q=flour")
+        monkeypatch.setattr(ingredient_index, "check_interval", 0)
+
+        # Another worker inserts the row and bumps the generation; no hook runs in this process.
+        db.session.execute(insert(Ingredient).values(slug="spelt", name="Spelt Flour"))
+        generations.bump(db.session, generations.INGREDIENTS)
+        db.session.commit()
+
+        data = client.get("/ingredients/datalist-options/?q=spelt").get_json()
+        assert data == [{"slug": "spelt", "name": "Spelt Flour"}]
+
+    def test_own_ingredient_changes_do_not_reload_the_index(self, client, db, monkeypatch):
+        """Test that the writing process applies its change in place instead of rebuilding."""
+        client.get("/ingredients/datalist-options/?q=flour")
+        monkeypatch.setattr(ingredient_index, "check_interval", 0)
+        monkeypatch.setattr(ingredient_index, "loader", None)  # a rebuild would empty the index
+
+        db.session.add(Ingredient(slug="rye-flour", name="Rye Flour"))
+        db.session.commit()
+
+        data = client.get("/ingredients/datalist-options/?q=flour").get_json()
+        assert {item["slug"] for item in data} == {"all-purpose-flour", "bread-flour", "rye-flour"}
@@ -0,0 +1,104 @@
+"""Tests for request instrumentation and the debug metrics endpoints."""
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import instrumentation, metrics
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    for metric in metrics.registry:
+        metric.clear()
+    instrumentation.slow_query_samples.clear()
+
+
+def sample(text, series):
+    """The value of one series in Prometheus text output."""
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+class TestInstrumentation:
+    def test_server_timing_header(self, app, client, db, sample_recipe, monkeypatch):
+        monkeypatch.setitem(app.config, "METRICS_SERVER_TIMING", True)
+        sample_recipe(db)
+
+        response = client.get("/recipes/")
+
+        timing = response.headers["Server-Timing"]
+        assert timing.startswith("db;dur=")
+        assert "render;dur=" in timing and "total;dur=" in timing
+        assert 'queries"' in timing
+
+    def test_server_timing_is_off_by_default(self, client, db):
+        assert "Server-Timing" not in client.get("/recipes/").headers
+
+    def test_metrics_endpoint_reports_requests(self, client, db, sample_recipe):
+        recipe = sample_recipe(db)
+        client.get(f"/book/{recipe.slug}/")
+        client.get(f"/book/{recipe.slug}/")
+
+        response = client.get("/_debug/metrics")
+
+        assert response.mimetype == "text/plain"
+        text = response.text
+        assert sample(text, 'cookbook_request_duration_seconds_count{endpoint="book.book",method="GET"}') == 2
+        assert sample(text, 'cookbook_request_queries_count{endpoint="book.book"}') == 2
+        assert sample(text, 'cookbook_request_queries_sum{endpoint="book.book"}') >= 3
+        assert sample(text, 'cookbook_template_render_seconds_count{template="bookview.html"}') == 1
+
+    def test_slow_queries_are_sampled(self, app, client, db, sample_recipe, monkeypatch):
+        monkeypatch.setitem(app.config, "METRICS_SLOW_QUERY_MS", 0)
+        sample_recipe(db)
+        client.get("/recipes/")
+
+        samples = client.get("/_debug/slow-queries").json["samples"]
+
+        assert samples and all(s["endpoint"] == "recipes.get_recipes" for s in samples)
+        assert any("FROM recipe" in s["statement"] for s in samples)
+        assert sample(client.get("/_debug/metrics").text, 'cookbook_slow_queries_total{endpoint="recipes.get_recipes"}')
+
+    def test_failed_statements_leave_no_timing_state(self, app, db):
+        with db.engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conn.exec_driver_sql("SELECT * FROM missing_table")
+                conn.rollback()
+            conn.exec_driver_sql("SELECT 1")
+
+            assert not conn.info.get("query_start")
+
+    def test_token_is_required_when_configured(self, app, client, monkeypatch):
+        monkeypatch.setitem(app.config, "METRICS_TOKEN", "secret")
+
+        assert client.get("/_debug/metrics").status_code == 403
+        assert client.get("/_debug/metrics", headers={"Authorization": "Bearer secret"}).status_code == 200
+
+    def test_hidden_outside_debug_without_token(self, app, client, monkeypatch):
+        monkeypatch.setattr(app, "testing", False)
+
+        assert client.get("/_debug/metrics").status_code == 404
+
+    def test_workers_are_added_up(self, app, client, db, tmp_path, monkeypatch):
+        # Another worker sharing the directory wrote its values there.
+        instrumentation.request_queries.observe(4, "other.endpoint")
+        metrics.MetricsDirectory(tmp_path).flush(force=True)
+        instrumentation.request_queries.clear()
+        monkeypatch.setitem(app.extensions, "metrics_dir", metrics.MetricsDirectory(tmp_path))
+
+        text = client.get("/_debug/metrics").text
+
+        assert sample(text, 'cookbook_request_queries_sum{endpoint="other.endpoint"}') == 4
+
+    def test_flush_writes_this_workers_values(self, app, tmp_path, monkeypatch):
+        directory = metrics.MetricsDirectory(tmp_path)
+        monkeypatch.setitem(app.extensions, "metrics_dir", directory)
+        instrumentation.request_queries.observe(2, "last.request")
+
+        instrumentation.flush(app)
+
+        (path,) = tmp_path.glob("metrics-*.json")
+        assert "last.request" in path.read_text()
@@ -0,0 +1,85 @@
+"""Tests for the metrics registry and Prometheus rendering."""
+
+import time
+
+from app.metrics import Counter, Histogram, MetricsDirectory, registry, render
+
+
+class TestHistogram:
+    def test_render_cumulative_buckets(self):
+        latency = Histogram("latency_seconds", "Request latency.", labelnames=("endpoint",), buckets=(0.1, 1.0))
+        latency.observe(0.05, "home")
+        latency.observe(0.5, "home")
+        latency.observe(3, "home")
+
+        assert render([latency]).splitlines() == [
+            "# HELP latency_seconds Request latency.",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{endpoint="home",le="0.1"} 1',
+            'latency_seconds_bucket{endpoint="home",le="1.0"} 2',
+            'latency_seconds_bucket{endpoint="home",le="+Inf"} 3',
+            'latency_seconds_sum{endpoint="home"} 3.55',
+            'latency_seconds_count{endpoint="home"} 3',
+        ]
+
+    def test_label_values_are_escaped(self):
+        metric = Histogram("x", "X.", labelnames=("path",), buckets=(1,))
+        metric.observe(0, 'a"b')
+
+        assert 'path="a\\"b"' in render([metric])
+
+
+class TestCounter:
+    def test_render_total(self):
+        hits = Counter("hits", "Hits.", labelnames=("page",))
+        hits.inc("home")
+        hits.inc("home", amount=2)
+
+        assert render([hits]).splitlines()[-1] == 'hits_total{page="home"} 3'
+
+    def test_merged_adds_other_processes(self):
+        hits = Counter("hits", "Hits.", labelnames=("page",))
+        hits.inc("home")
+
+        merged = hits.merged([[[["home"], 2]], [[["about"], 1]]])
+
+        assert list(merged.samples()) == [("_total", {"page": "about"}, 1), ("_total", {"page": "home"}, 3)]
+        assert list(hits.samples()) == [("_total", {"page": "home"}, 1)]
+
+
+class TestMetricsDirectory:
+    def test_collect_reads_other_processes_files(self, tmp_path):
+        directory = MetricsDirectory(tmp_path)
+        (tmp_path / "metrics-1-1.json").write_text('{"hits": [[["home"], 2]]}')
+        (tmp_path / "metrics-2-1.json").write_text("{broken")
+        directory.flush(force=True)
+
+        assert directory.collect() == [{"hits": [[["home"], 2]]}]
+
+    def test_skipped_flush_is_written_by_a_timer(self, tmp_path):
+        directory = MetricsDirectory(tmp_path, interval=0.05)
+        hits = Counter("timer_hits", "Hits.")
+        directory.flush(force=True)
+        registry.append(hits)
+        try:
+            hits.inc()
+            directory.flush()
+            assert "timer_hits" not in directory.file.read_text()
+
+            deadline = time.monotonic() + 5
+            while "timer_hits" not in directory.file.read_text() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert "timer_hits" in directory.file.read_text()
+        finally:
+            registry.remove(hits)
+
+    def test_clear_removes_every_process_file(self, tmp_path):
+        directory = MetricsDirectory(tmp_path)
+        (tmp_path / "metrics-1-1.json").write_text("{}")
+        (tmp_path / "metrics-2-1.tmp").write_text("{")
+        (tmp_path / "unrelated.txt").write_text("")
+        directory.flush(force=True)
+
+        directory.clear()
+
+        assert [path.name for path in tmp_path.iterdir()] == ["unrelated.txt"]
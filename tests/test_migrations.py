@@ -0,0 +1,52 @@
+"""Tests for data migrations, run against a scratch SQLite database."""
+
+from pathlib import Path
+
+import pytest
+from flask_migrate import upgrade
+from sqlalchemy import create_engine, text
+
+from app import create_app
+from app.config import Config
+
+MIGRATIONS = str(Path(__file__).resolve().parents[1] / "migrations")
+
+
+@pytest.fixture
+def migrated(tmp_path):
+    """Return `upgrade_to(revision)` for a fresh database and an engine on it."""
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    app = create_app(type("MigrationConfig", (Config,), {"SQLALCHEMY_DATABASE_URI": url, "TESTING": True}))
+
+    def upgrade_to(revision):
+        with app.app_context():
+            upgrade(directory=MIGRATIONS, revision=revision)
+
+    engine = create_engine(url)
+    yield upgrade_to, engine
+    engine.dispose()
+
+
+def test_display_values_backfill_handles_units_without_an_amount(migrated):
+    upgrade_to, engine = migrated
+    upgrade_to("9b3f2c6d1e58")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO recipe (slug, name, directions, version, updated_at) "
+                "VALUES ('r', 'R', 'x', 1, '2026-01-01')"
+            )
+        )
+        conn.execute(text("INSERT INTO ingredient (slug, name, density) VALUES ('salt', 'Salt', 2.16)"))
+        conn.execute(
+            text(
+                "INSERT INTO recipe_ingredient (ingredient_list, recipe_slug, ingredient_slug, amount, unit) "
+                "VALUES ('a', 'r', 'salt', NULL, 'pinch'), ('b', 'r', 'salt', 1.5, 'tsp')"
+            )
+        )
+
+    upgrade_to("e4a7c1f2b893")
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT ingredient_list, pretty FROM recipe_ingredient ORDER BY 1")).all()
+    assert rows == [("a", "pinch Salt"), ("b", "1 1/2 tsp Salt")]
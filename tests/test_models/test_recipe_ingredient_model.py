@@ -165,3 +165,70 @@ class TestRecipeIngredient:
         )
         recipe_ingredient._weight = 42
         assert recipe_ingredient.weight == 42
+
+
+class TestStoredDisplayValues:
+    """Test suite for the pretty/weight values stored with each row."""
+
+    def add_row(self, db, recipe, ingredient, amount=1.5, unit="cup"):
+        row = RecipeIngredient(ingredient_list="main", amount=amount, unit=unit, recipe=recipe, ingredient=ingredient)
+        db.session.add(row)
+        db.session.commit()
+        return row
+
+    def test_values_are_stored_on_write(self, db, sample_recipe):
+        flour = Ingredient(slug="flour-stored", name="Flour", density=0.5)
+        row = self.add_row(db, sample_recipe(db), flour)
+
+        assert (row._pretty, row._weight) == ("1 1/2 cup Flour", 177.44)
+
+    def test_reads_do_not_convert(self, db, sample_recipe, monkeypatch):
+        flour = Ingredient(slug="flour-reads", name="Flour", density=0.5)
+        row = self.add_row(db, sample_recipe(db), flour)
+        db.session.expire_all()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("reads should use the stored values")
+
+        monkeypatch.setattr("app.recipes.models.pretty_text", fail)
+        monkeypatch.setattr("app.conversions.conversions.convert", fail)
+        monkeypatch.setattr("app.conversions.conversions.convert_many", fail)
+        assert (row.pretty, row.weight) == ("1 1/2 cup Flour", 177.44)
+
+    def test_unconvertible_amount_is_stored_without_weight(self, db, sample_recipe):
+        salt = Ingredient(slug="salt-pinch", name="Salt", density=1.2)
+        row = self.add_row(db, sample_recipe(db), salt, amount=1, unit="pinch")
+
+        assert row.pretty == "1 pinch Salt"
+        assert row.weight is None
+
+    def test_density_change_recomputes_every_row(self, db, sample_recipe):
+        sugar = Ingredient(slug="sugar-density", name="Sugar", density=None)
+        rows = [self.add_row(db, sample_recipe(db), sugar, amount=amount, unit="ml") for amount in (100, 250)]
+        assert [row.weight for row in rows] == [None, None]
+
+        sugar.density = 0.8
+        db.session.commit()
+        db.session.expire_all()
+
+        assert [row.weight for row in rows] == [80, 200]
+
+    def test_name_change_updates_pretty(self, db, sample_recipe):
+        oil = Ingredient(slug="oil-rename", name="Oil", density=0.9)
+        row = self.add_row(db, sample_recipe(db), oil, amount=2, unit="tbsp")
+
+        oil.name = "Olive Oil"
+        db.session.commit()
+        db.session.expire_all()
+
+        assert row.pretty == "2 tbsp Olive Oil"
+
+    def test_amount_change_updates_values(self, db, sample_recipe):
+        water = Ingredient(slug="water-amount", name="Water", density=1.0)
+        row = self.add_row(db, sample_recipe(db), water, amount=100, unit="ml")
+
+        row.amount = 0.5
+        row.unit = "l"
+        db.session.commit()
+
+        assert (row.pretty, row.weight) == ("1/2 l Water", 500)
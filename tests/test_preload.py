@@ -0,0 +1,45 @@
+"""Tests for the application factory and the gunicorn preload warm-up."""
+
+import gc
+
+import pytest
+
+from app import create_app
+from app.conversions import conversions
+from app.ingredients.index import ingredient_index
+from app.preload import reset_pools, warm
+
+
+@pytest.fixture
+def unfreeze():
+    yield
+    gc.unfreeze()
+
+
+def test_create_app_returns_a_new_configured_app(app):
+    other = create_app()
+
+    assert other is not app
+    assert {"recipes", "ingredients", "images", "book", "debug"} <= set(other.blueprints)
+
+
+def test_warm_builds_shared_state(app, db, sample_recipe_ingredient, unfreeze):
+    conversions.clear()
+    ingredient_index.clear()
+    app.jinja_env.cache.clear()
+
+    loaded = warm(app)
+
+    assert ("cups", "ml") in conversions._factors and ("tbsp", "ml") in conversions._factors
+    assert ingredient_index.loaded and sample_recipe_ingredient.ingredient_slug in ingredient_index
+    assert len(app.jinja_env.cache) == loaded["templates"] > 0
+    assert gc.get_freeze_count() > 0
+
+
+def test_reset_pools_gives_engines_new_pools(app, db):
+    engine = db.engine
+    pool = engine.pool
+
+    reset_pools([engine])
+
+    assert engine.pool is not pool
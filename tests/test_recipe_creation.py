@@ -136,3 +136,16 @@ class TestRecipeCreation:
 
         assert response.status_code == 201
         assert Tag.query.filter_by(name="dinner").count() == 1
+
+    def test_create_recipe_with_unit_but_no_amount(self, client, db):
+        payload = {
+            "name": "Seasoned",
+            "slug": _random_slug(),
+            "directions": "Season",
+            "recipe_ingredients": [{"unit": "pinch", "slug": "salt-pinch", "name": "Salt"}],
+        }
+
+        response = client.post("/recipes/new/", json=payload)
+
+        assert response.status_code == 201
+        assert db.session.get(Recipe, payload["slug"]).recipe_ingredients[0].pretty == "pinch Salt"
@@ -0,0 +1,107 @@
+"""Tests for streaming recipe export."""
+
+import io
+import json
+import tarfile
+
+from sqlalchemy import delete, select
+
+import app.extensions as extensions
+from app.recipes.exporter import export_ndjson, export_tar
+from app.recipes.importer import import_recipes
+from app.recipes.models import Recipe, RecipeIngredient
+from app.recipes.schemas import CreateRecipe
+from app.tags.models import RecipeTag
+
+
+def add_recipes(db, count, **extra):
+    for i in range(count):
+        CreateRecipe(
+            name=f"Recipe {i:02d}",
+            directions="mix",
+            tags=["quick"],
+            recipe_ingredients=[{"slug": "flour", "name": "Flour", "amount": 2, "unit": "cup"}],
+            **extra,
+        ).to_db(db.session)
+    db.session.commit()
+
+
+class TestExportRecipes:
+    def test_ndjson_round_trips_through_import(self, db):
+        add_recipes(db, 5, servings=4, cook_time=30)
+
+        data = b"".join(export_ndjson(db.session, batch_size=2))
+
+        lines = data.splitlines()
+        assert [json.loads(line)["slug"] for line in lines] == [f"recipe_{i:02d}" for i in range(5)]
+        first = json.loads(lines[0])
+        assert first["tags"] == ["quick"]
+        assert first["recipe_ingredients"][0] == {
+            "amount": 2.0,
+            "unit": "cup",
+            "ingredient_list": "Ingredients",
+            "slug": "flour",
+            "name": "Flour",
+        }
+
+        db.session.execute(delete(RecipeTag))
+        db.session.execute(delete(RecipeIngredient))
+        db.session.execute(delete(Recipe))
+        db.session.commit()
+        report = import_recipes(db.session, io.BytesIO(data))
+
+        assert (report.imported, report.failed) == (5, 0)
+        assert db.session.get(Recipe, "recipe_03").servings == 4
+
+    def test_yields_one_chunk_per_batch(self, db, count_queries):
+        add_recipes(db, 5)
+
+        with count_queries() as statements:
+            chunks = list(export_ndjson(db.session, batch_size=2))
+
+        assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+        # One streamed recipe query, then ingredients and tags per batch.
+        assert len(statements) == 1 + 3 * 2
+
+    def test_tar_contains_batches_and_images(self, db):
+        storage = extensions.storage
+        key = storage.create(io.BytesIO(b"\xff\xd8\xff photo"))
+        add_recipes(db, 3)
+        for recipe in db.session.scalars(select(Recipe)):
+            recipe.images = json.dumps([key, "missing-key"])
+        db.session.commit()
+
+        archive = tarfile.open(fileobj=io.BytesIO(b"".join(export_tar(db.session, storage, batch_size=2))))
+
+        assert archive.getnames() == ["recipes-00001.ndjson", f"images/{key}", "recipes-00002.ndjson"]
+        assert archive.extractfile(f"images/{key}").read() == b"\xff\xd8\xff photo"
+        assert archive.extractfile("recipes-00002.ndjson").read().count(b"\n") == 1
+
+    def test_cli_export(self, db, runner, tmp_path):
+        add_recipes(db, 2)
+        output = tmp_path / "recipes.ndjson"
+
+        result = runner.invoke(args=["recipes", "export", str(output)])
+
+        assert result.exit_code == 0, result.output
+        assert len(output.read_bytes().splitlines()) == 2
+
+    def test_export_endpoint_streams(self, client, db):
+        add_recipes(db, 2)
+
+        response = client.get("/recipes/export/")
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == "application/x-ndjson"
+        assert "attachment" in response.headers["Content-Disposition"]
+        assert len(response.data.splitlines()) == 2
+
+    def test_export_endpoint_tar_and_bad_format(self, client, db):
+        add_recipes(db, 1)
+
+        response = client.get("/recipes/export/?format=tar")
+        assert response.mimetype == "application/x-tar"
+        assert tarfile.open(fileobj=io.BytesIO(response.data)).getnames() == ["recipes-00001.ndjson"]
+
+        assert client.get("/recipes/export/?format=zip").status_code == 400
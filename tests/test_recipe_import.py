@@ -0,0 +1,114 @@
+"""Tests for bulk NDJSON recipe import."""
+
+import io
+import json
+
+from sqlalchemy import event, func, select
+
+from app.recipes.importer import import_recipes
+from app.recipes.models import Recipe
+
+
+def record(name, **extra):
+    data = {"name": name, "directions": "mix", "recipe_ingredients": [{"slug": "flour", "name": "Flour"}], **extra}
+    return json.dumps(data)
+
+
+def ndjson(*lines):
+    return "\n".join(lines).encode() + b"\n"
+
+
+def recipe_count(db):
+    return db.session.execute(select(func.count()).select_from(Recipe)).scalar_one()
+
+
+class TestImportRecipes:
+    def test_imports_in_chunks_with_one_commit_each(self, db):
+        commits = []
+
+        def count_commit(session):
+            commits.append(session)
+
+        event.listen(db.session, "after_commit", count_commit)
+        try:
+            report = import_recipes(db.session, [record(f"Recipe {i}") for i in range(7)], chunk_size=3)
+        finally:
+            event.remove(db.session, "after_commit", count_commit)
+
+        assert (report.imported, report.failed) == (7, 0)
+        assert len(commits) == 3
+        assert recipe_count(db) == 7
+
+    def test_bad_records_are_reported_and_skipped(self, db):
+        db.session.add(Recipe(slug="existing", name="Existing", directions="x"))
+        db.session.commit()
+        lines = [
+            record("Good one"),
+            "{not json",
+            json.dumps({"name": "No directions"}),
+            "",
+            record("Existing"),
+            record("Good one", tags=["dup"]),
+            record("Good two", tags=["Quick"]),
+        ]
+
+        report = import_recipes(db.session, lines)
+
+        assert (report.imported, report.failed) == (2, 4)
+        assert [(e.line, e.slug) for e in report.errors] == [(2, None), (3, None), (5, "existing"), (6, None)]
+        assert "directions" in report.errors[1].error
+        assert "already exists" in report.errors[2].error
+        assert "duplicate slug" in report.errors[3].error
+        assert db.session.get(Recipe, "good_two").tags[0].name == "quick"
+
+    def test_slug_taken_concurrently_fails_only_that_record(self, db, monkeypatch):
+        from app.recipes.schemas import CreateRecipe
+
+        resolve = CreateRecipe.resolve
+
+        def racing_resolve(session, recipes):
+            # Another writer commits "soup" after the chunk checked for existing slugs.
+            if session.get(Recipe, "soup") is None:
+                session.add(Recipe(slug="soup", name="Soup", directions="x"))
+                session.commit()
+            return resolve(session, recipes)
+
+        monkeypatch.setattr(CreateRecipe, "resolve", staticmethod(racing_resolve))
+
+        report = import_recipes(db.session, [record("Soup"), record("Bread")])
+
+        assert (report.imported, report.failed) == (1, 1)
+        assert report.errors[0].slug == "soup"
+        assert recipe_count(db) == 2
+
+
+class TestBulkEndpoint:
+    def test_post_ndjson(self, client, db):
+        body = ndjson(record("Soup"), "oops", record("Bread"))
+
+        response = client.post("/recipes/bulk/?chunk_size=1", data=body, content_type="application/x-ndjson")
+
+        assert response.status_code == 200
+        assert response.json["imported"] == 2
+        assert response.json["failed"] == 1
+        assert response.json["errors"][0]["line"] == 2
+        assert recipe_count(db) == 2
+
+
+class TestImportCommand:
+    def test_import_from_file(self, runner, db, tmp_path):
+        path = tmp_path / "recipes.ndjson"
+        path.write_bytes(ndjson(record("Soup"), record("Bread")))
+
+        result = runner.invoke(args=["recipes", "import", str(path), "--chunk-size", "1"])
+
+        assert result.exit_code == 0, result.output
+        assert "Imported 2 recipes, 0 failed." in result.output
+        assert recipe_count(db) == 2
+
+    def test_import_reports_failures(self, runner, db):
+        result = runner.invoke(args=["recipes", "import"], input=io.BytesIO(ndjson(record("Soup"), "oops")))
+
+        assert result.exit_code == 1
+        assert "line 2:" in result.output
+        assert recipe_count(db) == 1
@@ -38,13 +38,145 @@ class TestRecipeRoutes:
         response = client.get("/recipes/?page=2&per_page=10")
         assert response.status_code == 200
 
-    def test_get_single_recipe_endpoint_not_implemented(self, client, db, sample_recipe):
-        """The placeholder single-recipe endpoint currently returns 405."""
+    def test_get_recipes_keyset_pagination(self, client, db):
+        """Test cursor pagination seeks past the given slug."""
+        for i in range(5):
+            db.session.add(Recipe(slug=f"recipe-{i}", name=f"Recipe {i}", directions=f"Directions {i}"))
+        db.session.commit()
+
+        first = client.get("/recipes/?after=&per_page=2").get_data(as_text=True)
+        assert "Recipe 0" in first and "Recipe 1" in first and "Recipe 2" not in first
+        assert "after=recipe-1" in first
+
+        middle = client.get("/recipes/?after=recipe-1&per_page=2").get_data(as_text=True)
+        assert "Recipe 2" in middle and "Recipe 3" in middle and "Recipe 1" not in middle
+        assert "before=recipe-2" in middle and "after=recipe-3" in middle
+
+        last = client.get("/recipes/?after=recipe-3&per_page=2").get_data(as_text=True)
+        assert "Recipe 4" in last and "after=recipe-4" not in last
+
+    def test_get_recipes_keyset_previous_page(self, client, db):
+        """Test seeking backwards with a before cursor."""
+        for i in range(5):
+            db.session.add(Recipe(slug=f"recipe-{i}", name=f"Recipe {i}", directions=f"Directions {i}"))
+        db.session.commit()
+
+        response = client.get("/recipes/?before=recipe-4&per_page=2").get_data(as_text=True)
+        assert "Recipe 2" in response and "Recipe 3" in response and "Recipe 4" not in response
+        assert "before=recipe-2" in response and "after=recipe-3" in response
+
+        first = client.get("/recipes/?before=recipe-2&per_page=2").get_data(as_text=True)
+        assert "Recipe 0" in first and "Recipe 1" in first
+        assert "before=recipe-0" not in first
+
+    def test_get_single_recipe_endpoint_returns_json(self, client, db, sample_recipe):
+        """The single-recipe endpoint serves the recipe as JSON."""
         recipe = sample_recipe(db)
         response = client.get(f"/recipes/get/{recipe.slug}/")
-        assert response.status_code == 405
+        assert response.status_code == 200
+        assert response.mimetype == "application/json"
+        assert response.json["slug"] == recipe.slug
 
     def test_get_nonexistent_recipe_route(self, client, db):
         """A non-matching recipe URL currently returns 404."""
         response = client.get("/recipes/nonexistent-recipe/")
         assert response.status_code == 404
+
+
+class TestRecipeApi:
+    """Test suite for the JSON read API."""
+
+    def add_recipe(self, db, slug="pancakes"):
+        from app.recipes.schemas import CreateRecipe
+
+        recipe = CreateRecipe(
+            slug=slug,
+            name=slug.title(),
+            directions="mix",
+            servings=4,
+            tags=["breakfast"],
+            recipe_ingredients=[{"slug": "flour", "name": "Flour", "amount": 2, "unit": "cup"}],
+        ).to_db(db.session)
+        db.session.commit()
+        return recipe
+
+    def test_get_recipe(self, client, db):
+        self.add_recipe(db)
+
+        data = client.get("/recipes/get/pancakes/").json
+
+        assert data["name"] == "Pancakes"
+        assert data["servings"] == 4
+        assert data["sidebar"] is None
+        assert data["tags"] == ["breakfast"]
+        assert data["recipe_ingredients"] == [
+            {"amount": 2.0, "unit": "cup", "ingredient_list": "Ingredients", "slug": "flour", "name": "Flour"}
+        ]
+
+    def test_sparse_fieldset_skips_unrequested_relationships(self, client, db, count_queries):
+        self.add_recipe(db)
+
+        with count_queries() as statements:
+            response = client.get("/recipes/get/pancakes/?fields=name,tags")
+
+        assert response.json == {"name": "Pancakes", "tags": ["breakfast"]}
+        assert not [s for s in statements if "recipe_ingredient" in s]
+
+    def test_unknown_field_is_rejected(self, client, db):
+        self.add_recipe(db)
+
+        assert client.get("/recipes/get/pancakes/?fields=name,secret").status_code == 400
+
+    def test_missing_recipe_returns_404(self, client, db):
+        assert client.get("/recipes/get/nope/").status_code == 404
+
+    def test_revalidation_and_cache(self, client, db, count_queries):
+        self.add_recipe(db)
+        first = client.get("/recipes/get/pancakes/")
+
+        assert client.get("/recipes/get/pancakes/", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+        with count_queries() as statements:
+            again = client.get("/recipes/get/pancakes/")
+        assert again.data == first.data
+        assert len(statements) == 1  # only the version lookup; the body comes from the page cache
+
+    def test_edit_changes_response(self, client, db):
+        recipe = self.add_recipe(db)
+        first = client.get("/recipes/get/pancakes/")
+
+        recipe.name = "Crepes"
+        db.session.commit()
+        second = client.get("/recipes/get/pancakes/")
+
+        assert second.json["name"] == "Crepes"
+        assert second.headers["ETag"] != first.headers["ETag"]
+
+    def test_recreated_recipe_does_not_match_old_etag(self, client, db, sample_recipe):
+        recipe = sample_recipe(db, slug="waffles")
+        etag = client.get("/recipes/get/waffles/").headers["ETag"]
+        db.session.delete(recipe)
+        db.session.commit()
+        sample_recipe(db, slug="waffles", name="Recreated")
+
+        response = client.get("/recipes/get/waffles/", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.json["name"] == "Recreated"
+
+    def test_listing_is_keyset_paginated(self, client, db):
+        for slug in ("a", "b", "c"):
+            self.add_recipe(db, slug)
+
+        first = client.get("/recipes/get/?per_page=2&fields=slug").json
+        second = client.get(f"/recipes/get/?per_page=2&fields=slug&after={first['next']}").json
+
+        assert first == {"items": [{"slug": "a"}, {"slug": "b"}], "next": "b", "previous": None}
+        assert second == {"items": [{"slug": "c"}], "next": None, "previous": "c"}
+
+    def test_listing_full_records(self, client, db):
+        self.add_recipe(db)
+
+        items = client.get("/recipes/get/").json["items"]
+
+        assert items[0]["tags"] == ["breakfast"]
+        assert items[0]["recipe_ingredients"][0]["slug"] == "flour"
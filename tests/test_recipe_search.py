@@ -0,0 +1,94 @@
+"""Tests for recipe full-text search."""
+
+import pytest
+from sqlalchemy import select
+
+from app.recipes.models import Ingredient, Recipe, RecipeIngredient
+from app.recipes.schemas import CreateRecipe
+from app.recipes.search import recipe_search, reindex
+
+
+def _create(db, name, directions="Mix well", sidebar=None, ingredients=()):
+    recipe = CreateRecipe(
+        name=name,
+        directions=directions,
+        sidebar=sidebar,
+        recipe_ingredients=[{"slug": slug, "name": ingredient} for slug, ingredient in ingredients],
+    ).to_db(db.session)
+    db.session.commit()
+    return recipe
+
+
+class TestRecipeSearch:
+    @pytest.fixture(autouse=True)
+    def setup_recipes(self, db):
+        _create(db, "Tomato Soup", directions="Simmer tomatoes", ingredients=[("tomato", "Tomato")])
+        _create(db, "Pancakes", directions="Whisk and fry", ingredients=[("flour", "Flour"), ("egg", "Egg")])
+        _create(db, "Flourless Chocolate Cake", sidebar="Gluten free", ingredients=[("cocoa", "Cocoa Powder")])
+
+    def _slugs(self, response):
+        return [a.split('"')[0] for a in response.get_data(as_text=True).split('href="/book/')[1:]]
+
+    def test_search_matches_name_directions_sidebar_and_ingredients(self, client, db):
+        assert self._slugs(client.get("/recipes/search/?q=soup")) == ["tomato_soup"]
+        assert self._slugs(client.get("/recipes/search/?q=whisk")) == ["pancakes"]
+        assert self._slugs(client.get("/recipes/search/?q=gluten")) == ["flourless_chocolate_cake"]
+        assert self._slugs(client.get("/recipes/search/?q=cocoa")) == ["flourless_chocolate_cake"]
+
+    def test_search_ranks_name_matches_above_ingredient_matches(self, client, db):
+        assert self._slugs(client.get("/recipes/search/?q=flour")) == ["flourless_chocolate_cake", "pancakes"]
+
+    def test_search_requires_every_term(self, client, db):
+        assert self._slugs(client.get("/recipes/search/?q=flour+egg")) == ["pancakes"]
+        assert self._slugs(client.get("/recipes/search/?q=flour+tomato")) == []
+
+    def test_search_paginates_and_keeps_query_in_links(self, client, db):
+        response = client.get("/recipes/search/?q=flour&per_page=1")
+        assert self._slugs(response) == ["flourless_chocolate_cake"]
+        assert "/recipes/search/?q=flour&amp;per_page=1&amp;page=2" in response.get_data(as_text=True)
+
+        assert self._slugs(client.get("/recipes/search/?q=flour&per_page=1&page=2")) == ["pancakes"]
+
+    def test_empty_query_redirects_to_listing(self, client, db):
+        response = client.get("/recipes/search/?q=+")
+        assert response.status_code == 302
+        assert response.headers["Location"].endswith("/recipes/")
+
+    def test_index_follows_recipe_and_ingredient_changes(self, client, db):
+        recipe = db.session.get(Recipe, "pancakes")
+        recipe.name = "Crepes"
+        db.session.commit()
+        assert self._slugs(client.get("/recipes/search/?q=crepes")) == ["pancakes"]
+
+        db.session.get(Ingredient, "egg").name = "Duck Egg"
+        db.session.commit()
+        assert self._slugs(client.get("/recipes/search/?q=duck")) == ["pancakes"]
+
+        db.session.delete(recipe)
+        db.session.commit()
+        assert self._slugs(client.get("/recipes/search/?q=crepes")) == []
+        assert db.session.execute(select(recipe_search.c.slug)).scalars().all() == [
+            "tomato_soup",
+            "flourless_chocolate_cake",
+        ]
+
+    def test_index_ignores_rolled_back_changes(self, client, db):
+        db.session.add(
+            RecipeIngredient(
+                ingredient_list="Ingredients",
+                recipe=db.session.get(Recipe, "tomato_soup"),
+                ingredient=Ingredient(slug="basil", name="Basil"),
+            )
+        )
+        db.session.flush()
+        db.session.rollback()
+
+        assert self._slugs(client.get("/recipes/search/?q=basil")) == []
+
+    def test_reindex_rebuilds_every_recipe(self, client, db):
+        connection = db.session.connection()
+        connection.execute(recipe_search.delete())
+        reindex(connection)
+        db.session.commit()
+
+        assert self._slugs(client.get("/recipes/search/?q=tomato")) == ["tomato_soup"]
@@ -0,0 +1,159 @@
+"""Tests for the S3-compatible storage backend, run against the in-process stand-in."""
+
+import io
+import json
+
+import pytest
+
+import app.extensions as extensions
+from app.images.derivatives import MANIFEST, pipeline
+from app.s3_storage import LocalS3Client, S3Storage
+from app.storage import UploadTooLarge
+
+
+class Trickle(io.BytesIO):
+    """A stream that hands out at most 10 bytes per read, like a slow upload."""
+
+    def read(self, size=-1):
+        return super().read(10)
+
+
+@pytest.fixture
+def s3():
+    return S3Storage(bucket="images", client=LocalS3Client(min_part_size=8), prefix="uploads/")
+
+
+class TestS3Storage:
+    def test_create_and_read_back(self, s3):
+        key = s3.create(b"hello")
+
+        assert s3.client.objects["images", f"uploads/{key}"] == b"hello"
+        assert s3.exists(key)
+        with s3.open(key) as f:
+            assert f.read() == b"hello"
+        assert b"".join(s3.stream(key, chunk_size=2)) == b"hello"
+
+    def test_small_uploads_use_a_single_put(self, s3):
+        s3.create(io.BytesIO(b"x" * 100))
+
+        assert s3.client.calls == {"put_object": 1}
+
+    def test_large_uploads_use_multipart(self, s3):
+        s3.multipart_threshold = s3.part_size = 16
+        data = bytes(range(50))
+
+        key = s3.create(Trickle(data))
+
+        assert s3.client.objects["images", f"uploads/{key}"] == data
+        assert s3.client.calls["upload_part"] == 4
+        assert s3.client.calls["complete_multipart_upload"] == 1
+        assert not s3.client.uploads
+
+    def test_oversized_multipart_upload_is_aborted(self, s3):
+        s3.multipart_threshold = s3.part_size = 16
+        s3.max_size = 40
+
+        with pytest.raises(UploadTooLarge):
+            s3.create(Trickle(b"x" * 100))
+
+        assert s3.client.calls["abort_multipart_upload"] == 1
+        assert not s3.client.uploads
+        assert not s3.client.objects
+
+    def test_update_sets_content_type_from_key(self, s3):
+        key = s3.create(b"original")
+
+        s3.update(s3.variant_key(key, 320, "webp"), b"small")
+
+        assert s3.client.content_types["images", f"uploads/{key}.320.webp"] == "image/webp"
+
+    def test_missing_keys(self, s3):
+        assert not s3.exists("missing")
+        with pytest.raises(FileNotFoundError):
+            s3.open("missing")
+
+    def test_delete_removes_variants(self, s3):
+        key = s3.create(b"original")
+        other = s3.create(b"other")
+        s3.update(s3.variant_key(key, 320, "webp"), b"small")
+
+        s3.delete(key)
+
+        assert list(s3.client.objects) == [("images", f"uploads/{other}")]
+
+    def test_url_is_presigned_or_public(self, s3):
+        assert s3.url("abc") == "http://s3.local/images/uploads/abc?X-Amz-Expires=3600"
+        s3.public_url = "https://cdn.example.com/"
+        assert s3.url("abc") == "https://cdn.example.com/uploads/abc"
+        s3.public_url, s3.presign = None, False
+        assert s3.url("abc") is None
+
+    def test_init_app_reads_config(self, app, monkeypatch):
+        monkeypatch.setitem(app.config, "STORAGE_S3_BUCKET", "bucket")
+        monkeypatch.setitem(app.config, "STORAGE_S3_URL_EXPIRES", 60)
+        monkeypatch.setitem(app.extensions, "storage", app.extensions["storage"])
+
+        s3 = S3Storage().init_app(app)
+
+        assert (s3.bucket, s3.url_expires) == ("bucket", 60)
+        assert app.extensions["storage"] is s3
+
+    def test_init_app_requires_a_bucket(self, app, monkeypatch):
+        monkeypatch.setitem(app.config, "STORAGE_S3_BUCKET", None)
+
+        with pytest.raises(ValueError):
+            S3Storage().init_app(app)
+
+
+class TestImageRoutesOnS3:
+    @pytest.fixture(autouse=True)
+    def use_s3(self, s3, monkeypatch):
+        monkeypatch.setattr(extensions, "storage", s3)
+        monkeypatch.setattr(pipeline, "storage", s3)
+        return s3
+
+    def upload(self, client):
+        data = {"file": (io.BytesIO(b"\xff\xd8\xff image"), "a.jpg", "image/jpeg")}
+        return client.post("/images/", data=data, content_type="multipart/form-data").get_data(as_text=True)
+
+    def test_upload_keeps_content_type(self, client, s3):
+        key = self.upload(client)
+
+        assert s3.exists(key)
+        assert s3.client.content_types["images", f"uploads/{key}"] == "image/jpeg"
+
+    def test_variant_requests_make_one_bucket_request_per_image(self, client, s3, monkeypatch):
+        monkeypatch.setattr(pipeline, "formats", ("avif", "webp", "jpeg"))
+        key = self.upload(client)
+        s3.update(s3.variant_key(key, 640, "webp"), b"webp")
+        s3.update(s3.variant_key(key, MANIFEST), json.dumps([s3.variant_key(key, 640, "webp")]).encode())
+        s3.client.calls.clear()
+
+        for _ in range(3):
+            response = client.get(f"/images/{key}?w=400", headers={"Accept": "image/webp,*/*"})
+            assert response.location.startswith(f"http://s3.local/images/uploads/{key}.640.webp?")
+
+        # The manifest, read once; no HEAD per width and format.
+        assert s3.client.calls == {"get_object": 1}
+
+    def test_get_redirects_to_presigned_url(self, client):
+        key = self.upload(client)
+
+        response = client.get(f"/images/{key}")
+
+        assert response.status_code == 302
+        assert response.location == f"http://s3.local/images/uploads/{key}?X-Amz-Expires=3600"
+        assert response.cache_control.max_age == 300
+
+    def test_get_streams_without_urls(self, client, s3):
+        s3.presign = False
+        key = self.upload(client)
+
+        response = client.get(f"/images/{key}")
+
+        assert response.status_code == 200
+        assert response.data == b"\xff\xd8\xff image"
+        assert response.mimetype == "image/jpeg"
+
+    def test_get_missing_image(self, client):
+        assert client.get("/images/missing").status_code == 404
@@ -60,3 +60,67 @@ class TestCreateRecipeSchema:
         db.session.commit()
 
         assert recipe.tags == []
+
+    def test_to_db_resolves_ingredients_and_tags_in_bulk(self, db, count_queries):
+        from app.recipes.models import Ingredient
+
+        db.session.add_all([Ingredient(slug="ing-0", name="Existing"), Tag(name="tag-0")])
+        db.session.commit()
+        data = CreateRecipe(
+            name="Big recipe",
+            directions="mix",
+            tags=[f"tag-{i}" for i in range(8)],
+            recipe_ingredients=[{"slug": f"ing-{i}", "name": f"Ingredient {i}"} for i in range(30)],
+        )
+
+        with count_queries() as statements:
+            recipe = data.to_db(db.session)
+
+        # Per entity: SELECT ... IN, INSERT ... ON CONFLICT DO NOTHING, SELECT ... IN for the new rows.
+        assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 4, statements
+        assert len([s for s in statements if "ON CONFLICT DO NOTHING" in s]) == 2
+        assert len(recipe.recipe_ingredients) == 30
+        assert recipe.recipe_ingredients[0].ingredient.name == "Existing"
+
+    def test_to_db_deduplicates_tags(self, db):
+        data = CreateRecipe(
+            name="Dupes",
+            directions="mix",
+            tags=["Quick", "quick"],
+            recipe_ingredients=[{"slug": "flour", "name": "Flour"}],
+        )
+
+        recipe = data.to_db(db.session)
+        db.session.commit()
+
+        assert [tag.name for tag in recipe.tags] == ["quick"]
+
+
+class TestBulkInsert:
+    def test_insert_ignore_skips_existing_rows(self, db):
+        from app.bulk import insert_ignore
+
+        db.session.add(Tag(name="existing"))
+        db.session.commit()
+
+        created = insert_ignore(db.session, Tag, [{"name": "existing"}, {"name": "new"}], returning=Tag.name)
+
+        assert created == ["new"]
+        assert db.session.execute(select(func.count()).select_from(Tag)).scalar_one() == 2
+
+    def test_get_or_create_all_loads_rows_created_concurrently(self, db, monkeypatch):
+        import app.bulk as bulk
+
+        real_insert_ignore = bulk.insert_ignore
+
+        def racing_insert_ignore(session, model, rows, returning=None):
+            # Another writer inserts one of the missing rows first.
+            real_insert_ignore(session, model, rows[:1])
+            return real_insert_ignore(session, model, rows, returning=returning)
+
+        monkeypatch.setattr(bulk, "insert_ignore", racing_insert_ignore)
+
+        found, created = bulk.get_or_create_all(db.session, Tag, Tag.name, [{"name": "a"}, {"name": "b"}])
+
+        assert sorted(found) == ["a", "b"]
+        assert created == ["b"]
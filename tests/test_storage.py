@@ -1,11 +1,14 @@
 """Tests for the Storage class."""
 
+import hashlib
+import io
+import stat
 import uuid
 from pathlib import Path
 
 import pytest
 
-from app.storage import Storage
+from app.storage import CHUNK_SIZE, FILE_MODE, Storage, UploadTooLarge
 
 
 class TestStorage:
@@ -144,3 +147,179 @@ class TestStorage:
         storage = Storage(dir=tmp_path)
         file_id = storage.__iadd__(b"via-iadd")
         assert (tmp_path / file_id).read_bytes() == b"via-iadd"
+
+
+class TestContentAddressedStorage:
+    """Test suite for content-addressed Storage mode."""
+
+    def test_create_keys_by_sha256_in_sharded_dirs(self, tmp_path):
+        storage = Storage(dir=tmp_path, content_addressed=True)
+
+        key = storage.create(b"photo bytes")
+
+        assert key == hashlib.sha256(b"photo bytes").hexdigest()
+        path = tmp_path / key[:2] / key[2:4] / key
+        assert storage.read(key) == path
+        assert path.read_bytes() == b"photo bytes"
+
+    def test_create_streams_file_objects(self, tmp_path):
+        storage = Storage(dir=tmp_path, content_addressed=True)
+        data = bytes(range(256)) * 1024
+
+        key = storage.create(io.BytesIO(data))
+
+        assert key == hashlib.sha256(data).hexdigest()
+        assert storage.read(key).read_bytes() == data
+
+    def test_identical_uploads_share_one_blob(self, tmp_path):
+        storage = Storage(dir=tmp_path, content_addressed=True)
+
+        first = storage.create(b"same")
+        second = storage.create(io.BytesIO(b"same"))
+
+        assert first == second
+        assert storage.refcount(first) == 2
+        blobs = [p for p in tmp_path.rglob("*") if p.is_file() and p.name == first]
+        assert len(blobs) == 1
+        assert not list(tmp_path.glob(".upload-*"))
+
+    def test_delete_keeps_blob_until_last_reference(self, tmp_path):
+        storage = Storage(dir=tmp_path, content_addressed=True)
+        key = storage.create(b"shared")
+        storage.create(b"shared")
+
+        storage.delete(key)
+        assert storage.read(key).exists()
+        assert storage.refcount(key) == 1
+
+        del storage[key]
+        assert not storage.read(key).exists()
+        assert storage.refcount(key) == 0
+
+    def test_update_rejects_content_addressed_keys(self, tmp_path):
+        storage = Storage(dir=tmp_path, content_addressed=True)
+        key = storage.create(b"immutable")
+
+        with pytest.raises(ValueError, match="immutable"):
+            storage.update(key, b"changed")
+
+    def test_uuid_keys_still_readable_in_content_addressed_mode(self, tmp_path):
+        file_id = Storage(dir=tmp_path).create(b"legacy")
+
+        storage = Storage(dir=tmp_path, content_addressed=True)
+        assert storage.read(file_id).read_bytes() == b"legacy"
+
+    def test_init_app_reads_config(self, app, tmp_path):
+        app.config["STORAGE_CONTENT_ADDRESSED"] = True
+        try:
+            storage = Storage().init_app(app, dir=tmp_path)
+        finally:
+            del app.config["STORAGE_CONTENT_ADDRESSED"]
+
+        assert storage.content_addressed
+        assert storage.create(b"x") == hashlib.sha256(b"x").hexdigest()
+
+
+class TestStreamingUploads:
+    """Test suite for chunked, size-limited uploads."""
+
+    def test_create_reads_in_fixed_size_chunks(self, tmp_path):
+        class RecordingFile(io.BytesIO):
+            sizes = []
+
+            def read(self, size=-1):
+                self.sizes.append(size)
+                return super().read(size)
+
+        data = b"x" * (CHUNK_SIZE * 3 + 1)
+        file = RecordingFile(data)
+
+        file_id = Storage(dir=tmp_path).create(file)
+
+        assert (tmp_path / file_id).read_bytes() == data
+        assert set(file.sizes) == {CHUNK_SIZE}
+
+    def test_create_rejects_oversized_upload_without_leftovers(self, tmp_path):
+        storage = Storage(dir=tmp_path, max_size=10)
+
+        with pytest.raises(UploadTooLarge):
+            storage.create(io.BytesIO(b"x" * 11))
+
+        assert list(tmp_path.iterdir()) == []
+        assert storage.create(b"x" * 10)
+
+    def test_failed_stream_leaves_no_partial_file(self, tmp_path):
+        class BrokenFile:
+            def __init__(self):
+                self.calls = 0
+
+            def read(self, size):
+                self.calls += 1
+                if self.calls > 1:
+                    raise OSError("connection reset")
+                return b"partial"
+
+        with pytest.raises(OSError):
+            Storage(dir=tmp_path).create(BrokenFile())
+
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.parametrize("content_addressed", [False, True])
+    def test_stored_files_get_the_default_file_mode(self, tmp_path, content_addressed):
+        """Test that files are readable like open() would make them, not mkstemp()'s 0600."""
+        storage = Storage(dir=tmp_path, content_addressed=content_addressed)
+
+        path = storage.read(storage.create(io.BytesIO(b"photo bytes")))
+
+        assert stat.S_IMODE(path.stat().st_mode) == FILE_MODE
+
+    def test_init_app_reads_max_size(self, app, tmp_path):
+        app.config["STORAGE_MAX_UPLOAD_SIZE"] = 4
+        try:
+            storage = Storage().init_app(app, dir=tmp_path)
+        finally:
+            app.config["STORAGE_MAX_UPLOAD_SIZE"] = 25 * 1024 * 1024
+
+        with pytest.raises(UploadTooLarge):
+            storage.create(b"12345")
+
+
+class TestStorageVariants:
+    """Test suite for files derived from a stored original."""
+
+    def test_variant_key_appends_parts(self):
+        assert Storage.variant_key("abc", 640, "webp") == "abc.640.webp"
+
+    def test_variants_of_content_keys_are_sharded_with_the_original(self, tmp_path):
+        storage = Storage(dir=tmp_path, content_addressed=True)
+        key = storage.create(b"original")
+        variant = Storage.variant_key(key, 320, "jpeg")
+
+        storage.update(variant, b"small")
+
+        assert storage.read(variant).parent == storage.read(key).parent
+        assert storage.read(variant).read_bytes() == b"small"
+
+    def test_delete_removes_variants(self, tmp_path):
+        storage = Storage(dir=tmp_path)
+        key = storage.create(b"original")
+        storage.update(Storage.variant_key(key, 320, "jpeg"), b"small")
+        other = storage.create(b"other")
+
+        storage.delete(key)
+
+        assert list(tmp_path.iterdir()) == [tmp_path / other]
+
+    def test_content_variants_outlive_shared_references(self, tmp_path):
+        storage = Storage(dir=tmp_path, content_addressed=True)
+        key = storage.create(b"same")
+        storage.create(b"same")
+        variant = Storage.variant_key(key, 320, "webp")
+        storage.update(variant, b"small")
+
+        storage.delete(key)
+        assert storage.read(variant).exists()
+
+        storage.delete(key)
+        assert not storage.read(variant).exists()
+        assert not storage.read(key).exists()
@@ -0,0 +1,123 @@
+"""Tests for the in-memory typeahead index."""
+
+from app.typeahead import TypeaheadIndex
+
+
+def _index(*entries):
+    index = TypeaheadIndex()
+    index.load((slug, name, (name, slug)) for slug, name in entries)
+    return index
+
+
+class TestTypeaheadIndex:
+    def test_search_ranks_exact_then_prefix_then_word_then_substring(self):
+        index = _index(
+            ("brown-sugar", "Brown Sugar"),
+            ("sugar", "Sugar"),
+            ("sugar-snap-peas", "Sugar Snap Peas"),
+            ("unsugared", "Unsugared Cocoa"),
+        )
+
+        assert [slug for slug, _ in index.search("sugar")] == ["sugar", "sugar-snap-peas", "brown-sugar", "unsugared"]
+
+    def test_search_returns_labels_and_respects_limit(self):
+        index = _index(("salt", "Table Salt"), ("sea-salt", "Sea Salt"), ("saltines", "Saltines"))
+
+        assert index.search("sal", limit=2) == [("salt", "Table Salt"), ("saltines", "Saltines")]
+
+    def test_short_queries_use_gram_postings(self):
+        index = _index(("egg", "Egg"), ("vinegar", "Vinegar"), ("salt", "Salt"))
+
+        assert {slug for slug, _ in index.search("eg")} == {"egg", "vinegar"}
+        assert index.search("zz") == []
+
+    def test_search_is_case_and_whitespace_insensitive(self):
+        index = _index(("olive-oil", "Extra  Virgin Olive Oil"))
+
+        assert index.search("  VIRGIN olive ") == [("olive-oil", "Extra  Virgin Olive Oil")]
+
+    def test_add_and_discard_update_entries(self):
+        index = _index(("flour", "Flour"))
+
+        index.add("rye-flour", "Rye Flour", "Rye Flour", "rye-flour")
+        assert {slug for slug, _ in index.search("flour")} == {"flour", "rye-flour"}
+
+        index.add("flour", "Plain", "Plain", "flour")
+        assert index.search("plain") == [("flour", "Plain")]
+
+        index.discard("rye-flour")
+        assert index.search("rye") == []
+        assert len(index) == 1
+
+    def test_add_before_load_is_deferred_to_loader(self):
+        index = TypeaheadIndex(loader=lambda: [("milk", "Milk", ("Milk",))])
+
+        index.add("cream", "Cream")
+
+        assert index.search("cream") == []
+        assert index.search("milk") == [("milk", "Milk")]
+        assert index.loaded
+
+    def test_clear_forces_reload(self):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return [("milk", "Milk", ("Milk",))]
+
+        index = TypeaheadIndex(loader=loader)
+        index.search("milk")
+        index.search("milk")
+        index.clear()
+        index.search("milk")
+
+        assert len(calls) == 2
+
+    def test_prefixes_stay_sorted_through_add_and_discard(self):
+        index = _index(("flour", "Flour"), ("salt", "Salt"))
+
+        index.add("butter", "Butter")
+        index.add("oats", "Oats")
+        index.add("flour", "Bread Flour")
+        index.discard("salt")
+
+        assert index._prefixes == sorted(index._prefixes)
+        assert [key for _, key in index._prefixes] == ["flour", "butter", "oats"]
+
+    def test_reloads_when_version_changes(self):
+        version, calls = [1], []
+
+        def loader():
+            calls.append(1)
+            return [("milk", "Milk", ("Milk",))]
+
+        index = TypeaheadIndex(loader=loader, version=lambda: version[0], check_interval=0)
+        index.search("milk")
+        index.search("milk")
+        assert len(calls) == 1
+
+        version[0] = 2
+        index.search("milk")
+        assert len(calls) == 2
+
+    def test_advance_skips_reload_for_changes_applied_in_process(self):
+        version, calls = [1], []
+
+        def loader():
+            calls.append(1)
+            return [("milk", "Milk", ("Milk",))]
+
+        index = TypeaheadIndex(loader=loader, version=lambda: version[0], check_interval=0)
+        index.search("milk")
+
+        index.add("cream", "Cream")
+        version[0] = 2
+        index.advance(1, 2)
+        assert index.search("cream") == [("cream", "Cream")]
+        assert len(calls) == 1
+
+        # Loaded at another version: changes from elsewhere are missing, so it still reloads.
+        index.advance(5, 6)
+        version[0] = 6
+        index.search("milk")
+        assert len(calls) == 2